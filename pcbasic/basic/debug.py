@@ -11,10 +11,16 @@ import traceback
 import logging
 import os
 import platform
+import string
+import time
+from contextlib import contextmanager
 
 from . import vartypes
 from . import representation
 from . import error
+from . import util
+from . import signals
+from . import basictoken as tk
 
 
 class DebugException(Exception):
@@ -147,6 +153,407 @@ class Debugger(BaseDebugger):
             logging.debug(buf.getvalue()[:-1]) # exclude \n
 
 
+##############################################################################
+# profiler
+
+class Profiler(object):
+    """Per-line execution profiler."""
+
+    # statements that address files
+    file_keywords = (
+        tk.OPEN, tk.CLOSE, tk.FIELD, tk.GET, tk.PUT, tk.LOCK, tk.UNLOCK,
+        tk.KILL, tk.NAME, tk.RESET, tk.FILES, tk.LOAD, tk.SAVE, tk.MERGE,
+        tk.CHAIN, tk.BLOAD, tk.BSAVE)
+    # statements that address files if followed by #
+    hash_keywords = (tk.PRINT, tk.WRITE, tk.INPUT)
+
+    def __init__(self, session, profile_file=u''):
+        """Initialise profiler; start if a report file is given."""
+        self.session = session
+        self.profile_file = profile_file
+        self.active = False
+        self._queue = None
+        self.reset()
+        if profile_file:
+            self.start()
+
+    def reset(self):
+        """Clear the collected timings."""
+        # line number: [hits, statements, seconds]; None for direct mode
+        self.lines = {}
+        # keyword token: [statements, seconds]
+        self.keywords = {}
+        # time spent in events check, on the video queue, in file statements
+        self.sections = {'events': [0, 0.], 'video': [0, 0.], 'files': [0, 0.]}
+
+    def __getstate__(self):
+        """Pickle the profiler; the queue wrapper is rebuilt on attach."""
+        pickle_dict = self.__dict__.copy()
+        pickle_dict['_queue'] = None
+        return pickle_dict
+
+    def start(self):
+        """Start profiling."""
+        if not self.active:
+            self.active = True
+            self.attach()
+
+    def attach(self):
+        """Time the session's current video queue, if profiling."""
+        if self.active:
+            self._queue = TimedQueue(self.session.video_queue, self.sections['video'])
+            self.session.video_queue = self._queue
+
+    def stop(self):
+        """Stop profiling."""
+        if self.active:
+            self.active = False
+            self.session.video_queue = remove_wrapper(self.session.video_queue, self._queue)
+            self._queue = None
+
+    def close(self):
+        """Stop profiling and write the report file, if any."""
+        self.stop()
+        if self.profile_file:
+            self.write(self.profile_file)
+
+    def step(self):
+        """Check events and execute one statement, timing both."""
+        parser = self.session.parser
+        run_mode = parser.run_mode
+        start = time.time()
+        self.session.events.check_events()
+        checked = time.time()
+        try:
+            return parser.parse_statement()
+        finally:
+            self._record(run_mode, checked - start, time.time() - checked)
+
+    def _record(self, run_mode, events_time, elapsed):
+        """Attribute the timings of a statement."""
+        section = self.sections['events']
+        section[0] += 1
+        section[1] += events_time
+        if not run_mode:
+            self._add(None, False, None, elapsed)
+            return
+        pos = self.session.parser.current_statement
+        try:
+            endpos, linenum, _, keyword = self.session.parser.statement_cache[pos]
+        except KeyError:
+            endpos, linenum, keyword = None, None, None
+        self._add(self.session.program.get_line_number(pos),
+                  linenum is not None, keyword, elapsed)
+        if keyword and self._is_file_statement(keyword, endpos):
+            section = self.sections['files']
+            section[0] += 1
+            section[1] += elapsed
+
+    def _add(self, linenum, line_start, keyword, elapsed):
+        """Add timing to the line and keyword tables."""
+        try:
+            record = self.lines[linenum]
+        except KeyError:
+            record = self.lines[linenum] = [0, 0, 0.]
+        record[0] += line_start
+        record[1] += 1
+        record[2] += elapsed
+        if keyword is None or keyword in tk.end_statement:
+            return
+        if keyword[0] in string.ascii_letters:
+            # implicit LET
+            keyword = tk.LET
+        try:
+            record = self.keywords[keyword]
+        except KeyError:
+            record = self.keywords[keyword] = [0, 0.]
+        record[0] += 1
+        record[1] += elapsed
+
+    def _is_file_statement(self, keyword, endpos):
+        """Check if a statement in the program addresses a file."""
+        if keyword in self.file_keywords:
+            if keyword not in (tk.GET, tk.PUT):
+                return True
+        elif keyword not in self.hash_keywords and keyword != tk.LINE:
+            return False
+        # peek at the statement's first argument
+        code = self.session.program.bytecode
+        pos = code.tell()
+        try:
+            code.seek(endpos)
+            c = util.skip_white(code)
+            if keyword == tk.LINE:
+                # LINE INPUT #
+                if c != tk.INPUT:
+                    return False
+                code.read(1)
+                c = util.skip_white(code)
+            elif keyword in (tk.GET, tk.PUT):
+                # graphics GET and PUT take coordinates
+                return c != '('
+            return c == '#'
+        finally:
+            code.seek(pos)
+
+    def write(self, filename):
+        """Write the report as a callgrind file or a sorted table."""
+        name = os.path.basename(filename).lower()
+        with open(filename, 'w') as f:
+            if name.startswith('callgrind.out') or name.endswith('.callgrind'):
+                self._write_callgrind(f)
+            else:
+                self._write_table(f)
+
+    def _write_table(self, f):
+        """Write the report as sorted tables."""
+        total = sum(record[2] for record in self.lines.itervalues())
+        total += self.sections['events'][1]
+        percent = lambda seconds: 100. * seconds / total if total else 0.
+        f.write('%12s %10s %10s %12s %8s\n' % ('line', 'hits', 'statements', 'seconds', '%'))
+        for linenum, (hits, count, seconds) in sorted(
+                self.lines.iteritems(), key=lambda item: -item[1][2]):
+            f.write('%12s %10d %10d %12.6f %8.2f\n' % (
+                'direct' if linenum is None else linenum,
+                hits, count, seconds, percent(seconds)))
+        f.write('\n%12s %10s %10s %12s %8s\n' % ('keyword', '', 'statements', 'seconds', '%'))
+        for keyword, (count, seconds) in sorted(
+                self.keywords.iteritems(), key=lambda item: -item[1][1]):
+            f.write('%12s %10s %10d %12.6f %8.2f\n' % (
+                keyword_name(keyword), '', count, seconds, percent(seconds)))
+        f.write('\n%12s %10s %10s %12s %8s\n' % ('section', '', 'calls', 'seconds', '%'))
+        for section in ('events', 'video', 'files'):
+            count, seconds = self.sections[section]
+            f.write('%12s %10s %10d %12.6f %8.2f\n' % (
+                section, '', count, seconds, percent(seconds)))
+
+    def _write_callgrind(self, f):
+        """Write the report in callgrind format, with program lines as source lines."""
+        f.write('version: 1\ncreator: PC-BASIC\n')
+        f.write('positions: line\nevents: Microseconds Statements Hits\n\n')
+        f.write('fl=BASIC program\nfn=program\n')
+        for linenum, (hits, count, seconds) in sorted(self.lines.iteritems()):
+            if linenum is not None:
+                f.write('%d %d %d %d\n' % (linenum, seconds * 1e6, count, hits))
+        if None in self.lines:
+            hits, count, seconds = self.lines[None]
+            f.write('\nfn=direct mode\n0 %d %d 0\n' % (seconds * 1e6, count))
+        for keyword, (count, seconds) in sorted(self.keywords.iteritems()):
+            f.write('\nfn=%s\n0 %d %d 0\n' % (keyword_name(keyword), seconds * 1e6, count))
+        for section in ('events', 'video', 'files'):
+            count, seconds = self.sections[section]
+            f.write('\nfn=<%s>\n0 %d %d 0\n' % (section, seconds * 1e6, count))
+
+
+class TimedQueue(object):
+    """Queue wrapper that times its put calls."""
+
+    def __init__(self, queue, record):
+        """Wrap a queue; record is a [calls, seconds] list."""
+        self.queue = queue
+        self.record = record
+
+    def put(self, item, block=True, timeout=None):
+        """Put an item on the queue."""
+        start = time.time()
+        self.queue.put(item, block, timeout)
+        self.record[0] += 1
+        self.record[1] += time.time() - start
+
+    def __getattr__(self, attr):
+        """Pass other methods to the queue."""
+        return getattr(self.queue, attr)
+
+
+def keyword_name(token):
+    """Get the name of a keyword token."""
+    try:
+        return tk.keyword[token]
+    except KeyError:
+        return tk.extra_keywords.get(token, token.encode('hex'))
+
+
+##############################################################################
+# startup report
+
+class StartupReport(object):
+    """Record of the subsystems initialised by a session."""
+
+    def __init__(self, report_file=u''):
+        """Start the clock; write a report on close if a file is given."""
+        self.report_file = report_file
+        self.start = time.time()
+        self._last = self.start
+        # name, seconds since start, seconds taken
+        self.entries = []
+
+    def checkpoint(self, name):
+        """Record a subsystem initialised since the previous checkpoint."""
+        now = time.time()
+        self.entries.append((name, self._last - self.start, now - self._last))
+        self._last = now
+
+    @contextmanager
+    def timed(self, name):
+        """Record a subsystem initialised on first use."""
+        start = time.time()
+        yield
+        now = time.time()
+        self.entries.append((name, start - self.start, now - start))
+        self._last = now
+
+    def close(self):
+        """Write the report file, if any."""
+        if self.report_file:
+            self.write(self.report_file)
+
+    def write(self, filename):
+        """Write the subsystems in order of initialisation, with times in milliseconds."""
+        with open(filename, 'w') as f:
+            for name, at, took in self.entries:
+                f.write('%-24s %10.1f %10.1f\n' % (name, at*1000., took*1000.))
+
+
+##############################################################################
+# counters
+
+class Counters(object):
+    """Registry of hot-path counters."""
+
+    def __init__(self, session, counters_file=u''):
+        """Initialise counters; enable if a dump file is given."""
+        self.session = session
+        self.counters_file = counters_file
+        self.enabled = False
+        self._queue = None
+        self.counts = {}
+        if counters_file:
+            self.enable()
+
+    def __getstate__(self):
+        """Pickle the counters; the queue wrapper is rebuilt on attach."""
+        pickle_dict = self.__dict__.copy()
+        pickle_dict['_queue'] = None
+        return pickle_dict
+
+    def enable(self):
+        """Start counting."""
+        if not self.enabled:
+            self.enabled = True
+            self.attach()
+
+    def attach(self):
+        """Count signals on the session's current video queue, if enabled."""
+        if self.enabled:
+            self._queue = CountingQueue(self.session.video_queue, self)
+            self.session.video_queue = self._queue
+
+    def disable(self):
+        """Stop counting."""
+        if self.enabled:
+            self.enabled = False
+            self.session.video_queue = remove_wrapper(self.session.video_queue, self._queue)
+            self._queue = None
+
+    def reset(self):
+        """Set all counters to zero."""
+        self.counts = {}
+
+    def count(self, name, n=1):
+        """Add to a counter."""
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def close(self):
+        """Stop counting and write the dump file, if any."""
+        self.disable()
+        if self.counters_file:
+            self.write(self.counters_file)
+
+    def write(self, filename):
+        """Write the counters to a file, sorted by name."""
+        with open(filename, 'w') as f:
+            for name, value in sorted(self.counts.iteritems()):
+                f.write('%-40s %12d\n' % (name, value))
+
+
+class CountingStream(object):
+    """Stream wrapper that counts bytes read and written."""
+
+    def __init__(self, stream, counters, device_name):
+        """Wrap a stream; count under the device name."""
+        self.stream = stream
+        self.counters = counters
+        self.read_counter = 'device.%s.read' % device_name
+        self.write_counter = 'device.%s.write' % device_name
+
+    def read(self, *args):
+        """Read from the stream."""
+        s = self.stream.read(*args)
+        if self.counters.enabled:
+            self.counters.count(self.read_counter, len(s))
+        return s
+
+    def readline(self, *args):
+        """Read a line from the stream."""
+        s = self.stream.readline(*args)
+        if self.counters.enabled:
+            self.counters.count(self.read_counter, len(s))
+        return s
+
+    def write(self, s):
+        """Write to the stream."""
+        self.stream.write(s)
+        if self.counters.enabled:
+            self.counters.count(self.write_counter, len(s))
+
+    def __getattr__(self, attr):
+        """Pass other methods to the stream."""
+        # don't pass special methods: stream is not yet set when unpickling
+        if attr.startswith('__'):
+            raise AttributeError(attr)
+        return getattr(self.stream, attr)
+
+
+# names of video signals by event type
+video_signal_names = dict(
+        (value, name) for name, value in vars(signals).iteritems()
+        if name.startswith('VIDEO_'))
+
+
+class CountingQueue(object):
+    """Queue wrapper that counts signals by type."""
+
+    def __init__(self, queue, counters):
+        """Wrap a queue."""
+        self.queue = queue
+        self.counters = counters
+
+    def put(self, item, block=True, timeout=None):
+        """Put an item on the queue."""
+        self.queue.put(item, block, timeout)
+        self.counters.count('video.' + video_signal_names.get(item.event_type, str(item.event_type)))
+        if item.event_type == signals.VIDEO_BATCH:
+            for signal in item.params:
+                self.counters.count('video.batched.' + video_signal_names.get(signal.event_type, str(signal.event_type)))
+
+    def __getattr__(self, attr):
+        """Pass other methods to the queue."""
+        return getattr(self.queue, attr)
+
+
+def remove_wrapper(queue, wrapper):
+    """Remove a wrapper from a chain of queue wrappers; return the new outer queue."""
+    if queue is wrapper:
+        return wrapper.queue
+    outer = queue
+    while isinstance(outer, (TimedQueue, CountingQueue)):
+        if outer.queue is wrapper:
+            outer.queue = wrapper.queue
+            break
+        outer = outer.queue
+    return queue
+
+
 ##############################################################################
 # debugging commands
 
@@ -172,6 +579,30 @@ def trace(on=True):
     """Switch line number tracing on or off."""
     debugger.debug_tron = on
 
+def profile(on=True):
+    """Switch per-line profiling on or off."""
+    if on:
+        session.profiler.start()
+    else:
+        session.profiler.stop()
+
+def write_profile(filename, clear=False):
+    """Write the profile report to a file; callgrind format if named callgrind.out.*"""
+    session.profiler.write(filename)
+    if clear:
+        session.profiler.reset()
+
+def counters(on=True):
+    """Switch hot-path counters on or off."""
+    if on:
+        session.counters.enable()
+    else:
+        session.counters.disable()
+
+def write_counters(filename):
+    """Write the hot-path counters to a file."""
+    session.counters.write(filename)
+
 def watch(expr):
     """Add an expression to the watch list."""
     outs = session.tokeniser.tokenise_line('?'+expr)
@@ -189,14 +620,13 @@ def show_screen():
     i = 0
     lastwrap = False
     for row in session.screen.apage.row:
-        s = [ c[0] for c in row.buf ]
         i += 1
         outstr = '{0:2}'.format(i)
         if lastwrap:
             outstr += ('\\')
         else:
             outstr += ('|')
-        outstr += (''.join(s))
+        outstr += session.screen.apage.get_chars(i)
         if row.wrap:
             logging.debug(outstr + '\\ {0:2}'.format(row.end))
         else:
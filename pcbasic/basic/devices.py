@@ -605,6 +605,10 @@ class SCRNFile(RawFile):
                 and self.col != 1 and self.col-1 + s_width > self.width and not newline):
             self.screen.write_line(do_echo=do_echo)
             self._col = 1
+        if self.is_master:
+            # the cursor never passes the screen width
+            self.screen.write_chars(str(s), do_echo=do_echo)
+            return
         cwidth = self.screen.mode.width
         for c in str(s):
             if self.width <= cwidth and self.col > self.width:
@@ -6,7 +6,10 @@ Text and graphics buffer, cursor and screen operations
 This file is released under the GNU GPL version 3 or later.
 """
 
+import re
+import time
 import logging
+from collections import OrderedDict
 
 try:
     import numpy
@@ -28,40 +31,38 @@ carry_col_9_chars = [chr(c) for c in range(0xb0, 0xdf+1)]
 # ascii codepoints for which to repeat row 8 in row 9 (box drawing)
 carry_row_9_chars = [chr(c) for c in range(0xb0, 0xdf+1)]
 
+# control characters that write() interprets, or runs of other characters
+write_split_re = re.compile('[\t\n\r\a\x0B\x0C\x1C-\x1F]|[^\t\n\r\a\x0B\x0C\x1C-\x1F]+')
+
 
 ###############################################################################
 # screen buffer
 
 class TextRow(object):
-    """Buffer for a single row of the screen."""
+    """Location and line continuation data for a single row of the screen."""
 
-    def __init__(self, battr, bwidth):
+    def __init__(self, offset):
         """Set up screen row empty and unwrapped."""
-        # screen buffer, initialised to spaces, dim white on black
-        self.buf = [(' ', battr)] * bwidth
-        # character is part of double width char; 0 = no; 1 = lead, 2 = trail
-        self.double = [ 0 ] * bwidth
+        # start of the row in the page buffers
+        self.offset = offset
         # last non-whitespace character
         self.end = 0
         # line continues on next row (either LF or word wrap happened)
         self.wrap = False
 
-    def clear(self, battr):
-        """Clear the screen row buffer. Leave wrap untouched."""
-        bwidth = len(self.buf)
-        self.buf = [(' ', battr)] * bwidth
-        # character is part of double width char; 0 = no; 1 = lead, 2 = trail
-        self.double = [ 0 ] * bwidth
-        # last non-whitespace character
-        self.end = 0
-
 
 class TextPage(object):
     """Buffer for a screen page."""
 
     def __init__(self, battr, bwidth, bheight, pagenum, do_dbcs, codepage):
         """Initialise the screen buffer to given dimensions."""
-        self.row = [TextRow(battr, bwidth) for _ in xrange(bheight)]
+        # characters and attributes, initialised to spaces
+        # rows are stored in any order: scrolling only reorders the row list
+        self.chars = bytearray(b' ') * (bwidth * bheight)
+        self.attrs = bytearray(chr(battr)) * (bwidth * bheight)
+        # character is part of double width char; 0 = no; 1 = lead, 2 = trail
+        self.double = bytearray(bwidth * bheight)
+        self.row = [TextRow(y*bwidth) for y in xrange(bheight)]
         self.width = bwidth
         self.height = bheight
         self.pagenum = pagenum
@@ -70,45 +71,177 @@ class TextPage(object):
 
     def get_char_attr(self, crow, ccol, want_attr):
         """Retrieve a byte from the screen (SBCS or DBCS half-char)."""
-        ca = self.row[crow-1].buf[ccol-1][want_attr]
-        return ca if want_attr else ord(ca)
+        offset = self.row[crow-1].offset + ccol-1
+        return self.attrs[offset] if want_attr else self.chars[offset]
+
+    def get_char(self, crow, ccol):
+        """Retrieve a character from the screen."""
+        return chr(self.chars[self.row[crow-1].offset + ccol-1])
+
+    def get_attr(self, crow, ccol):
+        """Retrieve an attribute from the screen."""
+        return self.attrs[self.row[crow-1].offset + ccol-1]
+
+    def get_double(self, crow, ccol):
+        """Retrieve the double-width status; 0 = no; 1 = lead, 2 = trail."""
+        return self.double[self.row[crow-1].offset + ccol-1]
+
+    def get_chars(self, crow, start=1, stop=None):
+        """Retrieve the characters of a row from column start up to but excluding stop."""
+        offset = self.row[crow-1].offset - 1
+        if stop is None:
+            stop = self.width + 1
+        return str(self.chars[offset+start:offset+max(start, stop)])
+
+    def put_chars_attr(self, crow, ccol, s, cattr):
+        """Put a run of single-byte characters on one row; no DBCS."""
+        start = self.row[crow-1].offset + ccol-1
+        stop = start + len(s)
+        self.chars[start:stop] = s
+        self.attrs[start:stop] = chr(cattr) * len(s)
+        self.double[start:stop] = bytearray(len(s))
+        return ccol, ccol+len(s)
+
+    def clear_chars(self, crow, start, stop, battr):
+        """Clear an (inclusive) column range of a row. Leave end and wrap untouched."""
+        offset = self.row[crow-1].offset - 1
+        num = stop - start + 1
+        self.chars[offset+start:offset+stop+1] = b' ' * num
+        self.attrs[offset+start:offset+stop+1] = chr(battr) * num
+        self.double[offset+start:offset+stop+1] = bytearray(num)
+
+    def clear_rows(self, start, stop, battr):
+        """Clear an (inclusive) range of rows. Leave wrap untouched."""
+        for row in self.row[start-1:stop]:
+            self.chars[row.offset:row.offset+self.width] = b' ' * self.width
+            self.attrs[row.offset:row.offset+self.width] = chr(battr) * self.width
+            self.double[row.offset:row.offset+self.width] = bytearray(self.width)
+            row.end = 0
+
+    def copy_chars(self, src_row, src_col, dst_row, dst_col, num):
+        """Copy characters and attributes within the page."""
+        src = self.row[src_row-1].offset + src_col-1
+        dst = self.row[dst_row-1].offset + dst_col-1
+        self.chars[dst:dst+num] = self.chars[src:src+num]
+        self.attrs[dst:dst+num] = self.attrs[src:src+num]
+
+    def insert_char_attr(self, crow, ccol, c, cattr):
+        """Insert a byte, shifting the row to the right; return the byte pushed off the end."""
+        start = self.row[crow-1].offset
+        stop = start + self.width
+        pushed = chr(self.chars[stop-1]), self.attrs[stop-1]
+        self.chars[start+ccol:stop] = self.chars[start+ccol-1:stop-1]
+        self.attrs[start+ccol:stop] = self.attrs[start+ccol-1:stop-1]
+        self.chars[start+ccol-1], self.attrs[start+ccol-1] = ord(c), cattr
+        return pushed
+
+    def delete_char_attr(self, crow, ccol, fill_col, c, cattr):
+        """Delete a byte, shifting the row to the left up to fill_col; put a byte at fill_col."""
+        start = self.row[crow-1].offset
+        stop = start + self.width
+        for plane, value in ((self.chars, ord(c)), (self.attrs, cattr)):
+            data = plane[start:stop]
+            del data[ccol-1]
+            data.insert(fill_col-1, value)
+            plane[start:stop] = data
+
+    def scroll_up(self, from_line, bottom, battr):
+        """Scroll rows from_line to bottom up by one line, leaving the bottom row empty."""
+        if from_line > bottom:
+            return
+        # recycle the row scrolled out as the new bottom row
+        row = self.row.pop(from_line-1)
+        row.wrap = False
+        self.row.insert(bottom-1, row)
+        self.clear_rows(bottom, bottom, battr)
+
+    def scroll_down(self, from_line, bottom, battr):
+        """Scroll rows from_line to bottom down by one line, leaving row from_line empty."""
+        if from_line > bottom:
+            return
+        # recycle the row scrolled out as the new top row
+        row = self.row.pop(bottom-1)
+        row.wrap = False
+        self.row.insert(from_line-1, row)
+        self.clear_rows(from_line, from_line, battr)
+
+    def get_memory(self, offset, num_bytes):
+        """Retrieve bytes from the page's video memory, characters and attributes interleaved."""
+        rowsize = 2 * self.width
+        stop = min(offset + num_bytes, rowsize * self.height)
+        data = bytearray()
+        for row in self.row[offset // rowsize:(stop-1) // rowsize + 1]:
+            rowdata = bytearray(rowsize)
+            rowdata[::2] = self.chars[row.offset:row.offset+self.width]
+            rowdata[1::2] = self.attrs[row.offset:row.offset+self.width]
+            data += rowdata
+        return data[offset % rowsize:offset % rowsize + max(0, stop-offset)]
+
+    def set_memory(self, offset, bytes):
+        """Set bytes in the page's video memory; return the (inclusive) range of rows changed."""
+        rowsize = 2 * self.width
+        stop = min(offset + len(bytes), rowsize * self.height)
+        if offset >= stop:
+            return 1, 0
+        bytes = bytearray(bytes[:stop-offset])
+        first, last = offset // rowsize + 1, (stop-1) // rowsize + 1
+        if self.codepage.dbcs and self.do_dbcs:
+            # reinterpret DBCS byte by byte
+            for addr in xrange(offset, stop):
+                crow, ccol = addr // rowsize + 1, (addr % rowsize) // 2 + 1
+                if addr % 2 == 0:
+                    c, a = chr(bytes[addr-offset]), self.get_attr(crow, ccol)
+                else:
+                    c, a = self.get_char(crow, ccol), bytes[addr-offset]
+                self.put_char_attr(crow, ccol, c, a, one_only=False)
+        else:
+            data = self.get_memory((first-1) * rowsize, (last-first+1) * rowsize)
+            data[offset % rowsize:offset % rowsize + len(bytes)] = bytes
+            for i, row in enumerate(self.row[first-1:last]):
+                rowdata = data[i*rowsize:(i+1)*rowsize]
+                self.chars[row.offset:row.offset+self.width] = rowdata[::2]
+                self.attrs[row.offset:row.offset+self.width] = rowdata[1::2]
+                self.double[row.offset:row.offset+self.width] = bytearray(self.width)
+        return first, last
 
     def put_char_attr(self, crow, ccol, c, cattr, one_only=False, force=False):
         """Put a byte to the screen, reinterpreting SBCS and DBCS as necessary."""
+        chars, double = self.chars, self.double
+        # offset of column zero, so that offset+ccol indexes the row
+        offset = self.row[crow-1].offset - 1
         # update the screen buffer
-        self.row[crow-1].buf[ccol-1] = (c, cattr)
+        chars[offset+ccol], self.attrs[offset+ccol] = ord(c), cattr
         # mark the replaced char for refreshing
         start, stop = ccol, ccol+1
-        self.row[crow-1].double[ccol-1] = 0
+        double[offset+ccol] = 0
         # mark out sbcs and dbcs characters
         if self.codepage.dbcs and self.do_dbcs:
             orig_col = ccol
             # replace chars from here until necessary to update double-width chars
-            therow = self.row[crow-1]
             # replacing a trail byte? take one step back
             # previous char could be a lead byte? take a step back
-            if (ccol > 1 and therow.double[ccol-2] != 2 and
-                    (therow.buf[ccol-1][0] in self.codepage.trail or
-                     therow.buf[ccol-2][0] in self.codepage.lead)):
+            if (ccol > 1 and double[offset+ccol-1] != 2 and
+                    (chr(chars[offset+ccol]) in self.codepage.trail or
+                     chr(chars[offset+ccol-1]) in self.codepage.lead)):
                 ccol -= 1
                 start -= 1
             # check all dbcs characters between here until it doesn't matter anymore
             while ccol < self.width:
-                c = therow.buf[ccol-1][0]
-                d = therow.buf[ccol][0]
+                c = chr(chars[offset+ccol])
+                d = chr(chars[offset+ccol+1])
                 if (c in self.codepage.lead and
                         d in self.codepage.trail):
-                    if (therow.double[ccol-1] == 1 and
-                            therow.double[ccol] == 2 and ccol > orig_col):
+                    if (double[offset+ccol] == 1 and
+                            double[offset+ccol+1] == 2 and ccol > orig_col):
                         break
-                    therow.double[ccol-1] = 1
-                    therow.double[ccol] = 2
+                    double[offset+ccol] = 1
+                    double[offset+ccol+1] = 2
                     start, stop = min(start, ccol), max(stop, ccol+2)
                     ccol += 2
                 else:
-                    if therow.double[ccol-1] == 0 and ccol > orig_col:
+                    if double[offset+ccol] == 0 and ccol > orig_col:
                         break
-                    therow.double[ccol-1] = 0
+                    double[offset+ccol] = 0
                     start, stop = min(start, ccol), max(stop, ccol+1)
                     ccol += 1
                 if (ccol >= self.width or
@@ -120,8 +253,8 @@ class TextPage(object):
                 connecting = 0
                 bset = -1
                 while ccol < stop+2 and ccol < self.width:
-                    c = therow.buf[ccol-1][0]
-                    d = therow.buf[ccol][0]
+                    c = chr(chars[offset+ccol])
+                    d = chr(chars[offset+ccol+1])
                     if bset > -1 and self.codepage.connects(c, d, bset):
                         connecting += 1
                     else:
@@ -133,16 +266,16 @@ class TextPage(object):
                                 bset = b
                                 connecting = 1
                     if connecting >= 2:
-                        therow.double[ccol] = 0
-                        therow.double[ccol-1] = 0
-                        therow.double[ccol-2] = 0
+                        double[offset+ccol+1] = 0
+                        double[offset+ccol] = 0
+                        double[offset+ccol-1] = 0
                         start = min(start, ccol-1)
-                        if ccol > 2 and therow.double[ccol-3] == 1:
-                            therow.double[ccol-3] = 0
+                        if ccol > 2 and double[offset+ccol-2] == 1:
+                            double[offset+ccol-2] = 0
                             start = min(start, ccol-2)
                         if (ccol < self.width-1 and
-                                therow.double[ccol+1] == 2):
-                            therow.double[ccol+1] = 0
+                                double[offset+ccol+2] == 2):
+                            double[offset+ccol+2] = 0
                             stop = max(stop, ccol+2)
                     ccol += 1
         return start, stop
@@ -159,10 +292,12 @@ class TextBuffer(object):
 
     def copy_page(self, src, dst):
         """Copy source to destination page."""
-        for x in range(self.height):
-            dstrow = self.pages[dst].row[x]
-            srcrow = self.pages[src].row[x]
-            dstrow.buf[:] = srcrow.buf[:]
+        srcpage, dstpage = self.pages[src], self.pages[dst]
+        dstpage.chars[:] = srcpage.chars
+        dstpage.attrs[:] = srcpage.attrs
+        dstpage.double[:] = srcpage.double
+        for dstrow, srcrow in zip(dstpage.row, srcpage.row):
+            dstrow.offset = srcrow.offset
             dstrow.end = srcrow.end
             dstrow.wrap = srcrow.wrap
 
@@ -178,10 +313,8 @@ class PixelBuffer(object):
 
     def copy_page(self, src, dst):
         """Copy source to destination page."""
-        for x in range(self.height):
-            dstrow = self.pages[dst].row[x]
-            srcrow = self.pages[src].row[x]
-            dstrow.buf[:] = srcrow.buf[:]
+        for y in range(self.height):
+            self.pages[dst].buffer[y][:] = self.pages[src].buffer[y]
 
 class PixelPage(object):
     """Buffer for a screen page."""
@@ -203,11 +336,17 @@ class PixelPage(object):
         pagedict = self.__dict__.copy()
         # lambdas can't be pickled
         pagedict['operations'] = None
+        if not numpy:
+            # store as one flat block rather than a list of lists of ints
+            pagedict['buffer'] = bytearray(attr for row in self.buffer for attr in row)
         return pagedict
 
     def __setstate__(self, pagedict):
         """Initialise from pickled page."""
         self.__dict__.update(pagedict)
+        if isinstance(self.buffer, bytearray):
+            self.buffer = [list(self.buffer[y*self.width:(y+1)*self.width])
+                           for y in range(self.height)]
         self.init_operations()
 
     def put_pixel(self, x, y, attr):
@@ -224,6 +363,14 @@ class PixelPage(object):
         except IndexError:
             return 0
 
+    def put_pixels(self, xs, ys, attr):
+        """Put a set of pixels, given as lists of coordinates, in the buffer."""
+        if numpy:
+            self.buffer[ys, xs] = attr
+        else:
+            for x, y in zip(xs, ys):
+                self.buffer[y][x] = attr
+
     def fill_interval(self, x0, x1, y, attr):
         """Write a list of attributes to a scanline interval."""
         try:
@@ -288,31 +435,16 @@ class PixelPage(object):
             except IndexError:
                 return numpy.zeros((y1-y0+1, x1-x0+1), dtype=numpy.int8)
 
-        def move_rect(self, sx0, sy0, sx1, sy1, tx0, ty0):
-            """Move pixels from an area to another, replacing with attribute 0."""
-            w, h = sx1-sx0+1, sy1-sy0+1
-            area = numpy.array(self.buffer[sy0:sy1+1, sx0:sx1+1])
-            self.buffer[sy0:sy1+1, sx0:sx1+1] = numpy.zeros((h, w), dtype=numpy.int8)
-            self.buffer[ty0:ty0+h, tx0:tx0+w] = area
-
-        def get_until(self, x0, x1, y, c):
-            """Get the attribute values of a scanline interval [x0, x1-1]."""
-            if x0 == x1:
-                return []
-            toright = x1 > x0
-            if not toright:
-                x0, x1 = x1+1, x0+1
-            try:
-                arr = self.buffer[y, x0:x1]
-            except IndexError:
-                return []
-            found = numpy.where(arr == c)
-            if len(found[0]) > 0:
-                if toright:
-                    arr = arr[:found[0][0]]
-                else:
-                    arr = arr[found[0][-1]+1:]
-            return list(arr.flatten())
+        def scroll_up(self, y0, y1, num):
+            """Scroll scanlines y0 to y1 up by num lines, clearing the bottom ones to attribute 0."""
+            # assignment copies overlapping slices as a whole
+            self.buffer[y0:y1+1-num] = self.buffer[y0+num:y1+1]
+            self.buffer[y1+1-num:y1+1] = 0
+
+        def scroll_down(self, y0, y1, num):
+            """Scroll scanlines y0 to y1 down by num lines, clearing the top ones to attribute 0."""
+            self.buffer[y0+num:y1+1] = self.buffer[y0:y1+1-num]
+            self.buffer[y0:y0+num] = 0
 
     else:
         def init_operations(self):
@@ -332,6 +464,8 @@ class PixelPage(object):
                 self.buffer[y][x:x+len(colours)] = [(c & mask) |
                                                 (self.buffer[y][x+i] & inv_mask)
                                                 for i,c in enumerate(colours)]
+            else:
+                self.buffer[y][x:x+len(colours)] = colours
             return self.buffer[y][x:x+len(colours)]
 
         def get_interval(self, x, y, length):
@@ -358,8 +492,8 @@ class PixelPage(object):
             try:
                 for y in range(y0, y1+1):
                     self.buffer[y][x0:x1+1] = [
-                        [self.operations[operation_token](a, b)
-                        for a, b in zip(self.buffer[y][x0:x1+1], array)]]
+                        self.operations[operation_token](a, b)
+                        for a, b in zip(self.buffer[y][x0:x1+1], array[y-y0])]
                 return [self.buffer[y][x0:x1+1] for y in range(y0, y1+1)]
             except IndexError:
                 return [[0]*(x1-x0+1) for _ in range(y1-y0+1)]
@@ -371,25 +505,107 @@ class PixelPage(object):
             except IndexError:
                 return [[0]*(x1-x0+1) for _ in range(y1-y0+1)]
 
-        def move_rect(self, sx0, sy0, sx1, sy1, tx0, ty0):
-            """Move pixels from an area to another, replacing with attribute 0."""
-            for y in range(0, sy1-sy0+1):
-                row = self.buffer[sy0+y][sx0:sx1+1]
-                self.buffer[sy0+y][sx0:sx1+1] = [0] * (sx1-sx0+1)
-                self.buffer[ty0+y][tx0:tx0+(sx1-sx0+1)] = row
-
-        def get_until(self, x0, x1, y, c):
-            """Get the attribute values of a scanline interval [x0, x1-1]."""
-            if x0 == x1:
-                return []
-            toright = x1 > x0
-            if not toright:
-                x0, x1 = x1+1, x0+1
-            try:
-                index = self.buffer[y][x0:x1].index(c)
-            except ValueError:
-                index = x1-x0
-            return self.buffer[y][x0:x0+index]
+        def scroll_up(self, y0, y1, num):
+            """Scroll scanlines y0 to y1 up by num lines, clearing the bottom ones to attribute 0."""
+            # recycle the scanlines scrolled out; only the row list is reordered
+            rows = self.buffer[y0:y0+num]
+            for row in rows:
+                row[:] = [0] * self.width
+            self.buffer[y0:y1+1] = self.buffer[y0+num:y1+1] + rows
+
+        def scroll_down(self, y0, y1, num):
+            """Scroll scanlines y0 to y1 down by num lines, clearing the top ones to attribute 0."""
+            rows = self.buffer[y1+1-num:y1+1]
+            for row in rows:
+                row[:] = [0] * self.width
+            self.buffer[y0:y1+1] = rows + self.buffer[y0:y1+1-num]
+
+###############################################################################
+# video signal batching
+
+class FrameBatch(object):
+    """Drawing operations collected over a frame and sent as a single signal."""
+
+    # minimum time between batches, in seconds
+    frame_time = 1./60.
+
+    def __init__(self, screen):
+        """Initialise an empty batch."""
+        self.screen = screen
+        self._next_frame = 0
+        self._clear()
+
+    def _clear(self):
+        """Drop the collected operations."""
+        # glyph signal parameters by (pagenum, row, col), in order of drawing
+        self.glyphs = OrderedDict()
+        # changed area by pagenum, as [x0, y0, x1, y1]
+        self.rects = {}
+        # last palette set, if changed
+        self.palette = None
+
+    def put_glyph(self, params):
+        """Collect a glyph; it replaces any glyph drawn earlier at the same position."""
+        key = params[:3]
+        self.glyphs.pop(key, None)
+        self.glyphs[key] = params
+
+    def set_palette(self, rgb_palette_0, rgb_palette_1):
+        """Collect a palette change; it replaces any earlier change."""
+        # copy, as the lists are changed in place
+        self.palette = (list(rgb_palette_0), rgb_palette_1 and list(rgb_palette_1))
+
+    def mark(self, pagenum, x0, y0, x1, y1):
+        """Mark an area of a pixel page as changed."""
+        if x1 < x0 or y1 < y0:
+            return
+        rect = self.rects.get(pagenum)
+        if rect is None:
+            self.rects[pagenum] = [x0, y0, x1, y1]
+        else:
+            if x0 < rect[0]:
+                rect[0] = x0
+            if y0 < rect[1]:
+                rect[1] = y0
+            if x1 > rect[2]:
+                rect[2] = x1
+            if y1 > rect[3]:
+                rect[3] = y1
+
+    def put(self, signal):
+        """Send a signal that is not batched, after any collected operations."""
+        self.flush()
+        self.screen.session.video_queue.put(signal)
+
+    def tick(self):
+        """Send the collected operations if a frame has passed."""
+        if time.time() >= self._next_frame:
+            self.flush()
+
+    def flush(self):
+        """Send the collected operations now."""
+        if not self.glyphs and not self.rects and not self.palette:
+            return
+        batch = []
+        if self.palette:
+            batch.append(signals.Event(signals.VIDEO_SET_PALETTE, self.palette))
+        batch += [signals.Event(signals.VIDEO_PUT_GLYPH, params)
+                  for params in self.glyphs.itervalues()]
+        for pagenum, rect in self.rects.iteritems():
+            batch += self._refresh_signals(pagenum, rect)
+        self._clear()
+        self._next_frame = time.time() + self.frame_time
+        self.screen.session.video_queue.put(signals.Event(signals.VIDEO_BATCH, batch))
+
+    def _refresh_signals(self, pagenum, rect):
+        """Build the signal to redraw a changed area from the shared pixel page."""
+        page = self.screen.pixels.pages[pagenum]
+        x0, y0 = max(0, rect[0]), max(0, rect[1])
+        x1, y1 = min(page.width-1, rect[2]), min(page.height-1, rect[3])
+        if x1 < x0 or y1 < y0:
+            return []
+        return [signals.Event(signals.VIDEO_REFRESH_RECT, (pagenum, x0, y0, x1, y1))]
+
 
 ###############################################################################
 # screen operations
@@ -425,7 +641,7 @@ class Screen(object):
         (0xff,0x55,0x55), (0xff,0x55,0xff), (0xff,0xff,0x55), (0xff,0xff,0xff) )
 
     def __init__(self, session, initial_width, video_mem_size, capabilities, monitor, sound, redirect, fkey_macros,
-                cga_low, mono_tint, screen_aspect, codepage, font_family, warn_fonts):
+                cga_low, mono_tint, screen_aspect, codepage, font_family, warn_fonts, cache_dir):
         """Minimal initialisiation of the screen."""
         # emulated video card - cga, ega, etc
         if capabilities == 'ega' and monitor == 'mono':
@@ -478,7 +694,9 @@ class Screen(object):
         self.codepage = codepage
         # session dependence only for queues and wait() in Graphics
         self.session = session
-        self.session.video_queue.put(signals.Event(
+        # drawing operations are sent to the video plugin once per frame
+        self.batch = FrameBatch(self)
+        self.batch.put(signals.Event(
                 signals.VIDEO_SET_CODEPAGE, self.codepage))
         # prepare fonts
         heights_needed = set([8])
@@ -492,7 +710,7 @@ class Screen(object):
         # break up any grapheme clusters and add components to set of needed glyphs
         chars_needed |= set(c for cluster in chars_needed if len(cluster) > 1 for c in cluster)
         self.fonts = typeface.load_fonts(font_family, heights_needed,
-                    chars_needed, self.codepage.substitutes, warn_fonts)
+                    chars_needed, self.codepage.substitutes, warn_fonts, cache_dir)
         # viewport parameters
         self.view_start = 1
         self.scroll_height = 24
@@ -509,7 +727,7 @@ class Screen(object):
         # function key macros
         self.fkey_macros = fkey_macros
         # print screen target, to be set later due to init order issues
-        self.lpt1_file = None
+        self.devices = None
         # initialise a fresh textmode screen
         self.set_mode(self.mode, 0, 1, 0, 0)
 
@@ -522,35 +740,36 @@ class Screen(object):
     def rebuild(self):
         """Rebuild the screen from scratch."""
         # set the codepage
-        self.session.video_queue.put(signals.Event(
+        self.batch.put(signals.Event(
                 signals.VIDEO_SET_CODEPAGE, self.codepage))
         # set the screen mode
-        self.session.video_queue.put(signals.Event(signals.VIDEO_SET_MODE, self.mode))
+        self.batch.put(signals.Event(signals.VIDEO_SET_MODE, self.mode))
+        self.share_pixel_pages()
         if self.mode.is_text_mode:
             # send glyphs to signals; copy is necessary
             # as dict may change here while the other thread is working on it
-            self.session.video_queue.put(signals.Event(signals.VIDEO_BUILD_GLYPHS,
+            self.batch.put(signals.Event(signals.VIDEO_BUILD_GLYPHS,
                     dict((k,v) for k,v in self.glyphs.iteritems())))
         # set the visible and active pages
-        self.session.video_queue.put(signals.Event(signals.VIDEO_SET_PAGE, (self.vpagenum, self.apagenum)))
+        self.batch.put(signals.Event(signals.VIDEO_SET_PAGE, (self.vpagenum, self.apagenum)))
         # rebuild palette
         self.palette.set_all(self.palette.palette, check_mode=False)
         # fix the cursor
-        self.session.video_queue.put(signals.Event(signals.VIDEO_SET_CURSOR_SHAPE,
+        self.batch.put(signals.Event(signals.VIDEO_SET_CURSOR_SHAPE,
                 (self.cursor.width, self.mode.font_height,
                  self.cursor.from_line, self.cursor.to_line)))
-        self.session.video_queue.put(signals.Event(signals.VIDEO_MOVE_CURSOR,
+        self.batch.put(signals.Event(signals.VIDEO_MOVE_CURSOR,
                 (self.current_row, self.current_col)))
         if self.mode.is_text_mode:
             fore, _, _, _ = self.split_attr(
-                self.apage.row[self.current_row-1].buf[self.current_col-1][1] & 0xf)
+                self.apage.get_attr(self.current_row, self.current_col) & 0xf)
         else:
             fore, _, _, _ = self.split_attr(self.mode.cursor_index or self.attr)
-        self.session.video_queue.put(signals.Event(signals.VIDEO_SET_CURSOR_ATTR, fore))
+        self.batch.put(signals.Event(signals.VIDEO_SET_CURSOR_ATTR, fore))
         self.cursor.reset_visibility()
         # set the border
         fore, _, _, _ = self.split_attr(self.border_attr)
-        self.session.video_queue.put(signals.Event(signals.VIDEO_SET_BORDER_ATTR, fore))
+        self.batch.put(signals.Event(signals.VIDEO_SET_BORDER_ATTR, fore))
         # redraw the text screen and rebuild text buffers in video plugin
         for pagenum in range(self.mode.num_pages):
             for crow in range(self.mode.height):
@@ -559,9 +778,8 @@ class Screen(object):
                                    for_keys=True, text_only=True)
             # redraw graphics
             if not self.mode.is_text_mode:
-                self.session.video_queue.put(signals.Event(signals.VIDEO_PUT_RECT, (pagenum, 0, 0,
-                                self.mode.pixel_width-1, self.mode.pixel_height-1,
-                                self.pixels.pages[pagenum].buffer)))
+                self.batch.mark(pagenum, 0, 0,
+                                self.mode.pixel_width-1, self.mode.pixel_height-1)
 
     def screen(self, new_mode, new_colorswitch, new_apagenum, new_vpagenum,
                erase=1, new_width=None):
@@ -667,11 +885,11 @@ class Screen(object):
                 'No %d-pixel font available. Could not enter video mode %s.',
                 mode_info.font_height, mode_info.name)
             raise error.RunError(error.IFC)
-        self.session.video_queue.put(signals.Event(signals.VIDEO_SET_MODE, mode_info))
+        self.batch.put(signals.Event(signals.VIDEO_SET_MODE, mode_info))
         if mode_info.is_text_mode:
             # send glyphs to signals; copy is necessary
             # as dict may change here while the other thread is working on it
-            self.session.video_queue.put(signals.Event(signals.VIDEO_BUILD_GLYPHS,
+            self.batch.put(signals.Event(signals.VIDEO_BUILD_GLYPHS,
                                                                 self.glyphs))
         # attribute and border persist on width-only change
         if (not (self.mode.is_text_mode and mode_info.is_text_mode) or
@@ -695,6 +913,7 @@ class Screen(object):
         if not self.mode.is_text_mode:
             self.pixels = PixelBuffer(self.mode.pixel_width, self.mode.pixel_height,
                                     self.mode.num_pages, self.mode.bitsperpixel)
+            self.share_pixel_pages()
         # ensure current position is not outside new boundaries
         self.current_row, self.current_col = 1, 1
         # set active page & visible page, counting from 0.
@@ -707,7 +926,7 @@ class Screen(object):
         # set the attribute
         if not self.mode.is_text_mode:
             fore, _, _, _ = self.split_attr(self.mode.cursor_index or self.attr)
-            self.session.video_queue.put(signals.Event(signals.VIDEO_SET_CURSOR_ATTR, fore))
+            self.batch.put(signals.Event(signals.VIDEO_SET_CURSOR_ATTR, fore))
         # in screen 0, 1, set colorburst (not in SCREEN 2!)
         if self.mode.is_text_mode:
             self.set_colorburst(new_colorswitch)
@@ -716,6 +935,12 @@ class Screen(object):
         elif self.mode.name == '640x200x2':
             self.set_colorburst(False)
 
+    def share_pixel_pages(self):
+        """Let the video plugin draw graphics directly from the pixel pages."""
+        if numpy and not self.mode.is_text_mode:
+            self.batch.put(signals.Event(signals.VIDEO_SET_PIXEL_PAGES,
+                    [page.buffer for page in self.pixels.pages]))
+
     def set_width(self, to_width):
         """Set the character width of the screen, reset pages and change modes."""
         # raise an error if the width value doesn't make sense
@@ -794,7 +1019,7 @@ class Screen(object):
             self.colours16[:] = self.colours16_mono
         # reset the palette to reflect the new mono or mode-5 situation
         self.palette = Palette(self.mode, self.capabilities)
-        self.session.video_queue.put(signals.Event(signals.VIDEO_SET_COLORBURST, (on and colorburst_capable,
+        self.batch.put(signals.Event(signals.VIDEO_SET_COLORBURST, (on and colorburst_capable,
                             self.palette.rgb_palette, self.palette.rgb_palette1)))
 
     def set_cga4_palette(self, num):
@@ -835,25 +1060,29 @@ class Screen(object):
         self.apagenum = new_apagenum
         self.vpage = self.text.pages[new_vpagenum]
         self.apage = self.text.pages[new_apagenum]
-        self.session.video_queue.put(signals.Event(signals.VIDEO_SET_PAGE, (new_vpagenum, new_apagenum)))
+        self.batch.put(signals.Event(signals.VIDEO_SET_PAGE, (new_vpagenum, new_apagenum)))
 
     def set_attr(self, attr):
         """Set the default attribute."""
         self.attr = attr
         if not self.mode.is_text_mode and self.mode.cursor_index is None:
             fore, _, _, _ = self.split_attr(attr)
-            self.session.video_queue.put(signals.Event(signals.VIDEO_SET_CURSOR_ATTR, fore))
+            self.batch.put(signals.Event(signals.VIDEO_SET_CURSOR_ATTR, fore))
 
     def set_border(self, attr):
         """Set the border attribute."""
         self.border_attr = attr
         fore, _, _, _ = self.split_attr(attr)
-        self.session.video_queue.put(signals.Event(signals.VIDEO_SET_BORDER_ATTR, fore))
+        self.batch.put(signals.Event(signals.VIDEO_SET_BORDER_ATTR, fore))
 
     def copy_page(self, src, dst):
         """Copy source to destination page."""
         self.text.copy_page(src, dst)
-        self.session.video_queue.put(signals.Event(signals.VIDEO_COPY_PAGE, (src, dst)))
+        if not self.mode.is_text_mode:
+            self.pixels.copy_page(src, dst)
+            self.batch.mark(dst, 0, 0,
+                            self.mode.pixel_width-1, self.mode.pixel_height-1)
+        self.batch.put(signals.Event(signals.VIDEO_COPY_PAGE, (src, dst)))
 
     #####################
     # screen read/write
@@ -866,13 +1095,15 @@ class Screen(object):
         last = ''
         # if our line wrapped at the end before, it doesn't anymore
         self.apage.row[self.current_row-1].wrap = False
-        for c in s:
+        for c in write_split_re.findall(s):
             row, col = self.current_row, self.current_col
-            if c == '\t':
+            if len(c) > 1:
+                # run of ordinary characters
+                self._write_span(c)
+            elif c == '\t':
                 # TAB
                 num = (8 - (col - 1 - 8 * int((col-1) / 8)))
-                for _ in range(num):
-                    self.write_char(' ')
+                self._write_span(' ' * num)
             elif c == '\n':
                 # LF
                 # exclude CR/LF
@@ -908,7 +1139,18 @@ class Screen(object):
             else:
                 # includes \b, \0, and non-control chars
                 self.write_char(c)
-            last = c
+            last = c[-1]
+
+    def write_chars(self, s, do_echo=True):
+        """Write a string to the screen with the effect of writing each character separately."""
+        for run in write_split_re.findall(s):
+            # a run that stays on one row is equivalent to its characters
+            while len(run) > 1:
+                length = 1 if self.overflow else self.mode.width - self.current_col + 1
+                self.write(run[:length], do_echo=do_echo)
+                run = run[length:]
+            if run:
+                self.write(run, do_echo=do_echo)
 
     def write_line(self, s='', scroll_ok=True, do_echo=True):
         """Write a string to the screen and end with a newline."""
@@ -937,6 +1179,29 @@ class Screen(object):
         if len(line) == self.mode.width and self.current_row > 2:
             self.apage.row[self.current_row-3].wrap = False
 
+    def _write_span(self, s):
+        """Put a run of ordinary characters, a row at a time."""
+        dbcs = self.codepage.dbcs and self.apage.do_dbcs
+        while s:
+            # first character handles overflow, wrapping and scrolling
+            self.write_char(s[0])
+            s = s[1:]
+            if dbcs or self.overflow or not s:
+                continue
+            # the rest of the row needs no position checks
+            row, col = self.current_row, self.current_col
+            run, s = s[:self.mode.width-col+1], s[self.mode.width-col+1:]
+            self.put_chars_attr(self.apagenum, row, col, run, self.attr)
+            last_col = col + len(run) - 1
+            therow = self.apage.row[row-1]
+            therow.end = max(therow.end, last_col)
+            if last_col < self.mode.width:
+                self.current_col = last_col + 1
+            else:
+                self.current_col = self.mode.width
+                self.overflow = True
+            self.move_cursor(self.current_row, self.current_col)
+
     def write_char(self, c, do_scroll_down=False):
         """Put one character at the current position."""
         # check if scroll& repositioning needed
@@ -1056,40 +1321,50 @@ class Screen(object):
         # update the screen
         self.refresh_range(pagenum, crow, start, stop-1, for_keys)
 
+    def put_chars_attr(self, pagenum, crow, ccol, s, cattr):
+        """Put a run of single-byte characters on one row, redrawing it as a strip."""
+        if not self.mode.is_text_mode:
+            cattr = cattr & 0xf
+        start, stop = self.text.pages[pagenum].put_chars_attr(crow, ccol, s, cattr)
+        self.refresh_range(pagenum, crow, start, stop-1)
+
     def refresh_range(self, pagenum, crow, start, stop, for_keys=False, text_only=False):
         """Redraw a section of a screen row, assuming DBCS buffer has been set."""
-        therow = self.text.pages[pagenum].row[crow-1]
+        thepage = self.text.pages[pagenum]
+        chars, attrs, doubles = thepage.chars, thepage.attrs, thepage.double
+        # offset of column zero, so that offset+ccol indexes the row
+        offset = thepage.row[crow-1].offset - 1
+        draw_pixels = not self.mode.is_text_mode and not text_only
+        strip = []
         ccol = start
         while ccol <= stop:
-            double = therow.double[ccol-1]
+            double = doubles[offset+ccol]
             if double == 1:
-                ca = therow.buf[ccol-1]
-                da = therow.buf[ccol]
-                r, c, char, attr = crow, ccol, ca[0]+da[0], da[1]
-                therow.double[ccol-1] = 1
-                therow.double[ccol] = 2
+                r, c = crow, ccol
+                char = str(chars[offset+ccol:offset+ccol+2])
+                attr = attrs[offset+ccol+1]
+                doubles[offset+ccol+1] = 2
                 ccol += 2
             else:
                 if double != 0:
                     logging.debug('DBCS buffer corrupted at %d, %d (%d)',
                                   crow, ccol, double)
-                ca = therow.buf[ccol-1]
-                r, c, char, attr = crow, ccol, ca[0], ca[1]
+                r, c = crow, ccol
+                char, attr = chr(chars[offset+ccol]), attrs[offset+ccol]
                 ccol += 1
             fore, back, blink, underline = self.split_attr(attr)
             # ensure glyph is stored
             mask = self.get_glyph(char)
-            self.session.video_queue.put(signals.Event(signals.VIDEO_PUT_GLYPH,
-                    (pagenum, r, c, char, len(char) > 1,
-                                 fore, back, blink, underline, for_keys)))
-            if not self.mode.is_text_mode and not text_only:
-                # update pixel buffer
-                x0, y0, x1, y1, sprite = self.glyph_to_rect(
-                                                r, c, mask, fore, back)
-                self.pixels.pages[self.apagenum].put_rect(
-                                                x0, y0, x1, y1, sprite, tk.PSET)
-                self.session.video_queue.put(signals.Event(signals.VIDEO_PUT_RECT,
-                                        (self.apagenum, x0, y0, x1, y1, sprite)))
+            self.batch.put_glyph((pagenum, r, c, char, len(char) > 1,
+                                 fore, back, blink, underline, for_keys))
+            if draw_pixels:
+                strip.append((mask, fore, back))
+        if strip:
+            # update pixel buffer
+            x0, y0, x1, y1, sprite = self.glyphs_to_rect(crow, start, strip)
+            self.pixels.pages[self.apagenum].put_rect(
+                                            x0, y0, x1, y1, sprite, tk.PSET)
+            self.batch.mark(self.apagenum, x0, y0, x1, y1)
 
     def redraw_row(self, start, crow, wrap=True):
         """Draw the screen row, wrapping around and reconstructing DBCS buffer."""
@@ -1099,7 +1374,7 @@ class Screen(object):
                 # redrawing changes colour attributes to current foreground (cf. GW)
                 # don't update all dbcs chars behind at each put
                 self.put_char_attr(self.apagenum, crow, i+1,
-                        therow.buf[i][0], self.attr, one_only=True, force=True)
+                        self.apage.get_char(crow, i+1), self.attr, one_only=True, force=True)
             if (wrap and therow.wrap and
                     crow >= 0 and crow < self.text.height-1):
                 crow += 1
@@ -1111,14 +1386,12 @@ class Screen(object):
         """Clear from given position to end of logical line (CTRL+END)."""
         mode = self.mode
         therow = self.apage.row[srow-1]
-        therow.buf = (therow.buf[:scol-1] +
-            [(' ', self.attr)] * (mode.width-scol+1))
-        therow.double = (therow.double[:scol-1] + [0] * (mode.width-scol+1))
+        self.apage.clear_chars(srow, scol, mode.width, self.attr)
         therow.end = min(therow.end, scol-1)
         crow = srow
         while self.apage.row[crow-1].wrap:
             crow += 1
-            self.apage.row[crow-1].clear(self.attr)
+            self.apage.clear_rows(crow, crow, self.attr)
         for r in range(crow, srow, -1):
             self.apage.row[r-1].wrap = False
             self.scroll(r)
@@ -1134,20 +1407,18 @@ class Screen(object):
             self.clear_rows(srow, srow)
         therow.end = save_end
 
-    def set_print_screen_target(self, lpt1_file):
-        """Set stream for print_screen() """
-        self.lpt1_file = lpt1_file
+    def set_print_screen_target(self, devices):
+        """Set devices for print_screen(); LPT1: is initialised on first use."""
+        self.devices = devices
 
     def print_screen(self):
         """Output the visible page to LPT1."""
-        if not self.lpt1_file:
+        if not self.devices:
             logging.debug('Print screen target not set.')
             return
+        lpt1_file = self.devices.lpt1_file
         for crow in range(1, self.mode.height+1):
-            line = ''
-            for c, _ in self.vpage.row[crow-1].buf:
-                line += c
-            self.lpt1_file.write_line(line)
+            lpt1_file.write_line(self.vpage.get_chars(crow))
 
     def clear_text_at(self, x, y):
         """Remove the character covering a single pixel."""
@@ -1155,11 +1426,21 @@ class Screen(object):
         cymax, cxmax = self.mode.height-1, self.mode.width-1
         cx, cy = x // fx, y // fy
         if cx >= 0 and cy >= 0 and cx <= cxmax and cy <= cymax:
-            self.apage.row[cy].buf[cx] = (' ', self.attr)
+            self.apage.clear_chars(cy+1, cx+1, cx+1, self.attr)
         fore, back, blink, underline = self.split_attr(self.attr)
-        self.session.video_queue.put(signals.Event(signals.VIDEO_PUT_GLYPH,
-                (self.apagenum, cy+1, cx+1, ' ', False,
-                             fore, back, blink, underline, True)))
+        self.batch.put_glyph((self.apagenum, cy+1, cx+1, ' ', False,
+                             fore, back, blink, underline, True))
+
+    def clear_text_points(self, xs, ys):
+        """Remove the characters covering a set of pixels."""
+        fx, fy = self.mode.font_width, self.mode.font_height
+        cymax, cxmax = self.mode.height-1, self.mode.width-1
+        fore, back, blink, underline = self.split_attr(self.attr)
+        for cx, cy in set(zip([int(x) // fx for x in xs], [int(y) // fy for y in ys])):
+            if cx >= 0 and cy >= 0 and cx <= cxmax and cy <= cymax:
+                self.apage.clear_chars(cy+1, cx+1, cx+1, self.attr)
+                self.batch.put_glyph((self.apagenum, cy+1, cx+1, ' ', False,
+                                     fore, back, blink, underline, True))
 
     #MOVE to TextBuffer? replace with graphics_to_text_loc v.v.?
     def clear_text_area(self, x0, y0, x1, y1):
@@ -1171,32 +1452,31 @@ class Screen(object):
         cx1 = min(cxmax, max(0, x1 // fx))
         cy1 = min(cymax, max(0, y1 // fy))
         for r in range(cy0, cy1+1):
-            self.apage.row[r].buf[cx0:cx1+1] = [
-                (' ', self.attr)] * (cx1 - cx0 + 1)
+            self.apage.clear_chars(r+1, cx0+1, cx1+1, self.attr)
 
     def text_to_pixel_area(self, row0, col0, row1, col1):
         """Convert area from text buffer to area for pixel buffer."""
         # area bounds are all inclusive
         return ((col0-1)*self.mode.font_width, (row0-1)*self.mode.font_height,
-                (col1-col0+1)*self.mode.font_width-1, (row1-row0+1)*self.mode.font_height-1)
+                col1*self.mode.font_width-1, row1*self.mode.font_height-1)
 
     def clear_rows(self, start, stop):
         """Clear text and graphics on given (inclusive) text row range."""
-        for r in self.apage.row[start-1:stop]:
-            r.clear(self.attr)
+        self.apage.clear_rows(start, stop, self.attr)
         if not self.mode.is_text_mode:
             x0, y0, x1, y1 = self.text_to_pixel_area(
                             start, 1, stop, self.mode.width)
             # background attribute must be 0 in graphics mode
             self.pixels.pages[self.apagenum].fill_rect(x0, y0, x1, y1, 0)
+            self.batch.mark(self.apagenum, x0, y0, x1, y1)
         _, back, _, _ = self.split_attr(self.attr)
-        self.session.video_queue.put(signals.Event(signals.VIDEO_CLEAR_ROWS, (back, start, stop)))
+        self.batch.put(signals.Event(signals.VIDEO_CLEAR_ROWS, (back, start, stop)))
 
     #MOVE to Cursor.move ?
     def move_cursor(self, row, col):
         """Move the cursor to a new position."""
         self.current_row, self.current_col = row, col
-        self.session.video_queue.put(signals.Event(signals.VIDEO_MOVE_CURSOR, (row, col)))
+        self.batch.put(signals.Event(signals.VIDEO_MOVE_CURSOR, (row, col)))
         self.cursor.reset_attr()
 
     def rebuild_glyph(self, ordval):
@@ -1262,51 +1542,46 @@ class Screen(object):
         if from_line is None:
             from_line = self.view_start
         _, back, _, _ = self.split_attr(self.attr)
-        self.session.video_queue.put(signals.Event(signals.VIDEO_SCROLL_UP,
+        self.batch.put(signals.Event(signals.VIDEO_SCROLL_UP,
                     (from_line, self.scroll_height, back)))
         # sync buffers with the new screen reality:
         if self.current_row > from_line:
             self.current_row -= 1
-        self.apage.row.insert(self.scroll_height,
-                              TextRow(self.attr, self.mode.width))
-        if not self.mode.is_text_mode:
-            sx0, sy0, sx1, sy1 = self.text_to_pixel_area(from_line+1, 1,
+        self.apage.scroll_up(from_line, self.scroll_height, self.attr)
+        if not self.mode.is_text_mode and from_line <= self.scroll_height:
+            x0, y0, x1, y1 = self.text_to_pixel_area(from_line, 1,
                 self.scroll_height, self.mode.width)
-            tx0, ty0, _, _ = self.text_to_pixel_area(from_line, 1,
-                self.scroll_height-1, self.mode.width)
-            self.pixels.pages[self.apagenum].move_rect(sx0, sy0, sx1, sy1, tx0, ty0)
-        del self.apage.row[from_line-1]
+            self.pixels.pages[self.apagenum].scroll_up(y0, y1, self.mode.font_height)
+            self.batch.mark(self.apagenum, x0, y0, x1, y1)
 
     def scroll_down(self,from_line):
         """Scroll the scroll region down by one line, starting at from_line."""
         _, back, _, _ = self.split_attr(self.attr)
-        self.session.video_queue.put(signals.Event(signals.VIDEO_SCROLL_DOWN,
+        self.batch.put(signals.Event(signals.VIDEO_SCROLL_DOWN,
                     (from_line, self.scroll_height, back)))
         if self.current_row >= from_line:
             self.current_row += 1
         # sync buffers with the new screen reality:
-        self.apage.row.insert(from_line - 1, TextRow(self.attr, self.mode.width))
-        if not self.mode.is_text_mode:
-            sx0, sy0, sx1, sy1 = self.text_to_pixel_area(from_line, 1,
-                self.scroll_height-1, self.mode.width)
-            tx0, ty0, _, _ = self.text_to_pixel_area(from_line+1, 1,
+        self.apage.scroll_down(from_line, self.scroll_height, self.attr)
+        if not self.mode.is_text_mode and from_line <= self.scroll_height:
+            x0, y0, x1, y1 = self.text_to_pixel_area(from_line, 1,
                 self.scroll_height, self.mode.width)
-            self.pixels.pages[self.apagenum].move_rect(sx0, sy0, sx1, sy1, tx0, ty0)
-        del self.apage.row[self.scroll_height-1]
+            self.pixels.pages[self.apagenum].scroll_down(y0, y1, self.mode.font_height)
+            self.batch.mark(self.apagenum, x0, y0, x1, y1)
 
     def get_text(self, start_row, start_col, stop_row, stop_col):
         """Retrieve unicode text for copying."""
         r, c = start_row, start_col
         full = []
         clip = []
-        if self.vpage.row[r-1].double[c-1] == 2:
+        if self.vpage.get_double(r, c) == 2:
             # include lead byte
             c -= 1
-        if self.vpage.row[stop_row-1].double[stop_col-2] == 1:
+        if self.vpage.get_double(stop_row, stop_col-1) == 1:
             # include trail byte
             stop_col += 1
         while r < stop_row or (r == stop_row and c < stop_col):
-            clip.append(self.vpage.row[r-1].buf[c-1][0])
+            clip.append(self.vpage.get_char(r, c))
             c += 1
             if c > self.vpage.row[r-1].end:
                 if not self.vpage.row[r-1].wrap:
@@ -1327,9 +1602,20 @@ class Screen(object):
             pagenum = self.apagenum
         if self.drawing.view_contains(x, y):
             self.pixels.pages[pagenum].put_pixel(x, y, index)
-            self.session.video_queue.put(signals.Event(signals.VIDEO_PUT_PIXEL, (pagenum, x, y, index)))
+            self.batch.mark(pagenum, x, y, x, y)
             self.clear_text_at(x, y)
 
+    def put_pixels(self, xs, ys, index, pagenum=None):
+        """Put a set of pixels, given as lists of coordinates, on the screen; empty character buffer."""
+        if pagenum is None:
+            pagenum = self.apagenum
+        xs, ys = self.drawing.view_clip_points(xs, ys)
+        if not len(xs):
+            return
+        self.pixels.pages[pagenum].put_pixels(xs, ys, index)
+        self.batch.mark(pagenum, int(min(xs)), int(min(ys)), int(max(xs)), int(max(ys)))
+        self.clear_text_points(xs, ys)
+
     def get_pixel(self, x, y, pagenum=None):
         """Return the attribute a pixel on the screen."""
         if pagenum is None:
@@ -1343,21 +1629,36 @@ class Screen(object):
     def put_interval(self, pagenum, x, y, colours, mask=0xff):
         """Write a list of attributes to a scanline interval."""
         x, y, colours = self.drawing.view_clip_list(x, y, colours)
-        newcolours = self.pixels.pages[pagenum].put_interval(x, y, colours, mask)
-        self.session.video_queue.put(signals.Event(signals.VIDEO_PUT_INTERVAL, (pagenum, x, y, newcolours)))
+        self.pixels.pages[pagenum].put_interval(x, y, colours, mask)
+        self.batch.mark(pagenum, x, y, x+len(colours)-1, y)
         self.clear_text_area(x, y, x+len(colours), y)
 
     def fill_interval(self, x0, x1, y, index):
         """Fill a scanline interval in a solid attribute."""
         x0, x1, y = self.drawing.view_clip_interval(x0, x1, y)
         self.pixels.pages[self.apagenum].fill_interval(x0, x1, y, index)
-        self.session.video_queue.put(signals.Event(signals.VIDEO_FILL_INTERVAL,
-                        (self.apagenum, x0, x1, y, index)))
+        self.batch.mark(self.apagenum, x0, y, x1, y)
         self.clear_text_area(x0, y, x1, y)
 
-    def get_until(self, x0, x1, y, c):
-        """Get the attribute values of a scanline interval."""
-        return self.pixels.pages[self.apagenum].get_until(x0, x1, y, c)
+    def get_scanline(self, y):
+        """Read a full scanline of the active page (a *view* with numpy)."""
+        return self.pixels.pages[self.apagenum].get_interval(0, y, self.mode.pixel_width)
+
+    def write_interval(self, x, y, colours):
+        """Write attributes to a scanline interval without refreshing; see refresh_intervals."""
+        self.pixels.pages[self.apagenum].put_interval(x, y, colours)
+
+    def refresh_intervals(self, intervals):
+        """Refresh a list of (x0, x1, y) scanline intervals on the active page in one update."""
+        if not intervals:
+            return
+        self.batch.mark(self.apagenum,
+                min(x0 for x0, _, _ in intervals), min(y for _, _, y in intervals),
+                max(x1 for _, x1, _ in intervals), max(y for _, _, y in intervals))
+        # remove the characters covered, once for each text row and column range
+        fx, fy = self.mode.font_width, self.mode.font_height
+        for cy, cx0, cx1 in set((y//fy, x0//fx, x1//fx) for x0, x1, y in intervals):
+            self.clear_text_area(cx0*fx, cy*fy, cx1*fx, cy*fy)
 
     def get_rect(self, x0, y0, x1, y1):
         """Read a screen rect into an [y][x] array of attributes."""
@@ -1366,18 +1667,16 @@ class Screen(object):
     def put_rect(self, x0, y0, x1, y1, sprite, operation_token):
         """Apply an [y][x] array of attributes onto a screen rect."""
         x0, y0, x1, y1, sprite = self.drawing.view_clip_area(x0, y0, x1, y1, sprite)
-        rect = self.pixels.pages[self.apagenum].put_rect(x0, y0, x1, y1,
+        self.pixels.pages[self.apagenum].put_rect(x0, y0, x1, y1,
                                                         sprite, operation_token)
-        self.session.video_queue.put(signals.Event(signals.VIDEO_PUT_RECT,
-                              (self.apagenum, x0, y0, x1, y1, rect)))
+        self.batch.mark(self.apagenum, x0, y0, x1, y1)
         self.clear_text_area(x0, y0, x1, y1)
 
     def fill_rect(self, x0, y0, x1, y1, index):
         """Fill a rectangle in a solid attribute."""
         x0, y0, x1, y1 = self.drawing.view_clip_rect(x0, y0, x1, y1)
         self.pixels.pages[self.apagenum].fill_rect(x0, y0, x1, y1, index)
-        self.session.video_queue.put(signals.Event(signals.VIDEO_FILL_RECT,
-                                (self.apagenum, x0, y0, x1, y1, index)))
+        self.batch.mark(self.apagenum, x0, y0, x1, y1)
         self.clear_text_area(x0, y0, x1, y1)
 
     # text
@@ -1386,7 +1685,11 @@ class Screen(object):
         """Return a glyph mask for a given character """
         try:
             mask = self.glyphs[c]
+            if self.session.counters.enabled:
+                self.session.counters.count('glyphs.hit')
         except KeyError:
+            if self.session.counters.enabled:
+                self.session.counters.count('glyphs.miss')
             uc = self.codepage.to_unicode(c, u'\0')
             carry_col_9 = c in carry_col_9_chars
             carry_row_9 = c in carry_row_9_chars
@@ -1395,27 +1698,31 @@ class Screen(object):
                                 carry_col_9, carry_row_9)
             self.glyphs[c] = mask
             if self.mode.is_text_mode:
-                self.session.video_queue.put(signals.Event(signals.VIDEO_BUILD_GLYPHS,
+                self.batch.put(signals.Event(signals.VIDEO_BUILD_GLYPHS,
                     {c: mask}))
         return mask
 
     if numpy:
-        def glyph_to_rect(self, row, col, mask, fore, back):
-            """Return a sprite for a given character """
-            # set background
-            glyph = numpy.full(mask.shape, back)
-            # stamp foreground mask
-            glyph[mask] = fore
+        def glyphs_to_rect(self, row, col, strip):
+            """Return a sprite for a run of characters given as (mask, fore, back)."""
+            widths = [mask.shape[1] for mask, _, _ in strip]
+            fore = numpy.repeat([fore for _, fore, _ in strip], widths)
+            back = numpy.repeat([back for _, _, back in strip], widths)
+            # stamp foreground mask on background
+            glyphs = numpy.where(numpy.hstack([mask for mask, _, _ in strip]), fore, back)
             x0, y0 = (col-1) * self.mode.font_width, (row-1) * self.mode.font_height
-            x1, y1 = x0 + mask.shape[1] - 1, y0 + mask.shape[0] - 1
-            return x0, y0, x1, y1, glyph
+            x1, y1 = x0 + glyphs.shape[1] - 1, y0 + glyphs.shape[0] - 1
+            return x0, y0, x1, y1, glyphs
     else:
-        def glyph_to_rect(self, row, col, mask, fore, back):
-            """Return a sprite for a given character """
-            glyph = [[(fore if bit else back) for bit in row] for row in mask]
+        def glyphs_to_rect(self, row, col, strip):
+            """Return a sprite for a run of characters given as (mask, fore, back)."""
+            glyphs = [[] for _ in strip[0][0]]
+            for mask, fore, back in strip:
+                for line, mask_row in zip(glyphs, mask):
+                    line += [(fore if bit else back) for bit in mask_row]
             x0, y0 = (col-1) * self.mode.font_width, (row-1) * self.mode.font_height
-            x1, y1 = x0 + len(mask[0]) - 1, y0 + len(mask) - 1
-            return x0, y0, x1, y1, glyph
+            x1, y1 = x0 + len(glyphs[0]) - 1, y0 + len(glyphs) - 1
+            return x0, y0, x1, y1, glyphs
 
 
     #MOVE to modes classes in modes.py
@@ -1469,8 +1776,7 @@ class Palette(object):
         self.rgb_palette[index] = mode.colours[colour]
         if mode.colours1:
             self.rgb_palette1[index] = mode.colours1[colour]
-        self.mode.screen.session.video_queue.put(
-            signals.Event(signals.VIDEO_SET_PALETTE, (self.rgb_palette, self.rgb_palette1)))
+        self.mode.screen.batch.set_palette(self.rgb_palette, self.rgb_palette1)
 
     def get_entry(self, index):
         """Retrieve the colour for a given attribute."""
@@ -1487,8 +1793,7 @@ class Palette(object):
             self.rgb_palette1 = [mode.colours1[i] for i in self.palette]
         else:
             self.rgb_palette1 = None
-        self.mode.screen.session.video_queue.put(
-            signals.Event(signals.VIDEO_SET_PALETTE, (self.rgb_palette, self.rgb_palette1)))
+        self.mode.screen.batch.set_palette(self.rgb_palette, self.rgb_palette1)
 
     def mode_allows_palette(self, mode):
         """Check if the video mode allows palette change."""
@@ -1531,14 +1836,13 @@ class Cursor(object):
     def reset_attr(self):
         """Set the text cursor attribute to that of the current location."""
         if self.screen.mode.is_text_mode:
-            fore, _, _, _ = self.screen.split_attr(self.screen.apage.row[
-                    self.screen.current_row-1].buf[
-                    self.screen.current_col-1][1] & 0xf)
-            self.screen.session.video_queue.put(signals.Event(signals.VIDEO_SET_CURSOR_ATTR, fore))
+            fore, _, _, _ = self.screen.split_attr(self.screen.apage.get_attr(
+                    self.screen.current_row, self.screen.current_col) & 0xf)
+            self.screen.batch.put(signals.Event(signals.VIDEO_SET_CURSOR_ATTR, fore))
 
     def show(self, do_show):
         """Force cursor to be visible/invisible."""
-        self.screen.session.video_queue.put(signals.Event(signals.VIDEO_SHOW_CURSOR, do_show))
+        self.screen.batch.put(signals.Event(signals.VIDEO_SHOW_CURSOR, do_show))
 
     def set_visibility(self, visible_run):
         """Set default cursor visibility."""
@@ -1552,7 +1856,7 @@ class Cursor(object):
         # in graphics mode, we can't force the cursor to be visible on execute.
         if self.screen.mode.is_text_mode:
             visible = visible or self.visible_run
-        self.screen.session.video_queue.put(signals.Event(signals.VIDEO_SHOW_CURSOR, visible))
+        self.screen.batch.put(signals.Event(signals.VIDEO_SHOW_CURSOR, visible))
 
     def set_shape(self, from_line, to_line):
         """Set the cursor shape."""
@@ -1590,7 +1894,7 @@ class Cursor(object):
                                 to_line -= 1
         self.from_line = max(0, min(from_line, fy-1))
         self.to_line = max(0, min(to_line, fy-1))
-        self.screen.session.video_queue.put(signals.Event(signals.VIDEO_SET_CURSOR_SHAPE,
+        self.screen.batch.put(signals.Event(signals.VIDEO_SET_CURSOR_SHAPE,
                             (self.width, fy, self.from_line, self.to_line)))
         self.reset_attr()
 
@@ -1619,6 +1923,6 @@ class Cursor(object):
         # update cursor shape to new width if necessary
         if new_width != self.width:
             self.width = new_width
-            self.screen.session.video_queue.put(signals.Event(signals.VIDEO_SET_CURSOR_SHAPE,
+            self.screen.batch.put(signals.Event(signals.VIDEO_SET_CURSOR_SHAPE,
                     (self.width, self.height, self.from_line, self.to_line)))
             self.reset_attr()
@@ -118,7 +118,7 @@ class FunctionKeyMacros(object):
 class Editor(object):
     """Interactive environment."""
 
-    def __init__(self, screen, keyboard, sound, output_redirection, lpt1_file):
+    def __init__(self, screen, keyboard, sound, output_redirection, devices):
         """Initialise environment."""
         # overwrite mode (instead of insert)
         self._overwrite_mode = True
@@ -126,7 +126,8 @@ class Editor(object):
         self.sound = sound
         self.keyboard = keyboard
         self.redirect = output_redirection
-        self.lpt1_file = lpt1_file
+        # for LPT1:, initialised on first use
+        self.devices = devices
         self.screen.init_mode()
 
     def wait_screenline(self, write_endl=True, from_start=False):
@@ -180,9 +181,9 @@ class Editor(object):
         srow = self.find_start_of_line(srow)
         line = bytearray()
         # add all rows of the logical line
-        for therow in self.screen.apage.row[
-                                    srow-1:self.screen.mode.height]:
-            line += bytearray(pair[0] for pair in therow.buf[:therow.end])
+        for crow in range(srow, self.screen.mode.height+1):
+            therow = self.screen.apage.row[crow-1]
+            line += self.screen.apage.get_chars(crow, 1, therow.end+1)
             # continue so long as the line wraps
             if not therow.wrap:
                 break
@@ -205,13 +206,11 @@ class Editor(object):
             # add all rows of the logical line
             for crow in range(srow, self.screen.mode.height+1):
                 therow = self.screen.apage.row[crow-1]
+                rowchars = self.screen.apage.get_chars(crow, 1, therow.end+1)
                 # exclude prompt, if any; only go from furthest_left to furthest_right
                 if crow == prompt_row:
-                    rowpairs = therow.buf[:therow.end][left-1:right-1]
-                else:
-                    rowpairs = therow.buf[:therow.end]
-                # get characters from char/attr pairs and convert to bytearray
-                line += bytearray(pair[0] for pair in rowpairs)
+                    rowchars = rowchars[left-1:right-1]
+                line += rowchars
                 if not therow.wrap:
                     break
                 # wrap before end of line means LF
@@ -279,7 +278,7 @@ class Editor(object):
                 elif d in (ea.RIGHT, ea.CTRL_BACKSLASH):
                     # RIGHT, CTRL+\
                     # skip dbcs trail byte
-                    if self.screen.apage.row[row-1].double[col-1] == 1:
+                    if self.screen.apage.get_double(row, col) == 1:
                         self.screen.set_pos(row, col + 2, scroll_ok=False)
                     else:
                         self.screen.set_pos(row, col + 1, scroll_ok=False)
@@ -304,7 +303,7 @@ class Editor(object):
                     # ctrl+printscreen toggles printer copy
                     # note that shift+print is a BIOS trigger
                     # and is emulated at a deeper level
-                    self.redirect.toggle_echo(self.lpt1_file)
+                    self.redirect.toggle_echo(self.devices.lpt1_file)
                 else:
                     try:
                         # these are done on a less deep level than the fn key macros
@@ -328,11 +327,11 @@ class Editor(object):
                                     self.screen.write_char(c, do_scroll_down=True)
                 # move left if we end up on dbcs trail byte
                 row, col = self.screen.current_row, self.screen.current_col
-                if self.screen.apage.row[row-1].double[col-1] == 2:
+                if self.screen.apage.get_double(row, col) == 2:
                     self.screen.set_pos(row, col-1, scroll_ok=False)
                 # adjust cursor width
                 row, col = self.screen.current_row, self.screen.current_col
-                if self.screen.apage.row[row-1].double[col-1] == 1:
+                if self.screen.apage.get_double(row, col) == 1:
                     self.screen.cursor.set_width(2)
                 else:
                     self.screen.cursor.set_width(1)
@@ -352,9 +351,8 @@ class Editor(object):
         """Insert a single byte at the current position."""
         while True:
             therow = self.screen.apage.row[crow-1]
-            therow.buf.insert(ccol-1, (c, cattr))
+            c, cattr = self.screen.apage.insert_char_attr(crow, ccol, c, cattr)
             if therow.end < self.screen.mode.width:
-                therow.buf.pop()
                 if therow.end > ccol-1:
                     therow.end += 1
                 else:
@@ -368,13 +366,12 @@ class Editor(object):
                 if not therow.wrap and crow < self.screen.mode.height:
                     self.screen.scroll_down(crow+1)
                     therow.wrap = True
-                c, cattr = therow.buf.pop()
                 crow += 1
                 ccol = 1
 
     def delete_char(self, crow, ccol):
         """Delete the character (single/double width) at the current position."""
-        double = self.screen.apage.row[crow-1].double[ccol-1]
+        double = self.screen.apage.get_double(crow, ccol)
         if double == 0:
             # we're on an sbcs byte.
             self.delete_sbcs_char(crow, ccol)
@@ -398,19 +395,19 @@ class Editor(object):
             nextrow = thepage.row[crow]
             # replace everything after the delete location with
             # stuff from the next row
-            therow.buf[ccol-1:] = nextrow.buf[:width-ccol+1]
+            thepage.copy_chars(crow+1, 1, crow, ccol, width-ccol+1)
             therow.end = min(max(therow.end, ccol) + nextrow.end, width)
             # and continue on the following rows as long as we wrap.
             while crow < self.screen.scroll_height and nextrow.wrap:
                 nextrow2 = thepage.row[crow+1]
-                nextrow.buf = (nextrow.buf[width-ccol+1:] +
-                               nextrow2.buf[:width-ccol+1])
+                thepage.copy_chars(crow+1, width-ccol+2, crow+1, 1, ccol-1)
+                thepage.copy_chars(crow+2, 1, crow+1, ccol, width-ccol+1)
                 nextrow.end = min(nextrow.end + nextrow2.end, width)
                 crow += 1
                 therow, nextrow = thepage.row[crow-1], thepage.row[crow]
             # replenish last row with empty space
-            nextrow.buf = (nextrow.buf[width-ccol+1:] +
-                           [(' ', self.screen.attr)] * (width-ccol+1))
+            thepage.copy_chars(crow+1, width-ccol+2, crow+1, 1, ccol-1)
+            thepage.clear_chars(crow+1, ccol, width, self.screen.attr)
             # adjust the row end
             nextrow.end -= width - ccol
             # redraw the full logical line from the original position onwards
@@ -427,16 +424,15 @@ class Editor(object):
                 if (therow.end < width or crow == self.screen.scroll_height
                         or not therow.wrap):
                     # no knock on to next row, just delete the char
-                    del therow.buf[ccol-1]
                     # and replenish the buffer at the end of the line
-                    therow.buf.insert(therow.end-1, (' ', self.screen.attr))
+                    thepage.delete_char_attr(crow, ccol, therow.end, ' ', self.screen.attr)
                     break
                 else:
                     # wrap and end[row-1]==width
                     nextrow = thepage.row[crow]
                     # delete the char and replenish from next row
-                    del therow.buf[ccol-1]
-                    therow.buf.insert(therow.end-1, nextrow.buf[0])
+                    thepage.delete_char_attr(crow, ccol, therow.end,
+                            thepage.get_char(crow+1, 1), thepage.get_attr(crow+1, 1))
                     # then move on to the next row and delete the first char
                     crow += 1
                     therow, nextrow = thepage.row[crow-1], thepage.row[crow]
@@ -469,7 +465,7 @@ class Editor(object):
         elif ccol != start_col or self.screen.current_row != start_row:
             ccol -= 1
         self.screen.set_pos(crow, max(1, ccol))
-        if self.screen.apage.row[self.screen.current_row-1].double[self.screen.current_col-1] == 2:
+        if self.screen.apage.get_double(self.screen.current_row, self.screen.current_col) == 2:
             # we're on a trail byte, move to the lead
             self.screen.set_pos(self.screen.current_row, self.screen.current_col-1)
         self.delete_char(crow, ccol)
@@ -524,7 +520,7 @@ class Editor(object):
         crow, ccol = self.screen.current_row, self.screen.current_col
         # find non-alphanumeric chars
         while True:
-            c = self.screen.apage.row[crow-1].buf[ccol-1][0]
+            c = self.screen.apage.get_char(crow, ccol)
             if (c not in string.digits + string.ascii_letters):
                 break
             ccol += 1
@@ -536,7 +532,7 @@ class Editor(object):
                 ccol = 1
         # find alphanumeric chars
         while True:
-            c = self.screen.apage.row[crow-1].buf[ccol-1][0]
+            c = self.screen.apage.get_char(crow, ccol)
             if (c in string.digits + string.ascii_letters):
                 break
             ccol += 1
@@ -560,7 +556,7 @@ class Editor(object):
                     return
                 crow -= 1
                 ccol = self.screen.mode.width
-            c = self.screen.apage.row[crow-1].buf[ccol-1][0]
+            c = self.screen.apage.get_char(crow, ccol)
             if (c in string.digits + string.ascii_letters):
                 break
         # find non-alphanumeric chars
@@ -572,7 +568,7 @@ class Editor(object):
                     break
                 crow -= 1
                 ccol = self.screen.mode.width
-            c = self.screen.apage.row[crow-1].buf[ccol-1][0]
+            c = self.screen.apage.get_char(crow, ccol)
             if (c not in string.digits + string.ascii_letters):
                 break
         self.screen.set_pos(last_row, last_col)
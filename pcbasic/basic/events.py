@@ -30,6 +30,11 @@ class Events(object):
             self.num_fn_keys = 10
         # tandy and pcjr have multi-voice sound
         self.multivoice = syntax in ('pcjr', 'tandy')
+        # handlers that can jump to a subroutine
+        self.armed = []
+        # poll input at the next statement regardless of time elapsed
+        self._poll_due = True
+        self._next_poll = 0
 
     def reset(self):
         """Initialise or reset event triggers."""
@@ -47,8 +52,8 @@ class Events(object):
         self.timer = TimerHandler(self.session.clock)
         self.play = PlayHandler(self.session.sound, self.multivoice)
         self.com = [
-            ComHandler(self.session.devices.devices['COM1:']),
-            ComHandler(self.session.devices.devices['COM2:'])]
+            ComHandler(self.session.devices, 'COM1:'),
+            ComHandler(self.session.devices, 'COM2:')]
         self.pen = PenHandler(self.session.pen)
         # joy*2 + button
         self.strig = [StrigHandler(self.session.stick, joy, button)
@@ -58,12 +63,29 @@ class Events(object):
         self.all = ([self.timer]
             + [self.key[num] for num in (range(10, 20) + range(10))]
             + [self.play] + self.com + [self.pen] + self.strig)
+        for e in self.all:
+            e.listener = self
+        self.rearm()
         # set suspension off
         self.suspend_all = False
 
+    def rearm(self):
+        """Update the list of armed handlers after a handler has changed."""
+        # keep the order of handling
+        self.armed = [e for e in self.all if e.enabled and e.gosub is not None]
+        self._poll_due = True
+
+    def count_trigger(self, handler):
+        """Count an event trigger if counters are enabled."""
+        if self.session.counters.enabled:
+            self.session.counters.count('events.trigger.' + handler.name)
+
     def set_active(self, active):
         """Activate or deactisvate event checking."""
-        self.active = active
+        # poll at the next statement if this changes; jumps set this on every call
+        if active != self.active:
+            self.active = active
+            self._poll_due = True
 
     def check(self):
         """Check events."""
@@ -85,20 +107,35 @@ class Events(object):
     # main event checker
 
     tick = 0.006
+    # maximum time between polls while executing statements
+    poll_interval = 0.001
 
     def wait(self):
         """Wait and check events."""
+        # show what has been drawn before waiting
+        self.session.screen.batch.flush()
         time.sleep(self.tick)
-        self.check_events()
+        self.poll()
 
     def check_events(self):
+        """Poll for events if due, before executing a statement."""
+        if self._poll_due or time.time() >= self._next_poll:
+            self.poll()
+
+    def poll(self):
         """Main event cycle."""
+        # stay due if interrupted by Break
+        self._poll_due = True
+        self._next_poll = time.time() + self.poll_interval
         # we need this for audio thread to keep up during tight loops
         # but how much does it slow us down otherwise?
         time.sleep(0)
+        self.session.screen.batch.tick()
         self._check_input()
         self.check()
         self.session.keyboard.drain_event_buffer()
+        # keystrokes held back by pause are handled at the next statement
+        self._poll_due = bool(self.session.keyboard.prebuf)
 
     def _check_input(self):
         """Handle input events."""
@@ -155,8 +192,13 @@ class Events(object):
 class EventHandler(object):
     """Manage event triggers."""
 
+    # event name, for counters
+    name = ''
+
     def __init__(self):
         """Initialise untriggered and disabled."""
+        # Events object to notify of changes
+        self.listener = None
         self.reset()
 
     def reset(self):
@@ -169,6 +211,7 @@ class EventHandler(object):
     def set_jump(self, jump):
         """Set the jump line number."""
         self.gosub = jump
+        self._changed()
 
     def command(self, command_char):
         """Turn the event ON, OFF and STOP."""
@@ -184,11 +227,19 @@ class EventHandler(object):
             self.stopped = True
         else:
             return False
+        self._changed()
         return True
 
+    def _changed(self):
+        """Notify listener of change in ON, OFF or jump."""
+        if self.listener:
+            self.listener.rearm()
+
     def trigger(self):
         """Trigger the event."""
         self.triggered = True
+        if self.listener:
+            self.listener.count_trigger(self)
 
     def check(self):
         """Stub for event checker."""
@@ -197,6 +248,8 @@ class EventHandler(object):
 class PlayHandler(EventHandler):
     """Manage PLAY (music queue) events."""
 
+    name = 'PLAY'
+
     def __init__(self, sound, multivoice):
         """Initialise PLAY trigger."""
         EventHandler.__init__(self)
@@ -228,6 +281,8 @@ class PlayHandler(EventHandler):
 class TimerHandler(EventHandler):
     """Manage TIMER events."""
 
+    name = 'TIMER'
+
     def __init__(self, clock):
         """Initialise TIMER trigger."""
         EventHandler.__init__(self)
@@ -250,20 +305,27 @@ class TimerHandler(EventHandler):
 class ComHandler(EventHandler):
     """Manage COM-port events."""
 
-    def __init__(self, com_device):
+    name = 'COM'
+
+    def __init__(self, devices, device_name):
         """Initialise COM trigger."""
         EventHandler.__init__(self)
-        self.device = com_device
+        self.devices = devices
+        self.device_name = device_name
 
     def check(self):
         """Trigger COM-port events."""
-        if (self.device and self.device.char_waiting()):
+        # attached ports are always initialised
+        device = self.devices.loaded(self.device_name)
+        if (device and device.char_waiting()):
             self.trigger()
 
 
 class KeyHandler(EventHandler):
     """Manage KEY events."""
 
+    name = 'KEY'
+
     def __init__(self, keyboard, scancode=None):
         """Initialise KEY trigger."""
         EventHandler.__init__(self)
@@ -314,6 +376,8 @@ class KeyHandler(EventHandler):
 class PenHandler(EventHandler):
     """Manage PEN events."""
 
+    name = 'PEN'
+
     def __init__(self, pen):
         """Initialise STRIG trigger."""
         EventHandler.__init__(self)
@@ -328,6 +392,8 @@ class PenHandler(EventHandler):
 class StrigHandler(EventHandler):
     """Manage STRIG events."""
 
+    name = 'STRIG'
+
     def __init__(self, stick, joy, button):
         """Initialise STRIG trigger."""
         EventHandler.__init__(self)
@@ -11,6 +11,7 @@ import sys
 import string
 import logging
 import platform
+import functools
 try:
     from cStringIO import StringIO
 except ImportError:
@@ -18,9 +19,8 @@ except ImportError:
 
 from . import error
 from . import devices
-from . import cassette
 from . import disk
-from . import ports
+from . import debug
 
 
 # MS-DOS device files
@@ -33,11 +33,13 @@ device_files = ('AUX', 'CON', 'NUL', 'PRN')
 class Files(object):
     """File manager."""
 
-    def __init__(self, devices, max_files):
+    def __init__(self, devices, max_files, counters):
         """Initialise files."""
         self.files = {}
         self.max_files = max_files
         self.devices = devices
+        # count bytes through files opened while counters are enabled
+        self.counters = counters
 
     def close(self, num):
         """Close a numbered file."""
@@ -77,7 +79,7 @@ class Files(object):
         else:
             device = self.devices.devices[self.devices.current_device + b':']
             # MS-DOS device aliases - these can't be names of disk files
-            if device != self.devices.devices['CAS1:'] and name in device_files:
+            if self.devices.current_device != b'CAS1' and name in device_files:
                 if name == 'AUX':
                     device, dev_param = self.devices.devices['COM1:'], ''
                 elif name == 'CON' and mode == 'I':
@@ -94,10 +96,26 @@ class Files(object):
         # open the file on the device
         new_file = device.open(number, dev_param, filetype, mode, access, lock,
                                reclen, seg, offset, length)
+        if self.counters.enabled:
+            self._count_bytes(new_file, device)
         if number:
             self.files[number] = new_file
         return new_file
 
+    def _count_bytes(self, the_file, device):
+        """Count bytes through the device stream of a file."""
+        # random files read and write the FIELD buffer; the device is touched by GET and PUT
+        attr = 'output_stream' if isinstance(the_file, disk.RandomFile) else 'fhandle'
+        stream = getattr(the_file, attr, None)
+        if stream is None:
+            return
+        for name, dev in self.devices.devices.iteritems():
+            if dev is device:
+                break
+        else:
+            name = 'NUL:'
+        setattr(the_file, attr, debug.CountingStream(stream, self.counters, name[:-1]))
+
     def open_native_or_basic(self, filespec, filetype, mode):
         """If the specified file exists, open it; if not, try as BASIC file spec. Do not register in files dict."""
         if not filespec:
@@ -155,9 +173,9 @@ class Devices(object):
 
     def __init__(self, events, fields, screen, keyboard,
                 device_params, current_device, mount_dict,
-                print_trigger, temp_dir, serial_in_size, utf8, universal):
+                print_trigger, temp_dir, serial_in_size, utf8, universal, startup):
         """Initialise devices."""
-        self.devices = {}
+        self.devices = DeviceDict(startup)
         # screen device
         self.devices['SCRN:'] = devices.SCRNDevice(screen)
         # KYBD: device needs screen as it can set the screen width
@@ -165,21 +183,25 @@ class Devices(object):
         self.scrn_file = self.devices['SCRN:'].device_file
         self.kybd_file = self.devices['KYBD:'].device_file
         self.codepage = screen.codepage
-        # ports
-        # parallel devices - LPT1: must always be defined
+        # ports and cassette are only initialised when first used
         if not device_params:
             device_params = {'LPT1:': '', 'LPT2:': '', 'LPT3:': '', 'COM1:': '', 'COM2:': '', 'CAS1:': ''}
-        self.devices['LPT1:'] = ports.LPTDevice(device_params['LPT1:'], devices.nullstream(), print_trigger, self.codepage, temp_dir)
-        self.devices['LPT2:'] = ports.LPTDevice(device_params['LPT2:'], None, print_trigger, self.codepage, temp_dir)
-        self.devices['LPT3:'] = ports.LPTDevice(device_params['LPT3:'], None, print_trigger, self.codepage, temp_dir)
-        self.lpt1_file = self.devices['LPT1:'].device_file
+        # parallel devices - LPT1: must always be defined
+        for name in ('LPT1:', 'LPT2:', 'LPT3:'):
+            self.devices.add(name, functools.partial(_create_lpt_device,
+                        device_params[name], name == 'LPT1:', print_trigger, self.codepage, temp_dir))
         # serial devices
         # buffer sizes (/c switch in GW-BASIC)
-        self.devices['COM1:'] = ports.COMDevice(device_params['COM1:'], events, devices.Field(serial_in_size), serial_in_size)
-        self.devices['COM2:'] = ports.COMDevice(device_params['COM2:'], events, devices.Field(serial_in_size), serial_in_size)
+        # attached ports are initialised now, as they receive input for ON COM
+        for name in ('COM1:', 'COM2:'):
+            self.devices.add(name, functools.partial(_create_com_device,
+                        device_params[name], events, serial_in_size), bool(device_params[name]))
         # cassette
         # needs a screen for write() and write_line() to display Found and Skipped messages on opening files
-        self.devices['CAS1:'] = cassette.CASDevice(device_params['CAS1:'], screen)
+        self.devices.add('CAS1:', functools.partial(_create_cas_device,
+                        device_params['CAS1:'], screen, self))
+        # suppress cassette messages in run mode
+        self.cassette_quiet = False
         # disk file locks
         self.locks = disk.Locks()
         # field buffers
@@ -203,8 +225,25 @@ class Devices(object):
                                 self.fields, self.locks, self.codepage, self.events, self.utf8, self.universal)
         self.current_device = current_device.upper()
 
+    @property
+    def lpt1_file(self):
+        """Device file for LPT1:, used by LPRINT, LLIST and print screen."""
+        return self.devices['LPT1:'].device_file
+
+    def loaded(self, name):
+        """Return the device if it has been initialised, None otherwise."""
+        return self.devices.get(name)
+
+    def quiet(self, is_quiet):
+        """Suppress cassette Skipped and Found messages."""
+        self.cassette_quiet = is_quiet
+        cas = self.loaded('CAS1:')
+        if cas:
+            cas.quiet(is_quiet)
+
     def close(self):
         """Close device master files."""
+        # only devices that have been initialised
         for d in self.devices.values():
             d.close()
 
@@ -225,3 +264,45 @@ class Devices(object):
         if dev not in self.drive_letters:
             raise error.RunError(error.DEVICE_UNAVAILABLE)
         return self.devices[dev + b':'], spec
+
+
+class DeviceDict(dict):
+    """Device table; ports and cassette are created on first access."""
+
+    def __init__(self, startup):
+        """Initialise the device table."""
+        dict.__init__(self)
+        self._factories = {}
+        self._startup = startup
+
+    def add(self, name, factory, now=False):
+        """Add a device, to be initialised on first access unless requested now."""
+        self._factories[name] = factory
+        if now:
+            self.__missing__(name)
+
+    def __missing__(self, name):
+        """Initialise a device on first access."""
+        factory = self._factories.pop(name)
+        with self._startup.timed(name):
+            device = self[name] = factory()
+        return device
+
+
+def _create_lpt_device(arg, is_lpt1, print_trigger, codepage, temp_dir):
+    """Create a printer device; LPT1: defaults to a null stream."""
+    from . import ports
+    return ports.LPTDevice(arg, devices.nullstream() if is_lpt1 else None,
+                            print_trigger, codepage, temp_dir)
+
+def _create_com_device(arg, events, serial_in_size):
+    """Create a serial port device."""
+    from . import ports
+    return ports.COMDevice(arg, events, devices.Field(serial_in_size), serial_in_size)
+
+def _create_cas_device(arg, screen, dev):
+    """Create a cassette device."""
+    from . import cassette
+    cas = cassette.CASDevice(arg, screen)
+    cas.quiet(dev.cassette_quiet)
+    return cas
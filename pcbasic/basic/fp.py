@@ -23,6 +23,7 @@ This file is released under the GNU GPL version 3 or later.
 # There is an assumed 1 bit after the radix point (so the assumed mantissa is 0.1ffff... where f's are the fraction bits)
 
 import math
+import struct
 from functools import partial
 
 # the exponent is biased by 128
@@ -32,12 +33,21 @@ true_bias = 128
 class Float(object):
     """Floating-point number in Microsoft Binary Format."""
 
+    __slots__ = ('neg', 'man', 'exp')
+
     # class variables, to override
     digits = None
     mantissa_bits = None
     byte_size = None
     bias = None
     carry_mask = None
+    man_mask = None
+    lead_bit = None
+    # normal form limits for the mantissa
+    man_low = None
+    man_high = None
+    # struct format for the byte representation
+    struct_format = None
     # constants
     zero = None
     one = None
@@ -70,28 +80,32 @@ class Float(object):
         # internal representation has four bytes, last byte is carry for intermediate results
         # put mantissa in form . 1 f1 f2 f3 ... f55
         # internal representation has seven bytes, last bytes are carry for intermediate results
-        man = long((s[-2]|0x80) * 0x100**(cls.byte_size-2))
-        for i in range(cls.byte_size-2):
-            man += s[-cls.byte_size+i] * 0x100**i
-        man <<= 8
-        return cls( (s[-2] >= 0x80), man, s[-1])
+        word, = struct.unpack_from(cls.struct_format, s, len(s)-cls.byte_size)
+        # the sign bit is where the leading mantissa bit is implied
+        sign_bit = cls.lead_bit >> 8
+        man = ((word & cls.man_mask >> 8) | sign_bit) << 8
+        return cls(bool(word & sign_bit), man, word >> (cls.byte_size*8-8))
 
     def to_bytes(self):
         """Convert float to byte representation."""
         self.apply_carry()
-        # extract bytes
-        s = bytearray()
-        man = self.man
-        for _ in range(self.byte_size-1):
-            man >>= 8
-            s.append(man&0xff)
-        # append exponent byte
-        s.append(self.exp)
-        # apply sign
-        s[-2] &= 0x7f
-        if (self.neg):
-            s[-2] |= 0x80
-        return s
+        if self.exp < 0 or self.exp > 0xff:
+            # exponent does not fit in its byte
+            raise ValueError('byte must be in range(0, 256)')
+        sign_bit = self.lead_bit >> 8
+        # mantissa bits beyond the byte size are lost
+        word = (self.man >> 8) & (sign_bit - 1) | (self.exp << (self.byte_size*8-8))
+        if self.neg:
+            word |= sign_bit
+        return bytearray(struct.pack(self.struct_format, word))
+
+    def __getstate__(self):
+        """Pickle."""
+        return self.neg, self.man, self.exp
+
+    def __setstate__(self, state):
+        """Unpickle."""
+        self.neg, self.man, self.exp = state
 
     def is_zero(self):
         """Check if float equals zero."""
@@ -112,7 +126,7 @@ class Float(object):
         if (self.man & 0xff) > 0x7f:
             self.man += 0x100
         # overflow?
-        if self.man >= 0x100**self.byte_size:
+        if self.man > self.man_mask:
             self.exp +=1
             self.man >>= 1
         # discard carry
@@ -124,6 +138,17 @@ class Float(object):
         self.man ^= (self.man&0xff)
         return self
 
+    def canonicalise(self):
+        """In-place. Bring float to the form it has after conversion to bytes and back."""
+        self.apply_carry()
+        if self.exp < 0 or self.exp > 0xff:
+            # exponent does not fit in its byte
+            raise ValueError('byte must be in range(0, 256)')
+        # bits beyond the byte size are lost; leading mantissa bit is implied
+        self.man = (self.man & self.man_mask) | self.lead_bit
+        self.neg = bool(self.neg)
+        return self
+
     def trunc_to_int(self):
         """Truncate float to integer."""
         man = self.man >> 8
@@ -157,13 +182,24 @@ class Float(object):
         if self.man == 0 or self.exp == 0:
             self.neg, self.man, self.exp = self.zero.neg, self.zero.man, self.zero.exp
             return self
-        # are these correct?
-        while self.man <= 2**(self.mantissa_bits+8-1): # 0x7fffffffffffffff: # < 2**63
-            self.exp -= 1
-            self.man <<= 1
-        while self.man > 2**(self.mantissa_bits+8): #0xffffffffffffffff: # 2**64 or 0x100**8
-            self.exp += 1
-            self.man >>= 1
+        # shift until man_low < man <= man_high
+        man = self.man
+        if man <= self.man_low:
+            shift = self.mantissa_bits + 8 - man.bit_length()
+            man <<= shift
+            if man == self.man_low:
+                shift += 1
+                man <<= 1
+            self.exp -= shift
+            self.man = man
+        elif man > self.man_high:
+            shift = man.bit_length() - self.mantissa_bits - 9
+            man >>= shift
+            if man > self.man_high:
+                shift += 1
+                man >>= 1
+            self.exp += shift
+            self.man = man
         # underflow
         if self.exp < 0:
             self.exp = 0
@@ -216,23 +252,21 @@ class Float(object):
             return self
         # ensure right has largest exponent
         if self.exp > right_in.exp:
-            right = self.copy()
-            self.neg, self.man, self.exp = right_in.neg, right_in.man, right_in.exp
+            left_neg, left_man, left_exp = right_in.neg, right_in.man, right_in.exp
+            right_neg, right_man, right_exp = self.neg, self.man, self.exp
         else:
-            right = right_in
+            left_neg, left_man, left_exp = self.neg, self.man, self.exp
+            right_neg, right_man, right_exp = right_in.neg, right_in.man, right_in.exp
         # denormalise left to match exponents
-        while self.exp < right.exp:
-            self.exp += 1
-            self.man >>= 1
+        left_man >>= right_exp - left_exp
+        self.exp = right_exp
         # add mantissas, taking sign into account
-        if (self.neg == right.neg):
-            self.man += right.man
+        if left_neg == right_neg:
+            self.neg, self.man = left_neg, left_man + right_man
+        elif left_man > right_man:
+            self.neg, self.man = left_neg, left_man - right_man
         else:
-            if self.man > right.man:
-                self.man -= right.man
-            else:
-                self.man = right.man - self.man
-                self.neg = right.neg
+            self.neg, self.man = right_neg, right_man - left_man
         return self
 
     def iadd(self, right):
@@ -284,17 +318,26 @@ class Float(object):
         # subtract exponentials
         self.exp -= right_in.exp - right_in.bias - 8
         # long division of mantissas
+        # note that the denominator is shifted rather than the remainder,
+        # so this is not quite exact division
         work_man = self.man
         denom_man = right_in.man
-        self.man = 0L
-        self.exp += 1
-        while (denom_man > 0):
-            self.man <<= 1
-            self.exp -= 1
+        man = 0
+        self.exp += 1 - denom_man.bit_length()
+        if 0 < work_man <= 2*denom_man:
+            # while only zero bits are shifted out of the denominator, the long division
+            # amounts to integer division of work_man-1 by the odd part of the denominator
+            zeros = (denom_man & -denom_man).bit_length() - 1
+            man, work_man = divmod(work_man - 1, denom_man >> zeros)
+            work_man += 1
+            denom_man >>= zeros + 1
+        while denom_man:
+            man <<= 1
             if work_man > denom_man:
                 work_man -= denom_man
-                self.man += 1L
+                man |= 1
             denom_man >>= 1
+        self.man = man
         self.normalise()
         return self
 
@@ -390,11 +433,17 @@ class Float(object):
 
 class Single(Float):
     """Single-precision float."""
+    __slots__ = ()
     digits = 7
     mantissa_bits = 24
     byte_size = 4
     bias = true_bias + mantissa_bits
     carry_mask = 0xffffff00
+    man_mask = 0xffffffff
+    lead_bit = 0x80000000
+    man_low = 2**31
+    man_high = 2**32
+    struct_format = '<I'
 
     def round_to_single(self):
         """Round to single."""
@@ -403,11 +452,17 @@ class Single(Float):
 
 class Double(Float):
     """Double-precision float."""
+    __slots__ = ()
     digits = 16
     mantissa_bits = 56
     byte_size = 8
     bias = true_bias + mantissa_bits
     carry_mask = 0xffffffffffffff00
+    man_mask = 0xffffffffffffffff
+    lead_bit = 0x8000000000000000
+    man_low = 2**63
+    man_high = 2**64
+    struct_format = '<Q'
 
     def round_to_single(self):
         """Round double to single."""
@@ -16,7 +16,6 @@ import logging
 from . import fp
 from . import vartypes
 from . import representation
-from . import shell
 from . import util
 from . import error
 from . import basictoken as tk
@@ -411,6 +410,7 @@ class Functions(object):
 
     def value_environ(self, ins):
         """ENVIRON$: get environment string."""
+        from . import shell
         util.require_read(ins, ('$',))
         expr = self.parser.parse_bracket(ins, self.session)
         if expr[0] == '$':
@@ -134,6 +134,17 @@ class Drawing(object):
         nx0, nx1 = max(x0, vx0), min(x0+len(attr_list), vx1)
         return nx0, y0, attr_list[nx0-x0:nx1-x0+1]
 
+    def view_clip_points(self, xs, ys):
+        """Return the points within the view from lists of coordinates."""
+        vx0, vy0, vx1, vy1 = self.get_view()
+        if numpy:
+            xs, ys = numpy.asarray(xs, dtype=int), numpy.asarray(ys, dtype=int)
+            inside = (xs >= vx0) & (xs <= vx1) & (ys >= vy0) & (ys <= vy1)
+            return xs[inside], ys[inside]
+        else:
+            points = [(x, y) for x, y in zip(xs, ys) if vx0 <= x <= vx1 and vy0 <= y <= vy1]
+            return [x for x, _ in points], [y for _, y in points]
+
     def get_view_mid(self):
         """Get the midpoint of the current graphics view."""
         x0, y0, x1, y1 = self.get_view()
@@ -259,6 +270,10 @@ class Drawing(object):
 
     def draw_line(self, x0, y0, x1, y1, c, pattern=0xffff):
         """Draw a line between the given physical points."""
+        self.screen.put_pixels(*self.get_line_points(x0, y0, x1, y1, pattern), index=c)
+
+    def get_line_points(self, x0, y0, x1, y1, pattern=0xffff):
+        """Return the coordinates of the points of a line between the given physical points."""
         # cut off any out-of-bound coordinates
         x0, y0 = self.screen.mode.cutoff_coord(x0, y0)
         x1, y1 = self.screen.mode.cutoff_coord(x1, y1)
@@ -273,22 +288,10 @@ class Drawing(object):
             dx, dy = dy, dx
         sx = 1 if x1 > x0 else -1
         sy = 1 if y1 > y0 else -1
-        mask = 0x8000
-        line_error = dx / 2
-        x, y = x0, y0
-        for x in xrange(x0, x1+sx, sx):
-            if pattern & mask != 0:
-                if steep:
-                    self.screen.put_pixel(y, x, c)
-                else:
-                    self.screen.put_pixel(x, y, c)
-            mask >>= 1
-            if mask == 0:
-                mask = 0x8000
-            line_error -= dy
-            if line_error < 0:
-                y += sy
-                line_error += dx
+        xs, ys, _ = bresenham_points(x0, y0, dx, dy, sx, sy, pattern, 0x8000)
+        if steep:
+            return ys, xs
+        return xs, ys
 
     def draw_box_filled(self, x0, y0, x1, y1, c):
         """Draw a filled box between the given corner points."""
@@ -304,32 +307,16 @@ class Drawing(object):
         """Draw an empty box between the given corner points."""
         x0, y0 = self.screen.mode.cutoff_coord(x0, y0)
         x1, y1 = self.screen.mode.cutoff_coord(x1, y1)
-        mask = 0x8000
-        mask = self.draw_straight(x1, y1, x0, y1, c, pattern, mask)
-        mask = self.draw_straight(x1, y0, x0, y0, c, pattern, mask)
+        # the line pattern continues from one side to the next
+        xs0, ys0, mask = straight_points(x1, y1, x0, y1, pattern, 0x8000)
+        xs1, ys1, mask = straight_points(x1, y0, x0, y0, pattern, mask)
         # verticals always drawn top to bottom
         if y0 < y1:
             y0, y1 = y1, y0
-        mask = self.draw_straight(x1, y1, x1, y0, c, pattern, mask)
-        mask = self.draw_straight(x0, y1, x0, y0, c, pattern, mask)
-
-    def draw_straight(self, x0, y0, x1, y1, c, pattern, mask):
-        """Draw a horizontal or vertical line."""
-        if x0 == x1:
-            p0, p1, q, direction = y0, y1, x0, 'y'
-        else:
-            p0, p1, q, direction = x0, x1, y0, 'x'
-        sp = 1 if p1 > p0 else -1
-        for p in range(p0, p1+sp, sp):
-            if pattern & mask != 0:
-                if direction == 'x':
-                    self.screen.put_pixel(p, q, c)
-                else:
-                    self.screen.put_pixel(q, p, c)
-            mask >>= 1
-            if mask == 0:
-                mask = 0x8000
-        return mask
+        xs2, ys2, mask = straight_points(x1, y1, x1, y0, pattern, mask)
+        xs3, ys3, mask = straight_points(x0, y1, x0, y0, pattern, mask)
+        self.screen.put_pixels(*concat_points(
+                (xs0, ys0), (xs1, ys1), (xs2, ys2), (xs3, ys3)), index=c)
 
     ### CIRCLE: circle, ellipse, sectors
 
@@ -428,6 +415,8 @@ class Drawing(object):
         # if oct1==oct0:
         # ----|.....|--- : coo1 lt coo0 : print if y in [0,coo1] or in [coo0, r]
         # ....|-----|... ; coo1 gte coo0: print if y in [coo0,coo1]
+        # collect the points first, then draw them in one go
+        xs, ys = [], []
         x, y = r, 0
         bres_error = 1-r
         while x >= y:
@@ -450,7 +439,9 @@ class Drawing(object):
                         # (don't draw if y is between coo's)
                         if octant_gt(oct0, y, coo1) and octant_gt(oct0, coo0, y):
                             continue
-                self.screen.put_pixel(*octant_coord(octant, x0, y0, x, y), index=c)
+                px, py = octant_coord(octant, x0, y0, x, y)
+                xs.append(px)
+                ys.append(py)
             # remember endpoints for pie sectors
             if y == coo0:
                 coo0x = x
@@ -463,11 +454,13 @@ class Drawing(object):
             else:
                 x -= 1
                 bres_error += 2*(y-x+1)
+        points = [(xs, ys)]
         # draw pie-slice lines
         if line0:
-            self.draw_line(x0, y0, *octant_coord(oct0, x0, y0, coo0x, coo0), c=c)
+            points.append(self.get_line_points(x0, y0, *octant_coord(oct0, x0, y0, coo0x, coo0)))
         if line1:
-            self.draw_line(x0, y0, *octant_coord(oct1, x0, y0, coo1x, coo1), c=c)
+            points.append(self.get_line_points(x0, y0, *octant_coord(oct1, x0, y0, coo1x, coo1)))
+        self.screen.put_pixels(*concat_points(*points), index=c)
 
     def draw_ellipse(self, cx, cy, rx, ry, c,
                      qua0=-1, x0=-1, y0=-1, line0=False,
@@ -488,6 +481,8 @@ class Drawing(object):
         ddx = 32 * ry * ry
         # error for first step
         err = dx + dy
+        # collect the points first, then draw them in one go
+        xs, ys = [], []
         x, y = rx, 0
         while True:
             for quadrant in range(0,4):
@@ -505,7 +500,9 @@ class Drawing(object):
                     else:
                         if quadrant_gt(qua0, x, y, x1, y1) and quadrant_gt(qua0, x0, y0, x, y):
                             continue
-                self.screen.put_pixel(*quadrant_coord(quadrant, cx, cy, x, y), index=c)
+                px, py = quadrant_coord(quadrant, cx, cy, x, y)
+                xs.append(px)
+                ys.append(py)
             # bresenham error step
             e2 = 2 * err
             if (e2 <= dy):
@@ -522,14 +519,16 @@ class Drawing(object):
         # too early stop of flat vertical ellipses
         # finish tip of ellipse
         while (y < ry):
-            self.screen.put_pixel(cx, cy+y, c)
-            self.screen.put_pixel(cx, cy-y, c)
+            xs += [cx, cx]
+            ys += [cy+y, cy-y]
             y += 1
+        points = [(xs, ys)]
         # draw pie-slice lines
         if line0:
-            self.draw_line(cx, cy, *quadrant_coord(qua0, cx, cy, x0, y0), c=c)
+            points.append(self.get_line_points(cx, cy, *quadrant_coord(qua0, cx, cy, x0, y0)))
         if line1:
-            self.draw_line(cx, cy, *quadrant_coord(qua1, cx, cy, x1, y1), c=c)
+            points.append(self.get_line_points(cx, cy, *quadrant_coord(qua1, cx, cy, x1, y1)))
+        self.screen.put_pixels(*concat_points(*points), index=c)
 
     ### PAINT: Flood fill
 
@@ -556,68 +555,59 @@ class Drawing(object):
         # paint nothing if we start on border attrib
         if self.screen.get_pixel(x,y) == border:
             return
-        while len(line_seed) > 0:
-            # consider next interval
-            x_start, x_stop, y, ydir = line_seed.pop()
-            # extend interval as far as it goes to left and right
-            x_left = x_start - len(self.screen.get_until(x_start-1, bound_x0-1, y, border))
-            x_right = x_stop + len(self.screen.get_until(x_stop+1, bound_x1+1, y, border))
-            # check next scanlines and add intervals to the list
-            if ydir == 0:
-                if y + 1 <= bound_y1:
-                    line_seed = self.check_scanline(line_seed, x_left, x_right, y+1, c, tile, back, border, 1)
-                if y - 1 >= bound_y0:
-                    line_seed = self.check_scanline(line_seed, x_left, x_right, y-1, c, tile, back, border, -1)
-            else:
-                # check the same interval one scanline onward in the same direction
-                if y+ydir <= bound_y1 and y+ydir >= bound_y0:
-                    line_seed = self.check_scanline(line_seed, x_left, x_right, y+ydir, c, tile, back, border, ydir)
-                # check any bit of the interval that was extended one scanline backward
-                # this is where the flood fill goes around corners.
-                if y-ydir <= bound_y1 and y-ydir >= bound_y0:
-                    line_seed = self.check_scanline(line_seed, x_left, x_start-1, y-ydir, c, tile, back, border, -ydir)
-                    line_seed = self.check_scanline(line_seed, x_stop+1, x_right, y-ydir, c, tile, back, border, -ydir)
-            # draw the pixels for the current interval
-            if solid:
-                self.screen.fill_interval(x_left, x_right, y, tile[0][0])
-            else:
-                interval = tile_to_interval(x_left, x_right, y, tile)
-                self.screen.put_interval(self.screen.apagenum, x_left, y, interval)
-            # allow interrupting the paint
-            if y%4 == 0:
-                events.wait()
+        # tile and background rows across the width of the screen, so that x indexes them
+        width = self.screen.mode.pixel_width
+        tile_rows = [tile_to_interval(0, width-1, ty, tile) for ty in range(len(tile))]
+        back_rows = [tile_to_interval(0, width-1, ty, back) for ty in range(len(back))] if back else None
+        # painted intervals, refreshed in one go
+        painted = []
+        try:
+            while len(line_seed) > 0:
+                # consider next interval
+                x_start, x_stop, y, ydir = line_seed.pop()
+                # extend interval as far as it goes to left and right
+                x_left, x_right = extend_interval(self.screen.get_scanline(y),
+                                        x_start, x_stop, bound_x0, bound_x1, border)
+                # check next scanlines and add intervals to the list
+                if ydir == 0:
+                    if y + 1 <= bound_y1:
+                        line_seed = self.check_scanline(line_seed, x_left, x_right, y+1, tile, tile_rows, back_rows, border, 1)
+                    if y - 1 >= bound_y0:
+                        line_seed = self.check_scanline(line_seed, x_left, x_right, y-1, tile, tile_rows, back_rows, border, -1)
+                else:
+                    # check the same interval one scanline onward in the same direction
+                    if y+ydir <= bound_y1 and y+ydir >= bound_y0:
+                        line_seed = self.check_scanline(line_seed, x_left, x_right, y+ydir, tile, tile_rows, back_rows, border, ydir)
+                    # check any bit of the interval that was extended one scanline backward
+                    # this is where the flood fill goes around corners.
+                    if y-ydir <= bound_y1 and y-ydir >= bound_y0:
+                        line_seed = self.check_scanline(line_seed, x_left, x_start-1, y-ydir, tile, tile_rows, back_rows, border, -ydir)
+                        line_seed = self.check_scanline(line_seed, x_stop+1, x_right, y-ydir, tile, tile_rows, back_rows, border, -ydir)
+                # draw the pixels for the current interval
+                self.screen.write_interval(x_left, y,
+                                    tile_rows[y % len(tile_rows)][x_left:x_right+1])
+                painted.append((x_left, x_right, y))
+                # allow interrupting the paint
+                if y%4 == 0:
+                    events.check_events()
+        finally:
+            self.screen.refresh_intervals(painted)
         self.last_attr = c
 
     def check_scanline(self, line_seed, x_start, x_stop, y,
-                       c, tile, back, border, ydir):
+                       tile, tile_rows, back_rows, border, ydir):
         """Append all subintervals between border colours to the scanning stack."""
         if x_stop < x_start:
             return line_seed
-        x_start_next = x_start
-        x_stop_next = x_start_next-1
-        rtile = tile[y%len(tile)]
-        if back:
-            rback = back[y%len(back)]
-        x = x_start
-        while x <= x_stop:
-            # scan horizontally until border colour found, then append interval & continue scanning
-            pattern = self.screen.get_until(x, x_stop+1, y, border)
-            x_stop_next = x + len(pattern) - 1
-            x = x_stop_next + 1
-            # never match zero pattern (special case)
-            has_same_pattern = (rtile != [0]*8)
-            for pat_x in range(len(pattern)):
-                if not has_same_pattern:
-                    break
-                tile_x = (x_start_next + pat_x) % 8
-                has_same_pattern &= (pattern[pat_x] == rtile[tile_x])
-                has_same_pattern &= (not back or pattern[pat_x] != rback[tile_x])
-            # we've reached a border colour, append our interval & start a new one
+        row = self.screen.get_scanline(y)
+        # never match zero pattern (special case)
+        match_tile = any(tile[y % len(tile)])
+        tile_row = tile_rows[y % len(tile_rows)]
+        back_row = back_rows[y % len(back_rows)] if back_rows else None
+        for x0, x1 in scanline_spans(row, x_start, x_stop, border):
             # don't append if same fill colour/pattern, to avoid infinite loops over bits already painted (eg. 00 shape)
-            if x_stop_next >= x_start_next and not has_same_pattern:
-                line_seed.append([x_start_next, x_stop_next, y, ydir])
-            x_start_next = x + 1
-            x += 1
+            if not match_tile or not interval_matches(row, x0, x1, tile_row, back_row):
+                line_seed.append([x0, x1, y, ydir])
         return line_seed
 
     ### PUT and GET: Sprite operations
@@ -838,6 +828,91 @@ def tile_to_interval(x0, x1, y, tile):
     else:
         return [tile[y % h][x % 8] for x in xrange(x0, x1+1)]
 
+def extend_interval(row, x_start, x_stop, x_min, x_max, border):
+    """Extend a scanline interval to the left and right until a border attribute or the bounds."""
+    if numpy:
+        left = numpy.flatnonzero(row[x_min:x_start] == border)
+        right = numpy.flatnonzero(row[x_stop+1:x_max+1] == border)
+        x_left = x_min + int(left[-1]) + 1 if len(left) else x_min
+        x_right = x_stop + int(right[0]) if len(right) else x_max
+    else:
+        left = row[x_min:x_start]
+        try:
+            x_left = x_start - left[::-1].index(border)
+        except ValueError:
+            x_left = x_min
+        try:
+            x_right = row.index(border, x_stop+1, x_max+1) - 1
+        except ValueError:
+            x_right = x_max
+    return x_left, x_right
+
+def scanline_spans(row, x0, x1, border):
+    """Return the (inclusive) intervals between border attributes in a scanline interval."""
+    if numpy:
+        inside = numpy.concatenate(([False], row[x0:x1+1] != border, [False]))
+        # inside/outside changes alternate between starts and (exclusive) stops
+        edges = numpy.flatnonzero(inside[1:] != inside[:-1]) + x0
+        return zip(edges[::2].tolist(), (edges[1::2]-1).tolist())
+    else:
+        spans = []
+        while x0 <= x1:
+            try:
+                stop = row.index(border, x0, x1+1)
+            except ValueError:
+                stop = x1+1
+            if stop > x0:
+                spans.append((x0, stop-1))
+            x0 = stop+1
+        return spans
+
+def interval_matches(row, x0, x1, tile_row, back_row):
+    """Check if a scanline interval equals the tile row and nowhere equals the background row."""
+    if numpy:
+        span = row[x0:x1+1]
+        return ((span == tile_row[x0:x1+1]).all() and
+                (back_row is None or not (span == back_row[x0:x1+1]).any()))
+    else:
+        span = row[x0:x1+1]
+        return (span == tile_row[x0:x1+1] and
+                (back_row is None or not any(a == b for a, b in zip(span, back_row[x0:x1+1]))))
+
+###############################################################################
+# point sets for LINE and CIRCLE
+
+def bresenham_points(x0, y0, dx, dy, sx, sy, pattern, mask):
+    """Return the points of a line with slope at most 1 that are set in the pattern, and the next mask."""
+    # the line error stays in [0, dx), so after k steps it has been corrected
+    # ceil((k*dy - dx/2) / dx) times; each time y takes a step
+    offset = 16 - mask.bit_length()
+    bits = [pattern & (0x8000 >> i) != 0 for i in range(16)]
+    next_mask = 0x8000 >> ((offset + dx + 1) % 16)
+    if numpy:
+        k = numpy.arange(dx+1)
+        k = k[numpy.array(bits)[(k + offset) % 16]]
+        return x0 + sx*k, y0 - sy*((dx//2 - k*dy) // max(dx, 1)), next_mask
+    else:
+        k = [i for i in xrange(dx+1) if bits[(i + offset) % 16]]
+        return ([x0 + sx*i for i in k],
+                [y0 - sy*((dx//2 - i*dy) // max(dx, 1)) for i in k], next_mask)
+
+def straight_points(x0, y0, x1, y1, pattern, mask):
+    """Return the points of a horizontal or vertical line that are set in the pattern, and the next mask."""
+    if x0 == x1:
+        ys, xs, mask = bresenham_points(y0, x0, abs(y1-y0), 0, 1 if y1 > y0 else -1, 1, pattern, mask)
+    else:
+        xs, ys, mask = bresenham_points(x0, y0, abs(x1-x0), 0, 1 if x1 > x0 else -1, 1, pattern, mask)
+    return xs, ys, mask
+
+def concat_points(*point_sets):
+    """Join sets of point coordinates given as (xs, ys)."""
+    if numpy:
+        return (numpy.concatenate([xs for xs, _ in point_sets]).astype(int),
+                numpy.concatenate([ys for _, ys in point_sets]).astype(int))
+    else:
+        return ([x for xs, _ in point_sets for x in xs],
+                [y for _, ys in point_sets for y in ys])
+
 
 ###############################################################################
 # octant logic for CIRCLE
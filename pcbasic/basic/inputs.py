@@ -313,6 +313,12 @@ class Keyboard(object):
         """Signal that input stream has closed."""
         self._input_closed = True
 
+    def open_input(self):
+        """Signal that a new input stream is open; drop any pending keystrokes."""
+        self.buf = KeyboardBuffer(self.buf.sound, self.buf.ring_length, self.buf.fkey_macros)
+        self.prebuf = []
+        self._input_closed = False
+
     def drain_event_buffer(self):
         """Drain prebuffer into key buffer and handle trappable special keys."""
         while self.prebuf:
@@ -26,8 +26,7 @@ class MachinePorts(object):
         # 3BCh - 3BFh  Used for Parallel Ports which were incorporated on to Video Cards - Doesn't support ECP addresses
         # 378h - 37Fh  Usual Address For LPT 1
         # 278h - 27Fh  Usual Address For LPT 2
-        dev = self.session.devices
-        self.lpt_device = [dev.devices['LPT1:'], dev.devices['LPT2:']]
+        self.lpt_names = ('LPT1:', 'LPT2:')
         # serial port base address:
         # http://www.petesqbsite.com/sections/tutorials/zines/qbnews/9-com_ports.txt
         #            COM1             &H3F8
@@ -35,7 +34,7 @@ class MachinePorts(object):
         #            COM3             &H3E8 (not implemented)
         #            COM4             &H2E8 (not implemented)
         self.com_base = {0x3f8: 0, 0x2f8: 1}
-        self.com_device = [dev.devices['COM1:'], dev.devices['COM2:']]
+        self.com_names = ('COM1:', 'COM2:')
         self.com_enable_baud_write = [False, False]
         self.com_baud_divisor = [0, 0]
         self.com_break = [False, False]
@@ -68,18 +67,20 @@ class MachinePorts(object):
             # http://retired.beyondlogic.org/spp/parallel.htm
             lpt_port_nr = 0 if port >= 0x378 else 1
             base_addr = {0: 0x378, 1: 0x278}
-            if self.lpt_device[lpt_port_nr].stream is None:
+            lpt_device = self.session.devices.devices[self.lpt_names[lpt_port_nr]]
+            if lpt_device.stream is None:
                 return 0
             # get status port
-            busy, ack, paper, select, err = self.lpt_device[lpt_port_nr].stream.get_status()
+            busy, ack, paper, select, err = lpt_device.stream.get_status()
             return busy * 0x80 | ack * 0x40 | paper * 0x20 | select * 0x10 | err * 0x8
         else:
             # serial port machine ports
             # http://www.qb64.net/wiki/index.php/Port_Access_Libraries#Serial_Communication_Registers
             # http://control.com/thread/1026221083
             for base_addr, com_port_nr in self.com_base.iteritems():
-                com_port = self.com_device[com_port_nr]
-                if com_port.stream is None:
+                # attached ports are always initialised
+                com_port = self.session.devices.loaded(self.com_names[com_port_nr])
+                if com_port is None or com_port.stream is None:
                     continue
                 # Line Control Register: base_address + 3 (r/w)
                 if port == base_addr + 3:
@@ -132,22 +133,24 @@ class MachinePorts(object):
             # http://retired.beyondlogic.org/spp/parallel.htm
             lpt_port_nr = 0 if addr >= 0x378 else 1
             base_addr = {0: 0x378, 1: 0x278}
-            if self.lpt_device[lpt_port_nr].stream is None:
+            lpt_device = self.session.devices.devices[self.lpt_names[lpt_port_nr]]
+            if lpt_device.stream is None:
                 return
             if addr - base_addr[lpt_port_nr] == 0:
                 # set data port
-                self.lpt_device[lpt_port_nr].stream.write(chr(val))
+                lpt_device.stream.write(chr(val))
             else:
                 # set control port
-                self.lpt_device[lpt_port_nr].stream.set_control(
+                lpt_device.stream.set_control(
                     select=val & 0x8, init=val&0x4, lf=val&0x2, strobe=val&0x1)
         else:
             # serial port machine ports
             # http://www.qb64.net/wiki/index.php/Port_Access_Libraries#Serial_Communication_Registers
             # http://control.com/thread/1026221083
             for base_addr, com_port_nr in self.com_base.iteritems():
-                com_port = self.com_device[com_port_nr]
-                if com_port.stream is None:
+                # attached ports are always initialised
+                com_port = self.session.devices.loaded(self.com_names[com_port_nr])
+                if com_port is None or com_port.stream is None:
                     continue
                 # ports at base addr and the next one are used for writing baud rate
                 # (among other things that aren't implemented)
@@ -49,10 +49,12 @@ class DataSegment(object):
     # protection flag
     protection_flag_addr = 1450
 
-    def __init__(self, program, total_memory, reserved_memory, max_reclen, max_files):
+    def __init__(self, program, total_memory, reserved_memory, max_reclen, max_files, counters):
         """Initialise memory."""
         # program buffer is initialised elsewhere
         self.program = program
+        # hot-path counters
+        self.counters = counters
         # BASIC stack (determined by CLEAR)
         # Initially, the stack space should be set to 512 bytes,
         # or one-eighth of the available memory, whichever is smaller.
@@ -160,6 +162,8 @@ class DataSegment(object):
         # find all strings that are actually referenced
         string_ptrs = self.scalars.get_strings() + self.arrays.get_strings()
         self.strings.collect_garbage(string_ptrs)
+        if self.counters.enabled:
+            self.counters.count('strings.collect_garbage')
 
     def check_free(self, size, err):
         """Check if sufficient free memory is avilable, raise error if not."""
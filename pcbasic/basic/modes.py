@@ -307,42 +307,30 @@ class TextMode(VideoMode):
         """Retrieve bytes from textmode video memory."""
         addr -= self.video_segment*0x10
         bytes = [0]*num_bytes
-        for i in xrange(num_bytes):
-            page = (addr+i) // self.page_size
-            offset = (addr+i) % self.page_size
-            ccol = (offset % (self.width*2)) // 2
-            crow = offset // (self.width*2)
-            try:
-                c = self.screen.text.pages[page].row[crow].buf[ccol][(addr+i)%2]
-                bytes[i] = c if (addr+i)%2==1 else ord(c)
-            except IndexError:
-                pass
+        i = 0
+        while i < num_bytes:
+            page, offset = divmod(addr+i, self.page_size)
+            num = min(num_bytes-i, self.page_size-offset)
+            if 0 <= page < len(self.screen.text.pages):
+                data = self.screen.text.pages[page].get_memory(offset, num)
+                bytes[i:i+len(data)] = data
+            i += num
         return bytes
 
     def set_memory(self, addr, bytes):
         """Set bytes in textmode video memory."""
         addr -= self.video_segment*0x10
-        last_row = -1
-        for i in xrange(len(bytes)):
-            page = (addr+i) // self.page_size
-            offset = (addr+i) % self.page_size
-            ccol = (offset % (self.width*2)) // 2
-            crow = offset // (self.width*2)
-            try:
-                c, a = self.screen.text.pages[page].row[crow].buf[ccol]
-                if (addr+i)%2 == 0:
-                    c = chr(bytes[i])
-                else:
-                    a = bytes[i]
-                self.screen.text.pages[page].put_char_attr(crow+1, ccol+1, c, a, one_only=False)
-                if last_row >= 0 and last_row != crow:
+        i = 0
+        while i < len(bytes):
+            page, offset = divmod(addr+i, self.page_size)
+            num = min(len(bytes)-i, self.page_size-offset)
+            if 0 <= page < len(self.screen.text.pages):
+                start, stop = self.screen.text.pages[page].set_memory(
+                                                    offset, bytes[i:i+num])
+                for crow in range(start, stop+1):
                     # set for_keys to true to avoid echoing to text terminal
-                    self.screen.refresh_range(page, last_row+1, 1, self.width, for_keys=True)
-            except IndexError:
-                pass
-            last_row = crow
-        if last_row >= 0 and last_row < 25 and page >= 0 and page < self.num_pages:
-            self.screen.refresh_range(page, last_row+1, 1, self.width, for_keys=True)
+                    self.screen.refresh_range(page, crow, 1, self.width, for_keys=True)
+            i += num
 
 
 # helper functions: convert between attribute lists and byte arrays
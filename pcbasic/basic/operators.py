@@ -8,6 +8,7 @@ This file is released under the GNU GPL version 3 or later.
 
 from . import fp
 from . import vartypes
+from . import error
 from . import basictoken as tk
 
 
@@ -85,7 +86,52 @@ class Operators(object):
             tk.EQV: self.number_eqv,
             tk.IMP: self.number_imp,
         }
+        # operators on unboxed numbers, used by compiled expressions
+        # these take unboxed numbers or BASIC values and may return either
+        self.unboxed_unary = {
+            tk.O_MINUS: self.unboxed_neg,
+            tk.O_PLUS: lambda x: x,
+            tk.NOT: unboxed_not,
+        }
+        self.unboxed_binary = {
+            tk.O_CARET: lambda left, right: self.number_power(box(left), box(right)),
+            tk.O_TIMES: self._numeric(unboxed_multiply, self.number_multiply),
+            tk.O_DIV: self._numeric(unboxed_divide, self.number_divide),
+            tk.O_INTDIV: self._numeric(unboxed_intdiv, self.number_intdiv),
+            tk.MOD: self._numeric(unboxed_modulo, self.number_modulo),
+            tk.O_PLUS: self._numeric(unboxed_add, self.plus),
+            tk.O_MINUS: self._numeric(unboxed_subtract, self.number_subtract),
+            tk.O_GT: self._numeric(unboxed_gt, self.gt),
+            tk.O_EQ: self._numeric(unboxed_equals, self.equals),
+            tk.O_LT: self._numeric(unboxed_lt, self.lt),
+            tk.O_GT + tk.O_EQ: self._numeric(unboxed_gte, self.gte),
+            tk.O_EQ + tk.O_GT: self._numeric(unboxed_gte, self.gte),
+            tk.O_LT + tk.O_EQ: self._numeric(unboxed_lte, self.lte),
+            tk.O_EQ + tk.O_LT: self._numeric(unboxed_lte, self.lte),
+            tk.O_LT + tk.O_GT: self._numeric(unboxed_not_equals, self.not_equals),
+            tk.O_GT + tk.O_LT: self._numeric(unboxed_not_equals, self.not_equals),
+            tk.AND: self._numeric(unboxed_and, self.number_and),
+            tk.OR: self._numeric(unboxed_or, self.number_or),
+            tk.XOR: self._numeric(unboxed_xor, self.number_xor),
+            tk.EQV: self._numeric(unboxed_eqv, self.number_eqv),
+            tk.IMP: self._numeric(unboxed_imp, self.number_imp),
+        }
+
+    @staticmethod
+    def _numeric(unboxed_fn, boxed_fn):
+        """Use unboxed operator on numbers, boxed operator otherwise."""
+        def _operator(left, right):
+            if is_unboxable(left) and is_unboxable(right):
+                return unboxed_fn(left, right)
+            return boxed_fn(box(left), box(right))
+        return _operator
 
+    @staticmethod
+    def unboxed_neg(right):
+        """Unary - operator on unboxed numbers: negate or no-op for strings."""
+        if not is_unboxable(right):
+            return Operators.neg(right)
+        return unboxed_number_neg(right)
 
     def __getstate__(self):
         """Pickle."""
@@ -93,6 +139,8 @@ class Operators(object):
         # can't be pickled
         pickle_dict['unary'] = None
         pickle_dict['binary'] = None
+        pickle_dict['unboxed_unary'] = None
+        pickle_dict['unboxed_binary'] = None
         return pickle_dict
 
     def __setstate__(self, pickle_dict):
@@ -349,3 +397,219 @@ class Operators(object):
             return right
         else:
             return Operators.number_neg(right)
+
+
+###############################################################################
+# unboxed numbers
+# compiled expressions keep intermediate results as Python ints for Integers
+# and as fp.Single or fp.Double for floats, rather than as BASIC values.
+# Floats are kept in canonical form, so that the results are the same
+# as when they would have been packed into bytes and unpacked again.
+
+def is_unboxable(value):
+    """Return whether a value is an unboxed number or a numeric BASIC value."""
+    if isinstance(value, tuple):
+        return value[0] in ('%', '!', '#')
+    return value is not None
+
+def unbox(value):
+    """Convert a numeric BASIC value to an unboxed number."""
+    if not isinstance(value, tuple):
+        return value
+    elif value[0] == '%':
+        return vartypes.integer_to_int_signed(value)
+    return fp.unpack(value)
+
+def box(value):
+    """Convert an unboxed number to a BASIC value; pass BASIC values on."""
+    if isinstance(value, tuple) or value is None:
+        return value
+    elif isinstance(value, fp.Float):
+        return fp.pack(value)
+    return vartypes.int_to_integer_signed(value)
+
+def _unboxed_type(value):
+    """Return the sigil for the type of an unboxed number."""
+    if isinstance(value, fp.Double):
+        return '#'
+    elif isinstance(value, fp.Single):
+        return '!'
+    return '%'
+
+def _to_int(value):
+    """Convert unboxed number to Python int; raise Overflow if out of range."""
+    value = unbox(value)
+    if isinstance(value, fp.Float):
+        value = value.round_to_int()
+        if value > 0x7fff or value < -0x8000:
+            raise error.RunError(error.OVERFLOW)
+    return value
+
+def _to_uint(value):
+    """Convert unboxed number to unsigned 16-bit Python int."""
+    return _to_int(value) & 0xffff
+
+def _from_uint(value):
+    """Convert unsigned 16-bit Python int to unboxed Integer."""
+    if value > 0x7fff:
+        return value - 0x10000
+    return value
+
+def _to_single(value):
+    """Convert unboxed number to Single."""
+    value = unbox(value)
+    if isinstance(value, fp.Single):
+        return value
+    elif isinstance(value, fp.Double):
+        return value.round_to_single().canonicalise()
+    return fp.Single.from_int(value).canonicalise()
+
+def _to_double(value):
+    """Convert unboxed number to Double."""
+    value = unbox(value)
+    if isinstance(value, fp.Double):
+        return value
+    elif isinstance(value, fp.Single):
+        return fp.Double(value.neg, value.man << 32, value.exp)
+    return fp.Double.from_int(value).canonicalise()
+
+def _to_most_precise(left, right):
+    """Convert two unboxed numbers to the most precise type of the two."""
+    left, right = unbox(left), unbox(right)
+    left_type, right_type = _unboxed_type(left), _unboxed_type(right)
+    if left_type == '#' or right_type == '#':
+        return _to_double(left), _to_double(right)
+    elif left_type == '!' or right_type == '!':
+        return _to_single(left), _to_single(right)
+    return left, right
+
+def _to_float(left, right):
+    """Convert two unboxed numbers to Double if either is Double, else to Single."""
+    left, right = unbox(left), unbox(right)
+    if isinstance(left, fp.Double) or isinstance(right, fp.Double):
+        return _to_double(left), _to_double(right)
+    return _to_single(left), _to_single(right)
+
+def unboxed_add(left, right):
+    """Add two unboxed numbers."""
+    left, right = _to_most_precise(left, right)
+    if isinstance(left, fp.Float):
+        return left.iadd(right).canonicalise()
+    # return Single to avoid wrapping on integer overflow
+    return fp.Single.from_int(left + right).canonicalise()
+
+def unboxed_number_neg(right):
+    """Negate an unboxed number."""
+    right = unbox(right)
+    if isinstance(right, fp.Float):
+        # unboxed values are not shared, negate in place
+        right.neg = not right.neg
+        return right
+    elif right == -0x8000:
+        return fp.Single.from_int(0x8000).canonicalise()
+    return -right
+
+def unboxed_subtract(left, right):
+    """Subtract two unboxed numbers."""
+    return unboxed_add(left, unboxed_number_neg(right))
+
+def unboxed_multiply(left, right):
+    """Multiply two unboxed numbers."""
+    left, right = _to_float(left, right)
+    return left.imul(right).canonicalise()
+
+def unboxed_divide(left, right):
+    """Divide two unboxed numbers."""
+    left, right = _to_float(left, right)
+    return left.idiv(right).canonicalise()
+
+def unboxed_intdiv(left, right):
+    """Integer-divide two unboxed numbers."""
+    dividend = _to_int(left)
+    divisor = _to_int(right)
+    if divisor == 0:
+        # division by zero, return single-precision maximum
+        raise ZeroDivisionError(fp.Single(dividend<0, fp.Single.max.man, fp.Single.max.exp))
+    if (dividend >= 0) == (divisor >= 0):
+        quotient = dividend / divisor
+    else:
+        quotient = -(abs(dividend) / abs(divisor))
+    if quotient > 0x7fff:
+        raise error.RunError(error.OVERFLOW)
+    return quotient
+
+def unboxed_modulo(left, right):
+    """Take the modulo of two unboxed numbers."""
+    divisor = _to_int(right)
+    dividend = _to_int(left)
+    if divisor == 0:
+        # division by zero, return single-precision maximum
+        raise ZeroDivisionError(fp.Single(dividend<0, fp.Single.max.man, fp.Single.max.exp))
+    mod = dividend % divisor
+    if dividend < 0 or mod < 0:
+        mod -= divisor
+    if mod > 0x7fff or mod < -0x8000:
+        raise error.RunError(error.OVERFLOW)
+    return mod
+
+def unboxed_not(right):
+    """Bitwise NOT of an unboxed number, -x-1."""
+    return -_to_int(right)-1
+
+def unboxed_and(left, right):
+    """Bitwise AND of two unboxed numbers."""
+    return _from_uint(_to_uint(left) & _to_uint(right))
+
+def unboxed_or(left, right):
+    """Bitwise OR of two unboxed numbers."""
+    return _from_uint(_to_uint(left) | _to_uint(right))
+
+def unboxed_xor(left, right):
+    """Bitwise XOR of two unboxed numbers."""
+    return _from_uint(_to_uint(left) ^ _to_uint(right))
+
+def unboxed_eqv(left, right):
+    """Bitwise equivalence of two unboxed numbers."""
+    return _from_uint(0xffff - (_to_uint(left) ^ _to_uint(right)))
+
+def unboxed_imp(left, right):
+    """Bitwise implication of two unboxed numbers."""
+    return _from_uint((0xffff - _to_uint(left)) | _to_uint(right))
+
+def _unboxed_bool_eq(left, right):
+    """Return true if left == right, false otherwise."""
+    left, right = _to_most_precise(left, right)
+    if isinstance(left, fp.Float):
+        return left.equals(right)
+    return left == right
+
+def _unboxed_bool_gt(left, right):
+    """Return true if left > right, false otherwise."""
+    left, right = _to_most_precise(left, right)
+    if isinstance(left, fp.Float):
+        return left.gt(right)
+    return left > right
+
+def unboxed_equals(left, right):
+    """Return -1 if left == right, 0 otherwise."""
+    return -1 if _unboxed_bool_eq(left, right) else 0
+
+def unboxed_not_equals(left, right):
+    """Return -1 if left != right, 0 otherwise."""
+    return 0 if _unboxed_bool_eq(left, right) else -1
+
+def unboxed_gt(left, right):
+    """Return -1 if left > right, 0 otherwise."""
+    return -1 if _unboxed_bool_gt(left, right) else 0
+
+def unboxed_gte(left, right):
+    """Return -1 if left >= right, 0 otherwise."""
+    return 0 if _unboxed_bool_gt(right, left) else -1
+
+def unboxed_lte(left, right):
+    """Return -1 if left <= right, 0 otherwise."""
+    return 0 if _unboxed_bool_gt(left, right) else -1
+
+def unboxed_lt(left, right):
+    """Return -1 if left < right, 0 otherwise."""
+    return -1 if _unboxed_bool_gt(right, left) else 0
@@ -24,6 +24,10 @@ from . import operators as op
 from . import functions
 
 
+# compiled expression steps
+_LITERAL, _STRING, _SCALAR, _UNIT, _UNARY, _BINARY = range(6)
+
+
 class Parser(object):
     """Statement parser."""
 
@@ -39,6 +43,9 @@ class Parser(object):
         # pointer position: False for direct line, True for program
         self.run_mode = False
         self.program_code = session.program.bytecode
+        self.statement_cache = session.program.statement_cache
+        self.jump_table = session.program.jump_table
+        self.expression_cache = session.program.expression_cache
         self.current_statement = 0
         # clear stacks
         self.clear_stacks_and_pointers()
@@ -68,44 +75,42 @@ class Parser(object):
             self.handle_basic_events()
             ins = self.get_codestream()
             self.current_statement = ins.tell()
-            c = util.skip_white(ins)
-            if c == '':
-                # stream has ended.
+            if self.run_mode:
+                # program statements are decoded once, then replayed from cache
+                try:
+                    endpos, linenum, prepos, c = self.statement_cache[self.current_statement]
+                    ins.seek(endpos)
+                except KeyError:
+                    linenum, prepos, c = self._decode_statement(ins)
+                    self.statement_cache[self.current_statement] = (
+                            ins.tell(), linenum, prepos, c)
+            else:
+                linenum, prepos, c = self._decode_statement(ins)
+            if linenum == -1:
+                if self.error_resume:
+                    # unfinished error handler: no RESUME (don't trap this)
+                    self.error_handle_mode = True
+                    # get line number right
+                    raise error.RunError(error.NO_RESUME, prepos-1)
+                # stream has ended
                 self.set_pointer(False)
                 return False
-            # parse line number or : at start of statement
-            elif c == '\0':
-                # save position for error message
-                prepos = ins.tell()
-                ins.read(1)
-                # line number marker, new statement
-                linenum = util.parse_line_number(ins)
-                if linenum == -1:
-                    if self.error_resume:
-                        # unfinished error handler: no RESUME (don't trap this)
-                        self.error_handle_mode = True
-                        # get line number right
-                        raise error.RunError(error.NO_RESUME, prepos-1)
-                    # stream has ended
-                    self.set_pointer(False)
-                    return False
+            elif linenum is not None:
                 if self.tron:
                     self.session.screen.write('[' + ('%i' % linenum) + ']')
                 self.session.debugger.debug_step(linenum)
-            elif c == ':':
-                ins.read(1)
-            c = util.skip_white(ins)
+            if c is None:
+                # stream has ended.
+                self.set_pointer(False)
+                return False
             # empty statement, return to parse next
-            if c in tk.end_statement:
+            elif c in tk.end_statement:
                 return True
             # implicit LET
             elif c in string.ascii_letters:
                 self.statements.exec_let(ins)
             # token
             else:
-                ins.read(1)
-                if c in tk.twobyte:
-                    c += ins.read(1)
                 # don't use try-block to avoid catching other KeyErrors in statement
                 if c not in self.statements.statements:
                     raise error.RunError(error.STX)
@@ -114,6 +119,36 @@ class Parser(object):
             self.trap_error(e)
         return True
 
+    def _decode_statement(self, ins):
+        """Read line number marker and keyword token at the start of a statement.
+            Return line number, position of line number marker and keyword.
+            Line number is None if the statement does not start a line,
+            -1 if the program has ended; keyword is None if the stream has ended.
+            The stream is left after the keyword token, or at the first character
+            of an implicit LET or an empty statement.
+            """
+        linenum, prepos = None, None
+        c = util.skip_white(ins)
+        if c == '':
+            return linenum, prepos, None
+        # parse line number or : at start of statement
+        elif c == '\0':
+            # save position for error message
+            prepos = ins.tell()
+            ins.read(1)
+            # line number marker, new statement
+            linenum = util.parse_line_number(ins)
+            if linenum == -1:
+                return linenum, prepos, None
+        elif c == ':':
+            ins.read(1)
+        c = util.skip_white(ins)
+        if c not in tk.end_statement and c not in string.ascii_letters:
+            ins.read(1)
+            if c in tk.twobyte:
+                c += ins.read(1)
+        return linenum, prepos, c
+
     #################################################################
 
     def clear(self):
@@ -158,9 +193,9 @@ class Parser(object):
         """Jump to user-defined event subs if events triggered."""
         if self.session.events.suspend_all or not self.run_mode:
             return
-        for event in self.session.events.all:
-            if (event.enabled and event.triggered
-                    and not event.stopped and event.gosub is not None):
+        # only handlers that are ON and have a jump target can fire
+        for event in self.session.events.armed:
+            if event.triggered and not event.stopped:
                 # release trigger
                 event.triggered = False
                 # stop this event while handling it
@@ -199,7 +234,7 @@ class Parser(object):
         # keep the sound engine on to avoid delays in run mode
         self.session.sound.persist(new_runmode)
         # suppress cassette messages in run mode
-        self.session.devices.devices['CAS1:'].quiet(new_runmode)
+        self.session.devices.quiet(new_runmode)
         codestream = self.get_codestream()
         if pos is not None:
             # jump to position, if given
@@ -358,23 +393,8 @@ class Parser(object):
         d = util.skip_white(ins)
         # string literal
         if d == '"':
-            ins.read(1)
-            if ins == session.program.bytecode:
-                address = ins.tell() + session.memory.code_start
-            else:
-                address = None
-            output = bytearray()
-            # while tokenised numbers inside a string literal will be printed as tokenised numbers, they don't actually execute as such:
-            # a \00 character, even if inside a tokenised number, will break a string literal (and make the parser expect a
-            # line number afterwards, etc. We follow this.
-            d = ins.read(1)
-            while d not in tk.end_line + ('"',):
-                output += d
-                d = ins.read(1)
-            if d == '\0':
-                ins.seek(-1, 1)
             # store for easy retrieval, but don't reserve space in string memory
-            return session.strings.store(output, address)
+            return session.strings.store(*self._read_string_literal(ins))
         # number literals as ASCII are accepted in tokenised streams. only if they start with a figure (not & or .)
         # this happens e.g. after non-keywords like AS. They are not acceptable as line numbers.
         elif d in string.digits:
@@ -391,9 +411,32 @@ class Parser(object):
         else:
             raise error.RunError(error.STX)
 
+    def _read_string_literal(self, ins):
+        """Read the string literal at the current code pointer; return contents and address."""
+        ins.read(1)
+        if ins == self.session.program.bytecode:
+            address = ins.tell() + self.session.memory.code_start
+        else:
+            address = None
+        output = bytearray()
+        # while tokenised numbers inside a string literal will be printed as tokenised numbers, they don't actually execute as such:
+        # a \00 character, even if inside a tokenised number, will break a string literal (and make the parser expect a
+        # line number afterwards, etc. We follow this.
+        d = ins.read(1)
+        while d not in tk.end_line + ('"',):
+            output += d
+            d = ins.read(1)
+        if d == '\0':
+            ins.seek(-1, 1)
+        return output, address
+
     def parse_variable(self, ins, session):
         """Helper function: parse a variable or array element."""
         name = self.parse_scalar(ins)
+        return name, self._parse_indices(ins, session)
+
+    def _parse_indices(self, ins, session):
+        """Helper function: parse array indices, if any."""
         indices = []
         if util.skip_white_read_if(ins, ('[', '(')):
             # it's an array, read indices
@@ -402,12 +445,15 @@ class Parser(object):
                 if not util.skip_white_read_if(ins, (',',)):
                     break
             util.require_read(ins, (']', ')'))
-        return name, indices
+        return indices
 
     def parse_scalar(self, ins, allow_empty=False, err=error.STX):
         """Get variable name from token stream."""
-        # append type specifier
-        name = self.session.memory.complete_name(util.read_name(ins, allow_empty, err))
+        return self._complete_name(util.read_name(ins, allow_empty, err))
+
+    def _complete_name(self, name):
+        """Append type specifier and truncate a variable name."""
+        name = self.session.memory.complete_name(name)
         # only the first 40 chars are relevant in GW-BASIC, rest is discarded
         if len(name) > 41:
             name = name[:40]+name[-1]
@@ -432,6 +478,23 @@ class Parser(object):
 
     def parse_expression(self, ins, session, allow_empty=False):
         """Compute the value of the expression at the current code pointer."""
+        if ins is not self.program_code:
+            return self._parse_expression(ins, allow_empty)
+        # expressions in the stored program are compiled on first evaluation
+        start = ins.tell()
+        try:
+            endpos, steps = self.expression_cache[start]
+        except KeyError:
+            steps = []
+            value = self._parse_expression(ins, allow_empty, steps)
+            if steps:
+                self.expression_cache[start] = ins.tell(), steps
+            return value
+        return self._replay_expression(ins, endpos, steps)
+
+    def _parse_expression(self, ins, allow_empty=False, steps=None):
+        """Compute the value of the expression at the current code pointer.
+            If a steps list is given, record the evaluation as postfix steps."""
         stack = deque()
         units = deque()
         d = ''
@@ -465,46 +528,74 @@ class Parser(object):
                     if d not in op.operators:
                         # illegal combined ops like == raise syntax error
                         raise error.RunError(error.STX)
-                    self._evaluate_stack(stack, units, op.precedence[d], error.STX)
+                    self._evaluate_stack(ins, stack, units, op.precedence[d], error.STX, steps)
                 stack.append((d, nargs))
             elif not (last in op.operators or last == ''):
                 # repeated unit ends expression
                 # repeated literals or variables or non-keywords like 'AS'
                 break
-            elif d == '(':
-                units.append(self.parse_bracket(ins, session))
             elif d and d in string.ascii_letters:
                 # variable name
-                name, indices = self.parse_variable(ins, session)
-                units.append(self.session.memory.get_variable(name, indices))
-            elif d in self.functions.functions:
-                # apply functions
-                ins.read(len(d))
-                try:
-                    units.append(self.functions.functions[d](ins))
-                except (ValueError, ArithmeticError) as e:
-                    units.append(self._handle_math_error(e))
+                pos = ins.tell()
+                name = util.read_name(ins)
+                indices = self._parse_indices(ins, self.session)
+                units.append(self.session.memory.get_variable(self._complete_name(name), indices))
+                if steps is not None:
+                    # name is completed on replay as DEFtype may change
+                    steps.append((_UNIT, (pos, d), None) if indices else (_SCALAR, name, None))
+            elif d == '(' or d in self.functions.functions:
+                # bracketed expressions and functions
+                pos = ins.tell()
+                units.append(self._parse_unit(ins, d))
+                if steps is not None:
+                    steps.append((_UNIT, (pos, d), None))
             elif d in tk.end_statement:
                 break
             elif d in tk.end_expression:
                 # missing operand inside brackets or before comma is syntax error
                 missing_error = error.STX
                 break
+            elif d == '"':
+                # string literal
+                output, address = self._read_string_literal(ins)
+                units.append(self.session.strings.store(output, address))
+                if steps is not None:
+                    steps.append((_STRING, (output, address), ins.tell()))
             else:
-                # literal
-                units.append(self.parse_literal(ins, session))
+                # number literal
+                units.append(self.parse_literal(ins, self.session))
+                if steps is not None:
+                    if op.is_unboxable(units[-1]):
+                        steps.append((_LITERAL, op.unbox(units[-1]), None))
+                    else:
+                        steps.append((_LITERAL, (units[-1][0], units[-1][1][:]), None))
         # empty expression is a syntax error (inside brackets)
         # or Missing Operand (in an assignment)
         # or not an error (in print and many functions)
         if units or stack:
-            self._evaluate_stack(stack, units, 0, missing_error)
+            self._evaluate_stack(ins, stack, units, 0, missing_error, steps)
             return units[0]
         elif allow_empty:
             return None
         else:
             raise error.RunError(missing_error)
 
-    def _evaluate_stack(self, stack, units, precedence, missing_err):
+    def _parse_unit(self, ins, d):
+        """Compute the value of the bracket, function or array element at the code pointer."""
+        if d == '(':
+            return self.parse_bracket(ins, self.session)
+        elif d in self.functions.functions:
+            # apply functions
+            ins.read(len(d))
+            try:
+                return self.functions.functions[d](ins)
+            except (ValueError, ArithmeticError) as e:
+                return self._handle_math_error(e)
+        else:
+            name, indices = self.parse_variable(ins, self.session)
+            return self.session.memory.get_variable(name, indices)
+
+    def _evaluate_stack(self, ins, stack, units, precedence, missing_err, steps=None):
         """Drain evaluation stack until an operator of low precedence on top."""
         while stack:
             if precedence > op.precedence[stack[-1][0]]:
@@ -522,6 +613,50 @@ class Parser(object):
                 raise error.RunError(missing_err)
             except (ValueError, ArithmeticError) as e:
                 units.append(self._handle_math_error(e))
+            if steps is not None:
+                # keep the code pointer so that errors are raised at the same position
+                steps.append((_UNARY if narity == 1 else _BINARY, oper, ins.tell()))
+
+    def _replay_expression(self, ins, endpos, steps):
+        """Compute the value of a compiled expression."""
+        units = []
+        try:
+            for step, arg, pos in steps:
+                if step == _SCALAR:
+                    units.append(self.session.memory.get_variable(self._complete_name(arg), []))
+                elif step == _LITERAL:
+                    # unboxed numbers are modified in place by operators
+                    if isinstance(arg, fp.Float):
+                        units.append(arg.copy())
+                    elif isinstance(arg, tuple):
+                        units.append((arg[0], arg[1][:]))
+                    else:
+                        units.append(arg)
+                elif step == _BINARY:
+                    # intermediate results are kept unboxed
+                    right = units.pop()
+                    left = units.pop()
+                    try:
+                        units.append(self.operators.unboxed_binary[arg](left, right))
+                    except (ValueError, ArithmeticError) as e:
+                        units.append(self._handle_math_error(e))
+                elif step == _UNARY:
+                    try:
+                        units.append(self.operators.unboxed_unary[arg](units.pop()))
+                    except (ValueError, ArithmeticError) as e:
+                        units.append(self._handle_math_error(e))
+                elif step == _STRING:
+                    units.append(self.session.strings.store(*arg))
+                else:
+                    # brackets, functions and arrays are parsed from the code stream
+                    ins.seek(arg[0])
+                    units.append(self._parse_unit(ins, arg[1]))
+        except Exception:
+            if pos is not None:
+                ins.seek(pos)
+            raise
+        ins.seek(endpos)
+        return op.box(units[0])
 
     def _handle_math_error(self, e):
         """Handle Overflow or Division by Zero."""
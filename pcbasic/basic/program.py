@@ -7,6 +7,7 @@ This file is released under the GNU GPL version 3 or later.
 """
 
 import logging
+import bisect
 
 try:
     from cStringIO import StringIO
@@ -27,6 +28,12 @@ class Program(object):
         """Initialise program."""
         # program bytecode buffer
         self.bytecode = StringIO()
+        # pre-decoded statements, keyed by bytecode offset
+        self.statement_cache = {}
+        # FOR/NEXT, WHILE/WEND and IF/ELSE jump targets, keyed by token and offset
+        self.jump_table = {}
+        # compiled expressions, keyed by bytecode offset
+        self.expression_cache = {}
         self.erase()
         self.max_list_line = max_list_line
         self.allow_protect = allow_protect
@@ -51,6 +58,15 @@ class Program(object):
         self.protected = False
         self.line_numbers = { 65536: 0 }
         self.last_stored = None
+        self.invalidate_cache()
+
+    def invalidate_cache(self):
+        """Discard decoded code after the bytecode has changed."""
+        self.statement_cache.clear()
+        self.jump_table.clear()
+        self.expression_cache.clear()
+        # sorted position index for get_line_number, rebuilt on next lookup
+        self._line_index = None
 
     def truncate(self, rest=''):
         """Write bytecode and cut the program of beyond the current position."""
@@ -60,12 +76,26 @@ class Program(object):
 
     def get_line_number(self, pos):
         """Get line number for stream position."""
+        if self._line_index is None:
+            self._build_line_index()
+        positions, line_numbers = self._line_index
+        # find the last line starting at or before pos
+        index = bisect.bisect_right(positions, pos)
+        if index == 0:
+            return -1
+        return line_numbers[index-1]
+
+    def _build_line_index(self):
+        """Build sorted index of line positions for get_line_number."""
+        by_position = sorted((pos, linum) for linum, pos in self.line_numbers.iteritems())
+        positions, line_numbers = [], []
+        # keep the highest line number found at or before each position
         pre = -1
-        for linum in self.line_numbers:
-            linum_pos = self.line_numbers[linum]
-            if linum_pos <= pos and linum > pre:
-                pre = linum
-        return pre
+        for pos, linum in by_position:
+            pre = max(pre, linum)
+            positions.append(pos)
+            line_numbers.append(pre)
+        self._line_index = positions, line_numbers
 
     def rebuild_line_dict(self):
         """Preparse to build line number dictionary."""
@@ -95,6 +125,7 @@ class Program(object):
             last = pos
         # ensure program is properly sealed - last offset must be 00 00. keep, but ignore, anything after.
         self.bytecode.write('\0\0\0')
+        self.invalidate_cache()
 
     def update_line_dict(self, pos, afterpos, length, deleteable, beyond):
         """Update line number dictionary after deleting lines."""
@@ -164,6 +195,7 @@ class Program(object):
         if not empty:
             self.line_numbers[scanline] = pos
         self.last_stored = scanline
+        self.invalidate_cache()
 
     def find_pos_line_dict(self, fromline, toline):
         """Find code positions for line range."""
@@ -193,6 +225,7 @@ class Program(object):
         self.truncate(rest)
         # update line number dict
         self.update_line_dict(startpos, afterpos, 0, deleteable, beyond)
+        self.invalidate_cache()
 
     def edit(self, screen, from_line, bytepos=None):
         """Output program line to console and position cursor."""
@@ -277,6 +310,7 @@ class Program(object):
             new_lines[old_to_new[old_line]] = self.line_numbers[old_line]
             del self.line_numbers[old_line]
         self.line_numbers.update(new_lines)
+        self.invalidate_cache()
         return old_to_new
 
     def load(self, g, rebuild_dict=True):
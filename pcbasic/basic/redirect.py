@@ -24,18 +24,21 @@ def get_redirection(codepage, stdio, input_file, output_file, append):
     else:
         stdout_stream, stdin_stream = None, None
     output_redirection = OutputRedirection(output_file, append, stdout_stream)
-    input_stream = None
-    if input_file:
-        try:
-            input_stream = open(input_file, b'rb')
-        except EnvironmentError as e:
-            logging.warning(u'Could not open input file %s: %s', input_file, e.strerror)
     input_redirection = InputRedirection(
-            [(input_stream, False, None),
+            [(open_input_file(input_file), False, None),
             (stdin_stream, platform.system() != 'Windows' and sys.stdin.isatty(), sys.stdin.encoding)],
             codepage)
     return input_redirection, output_redirection
 
+def open_input_file(input_file):
+    """Open a file for input redirection; return None if not given or not found."""
+    if input_file:
+        try:
+            return open(input_file, b'rb')
+        except EnvironmentError as e:
+            logging.warning(u'Could not open input file %s: %s', input_file, e.strerror)
+    return None
+
 
 class OutputRedirection(object):
     """Manage I/O redirection."""
@@ -44,14 +47,24 @@ class OutputRedirection(object):
         """Initialise redirects."""
         # redirect output to file or printer
         self._output_echos = []
+        self._output_file = None
         # filter interface depends on redirection output
         if filter_stream:
             self._output_echos.append(filter_stream)
+        self.set_output(option_output, append)
+
+    def set_output(self, option_output, append=False):
+        """Close the current output file, if any, and redirect to a new one."""
+        if self._output_file:
+            self._output_echos.remove(self._output_file)
+            self._output_file.close()
+            self._output_file = None
         if option_output:
             mode = b'ab' if append else b'wb'
             try:
                 # raw codepage output to file
-                self._output_echos.append(open(option_output, mode))
+                self._output_file = open(option_output, mode)
+                self._output_echos.append(self._output_file)
             except EnvironmentError as e:
                 logging.warning(u'Could not open output file %s: %s', option_output, e.strerror)
 
@@ -107,7 +120,7 @@ class InputRedirection(object):
 
     def __getstate__(self):
         """Pickler."""
-        pickle_dict = self.__dict__
+        pickle_dict = self.__dict__.copy()
         # don't pickle the queues
         del pickle_dict['_sources']
         del pickle_dict['_closed']
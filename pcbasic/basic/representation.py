@@ -7,6 +7,7 @@ This file is released under the GNU GPL version 3 or later.
 """
 
 import string
+import re
 
 try:
     from cStringIO import StringIO
@@ -101,21 +102,43 @@ def just_under(n_in):
     # decrease mantissa by one
     return n_in.__class__(n_in.neg, n_in.man - 0x100, n_in.exp)
 
+# powers of ten, by float class and exponent
+_powers_of_ten = {}
+# successive multiplications of ten by ten, by float class
+_decades = {}
+
+def power_of_ten(cls, exp10):
+    """Return pow_int(cls.ten, exp10) from a table; do not modify the result."""
+    try:
+        return _powers_of_ten[cls, exp10]
+    except KeyError:
+        return _powers_of_ten.setdefault((cls, exp10), pow_int(cls.ten, exp10))
+
+def decade(cls, exp10):
+    """Return ten multiplied by ten exp10-1 times from a table; do not modify the result."""
+    table = _decades.setdefault(cls, [None, cls.ten.copy()])
+    while len(table) <= exp10:
+        table.append(table[-1].copy().imul10())
+    return table[exp10]
+
 def get_digits(num, digits, remove_trailing=True):
     """Get the digits for an int."""
-    pow10 = 10L**(digits-1)
-    digitstr = ''
-    while pow10 >= 1:
-        digit = ord('0')
-        while num >= pow10:
-            digit += 1
-            num -= pow10
-        digitstr += chr(digit)
-        pow10 /= 10
-    if remove_trailing:
+    if digits > 0 and 0 <= num < 10L**digits:
+        digitstr = str(num).zfill(digits)
+    else:
+        # out of range digits are represented by the characters following '9'
+        pow10 = 10L**(digits-1)
+        digitstr = ''
+        while pow10 >= 1:
+            digit = ord('0')
+            while num >= pow10:
+                digit += 1
+                num -= pow10
+            digitstr += chr(digit)
+            pow10 /= 10
+    if remove_trailing and digitstr:
         # remove trailing zeros
-        while len(digitstr)>1 and digitstr[-1] == '0':
-            digitstr = digitstr[:-1]
+        digitstr = digitstr.rstrip('0') or '0'
     return digitstr
 
 def scientific_notation(digitstr, exp10, exp_sign='E', digits_to_dot=1, force_dot=False):
@@ -257,7 +280,7 @@ def format_float_scientific(expr, digits_before, decimals, force_dot):
     else:
         if work_digits > 0:
             # scientific representation
-            lim_bot = just_under(pow_int(expr.ten, work_digits-1))
+            lim_bot = just_under(power_of_ten(expr.__class__, work_digits-1))
         else:
             # special case when work_digits == 0, see also below
             # setting to 0.1 results in incorrect rounding (why?)
@@ -276,19 +299,20 @@ def format_float_scientific(expr, digits_before, decimals, force_dot):
 
 def format_float_fixed(expr, decimals, force_dot):
     """Put a float in fixed-point representation."""
-    unrounded = mul(expr, pow_int(expr.ten, decimals)) # expr * 10**decimals
+    cls = expr.__class__
+    unrounded = mul(expr, power_of_ten(cls, decimals)) # expr * 10**decimals
     num = unrounded.copy().iround()
     # find exponent
     exp10 = 1
-    pow10 = pow_int(expr.ten, exp10) # pow10 = 10L**exp10
+    pow10 = decade(cls, exp10) # pow10 = 10L**exp10
     while num.gt(pow10) or num.equals(pow10): # while pow10 <= num:
-        pow10.imul10() # pow10 *= 10
         exp10 += 1
+        pow10 = decade(cls, exp10) # pow10 *= 10
     work_digits = exp10 + 1
     diff = 0
     if exp10 > expr.digits:
         diff = exp10 - expr.digits
-        num = div(unrounded, pow_int(expr.ten, diff)).iround()  # unrounded / 10**diff
+        num = div(unrounded, power_of_ten(cls, diff)).iround()  # unrounded / 10**diff
         work_digits -= diff
     num = num.trunc_to_int()
     # argument work_digits-1 means we're getting work_digits==exp10+1-diff digits
@@ -299,8 +323,27 @@ def format_float_fixed(expr, decimals, force_dot):
 
 ##################################
 
+# decimal number without whitespace, in parts
+_decimal_parts = re.compile(r'([+-]?)([0-9]*)(?:\.([0-9]*))?(?:([DEde])([+-]?)([0-9]*)|([!#]))?\Z')
+
 def str_to_float(s, allow_nonnum = True):
     """Return Float value for Python string."""
+    match = _decimal_parts.match(s)
+    if match:
+        # fast path: convert the digits in one go
+        sign, whole, fraction, exp_char, exp_sign, exponent, type_char = match.groups()
+        fraction = fraction or ''
+        mantissa = int(whole + fraction or '0')
+        exp10 = -len(fraction)
+        if exponent:
+            exp10 += -int(exponent) if exp_sign == '-' else int(exponent)
+        # keep track of precision digits: leading zeros and trailing decimal zeros don't count
+        significant = (whole + fraction).lstrip('0')
+        digits = len(significant)
+        zeros = len(fraction) - len(fraction.rstrip('0')) if significant else 0
+        is_double = exp_char in ('D', 'd') or type_char == '#'
+        is_single = type_char == '!'
+        return _decimal_to_float(sign == '-', mantissa, exp10, digits, zeros, is_double, is_single)
     found_sign, found_point, found_exp = False, False, False
     found_exp_sign, exp_neg, neg = False, False, False
     exp10, exponent, mantissa, digits, zeros = 0, 0, 0, 0, 0
@@ -368,15 +411,20 @@ def str_to_float(s, allow_nonnum = True):
         exp10 -= exponent
     else:
         exp10 += exponent
+    return _decimal_to_float(neg, mantissa, exp10, digits, zeros, is_double, is_single)
+
+def _decimal_to_float(neg, mantissa, exp10, digits, zeros, is_double, is_single):
+    """Convert parsed decimal number to Float."""
     # eight or more digits means double, unless single override
     if digits - zeros > 7 and not is_single:
         is_double = True
     cls = Double if is_double else Single
     mbf = cls(neg, mantissa * 0x100, cls.bias).normalise()
-    while (exp10 < 0):
+    # once underflowed to zero, further scaling leaves it at zero
+    while (exp10 < 0) and not mbf.is_zero():
         mbf.idiv10()
         exp10 += 1
-    while (exp10 > 0):
+    while (exp10 > 0) and not mbf.is_zero():
         mbf.imul10()
         exp10 -= 1
     mbf.normalise()
@@ -552,8 +600,20 @@ def parse_value(ins):
         return ('#', val)
     return None
 
+# plain decimal number with surrounding whitespace
+_plain_number = re.compile(r'[ \n]*([+-]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[DEde][+-]?[0-9]+|[!#])?)[ \t\n]*\Z')
+
 def str_to_number(strval, allow_nonnum=True):
     """Convert Python str to BASIC value."""
+    match = _plain_number.match(strval)
+    if match:
+        # fast path, gives the same results as tokenising
+        word = match.group(1)
+        if not (word[-1] in '!#' or '.' in word or 'E' in word.upper() or 'D' in word.upper()):
+            value = int(word)
+            if -0x8000 <= value <= 0x7fff:
+                return vartypes.int_to_integer_signed(value)
+        return fp.pack(str_to_float(word))
     ins = StringIO(strval)
     outs = StringIO()
     # skip spaces and line feeds (but not NUL).
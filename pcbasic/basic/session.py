@@ -27,7 +27,6 @@ from . import inputs
 from . import debug
 from . import rnd
 from . import clock
-from . import shell
 from . import memory
 from . import machine
 from . import parser
@@ -60,8 +59,11 @@ class Session(object):
             max_list_line=65535, allow_protect=False,
             allow_code_poke=False, max_memory=65534,
             max_reclen=128, max_files=3, reserved_memory=3429,
-            temp_dir=u''):
+            temp_dir=u'', cache_dir=u'', option_profile=u'', option_counters=u'',
+            option_startup_report=u''):
         """Initialise the interpreter session."""
+        # record of initialised subsystems; written on close if a file is given
+        self.startup = debug.StartupReport(option_startup_report)
         # use dummy queues if not provided
         if iface:
             self.input_queue, self.video_queue, self.audio_queue = iface.get_queues()
@@ -69,6 +71,8 @@ class Session(object):
             self.input_queue = signals.NullQueue()
             self.video_queue = signals.NullQueue()
             self.audio_queue = signals.NullQueue()
+        # hot-path counters; enabled if a dump file is given
+        self.counters = debug.Counters(self, option_counters)
         # true if a prompt is needed on next cycle
         self._prompt = True
         # input mode is AUTO (used by AUTO)
@@ -79,17 +83,22 @@ class Session(object):
         self.input_mode = False
         # syntax error prompt and EDIT
         self.edit_prompt = False
+        # error number and line number of the last error message shown
+        self.last_error = None
         ######################################################################
         # prepare codepage
-        self.codepage = unicodepage.Codepage(codepage, box_protect)
+        self.codepage = unicodepage.Codepage(codepage, box_protect, cache_dir)
+        self.startup.checkpoint('codepage')
         # prepare I/O redirection
         self.input_redirection, self.output_redirection = redirect.get_redirection(
                 self.codepage, stdio, input_file, output_file, append)
+        self.startup.checkpoint('redirection')
         # prepare tokeniser
         self.tokeniser = tokenise.Tokeniser(syntax, option_debug)
         # initialise the program
         self.program = program.Program(self.tokeniser,
                 max_list_line, allow_protect, allow_code_poke)
+        self.startup.checkpoint('program')
         # function key macros
         self.fkey_macros = editor.FunctionKeyMacros(12 if syntax == 'tandy' else 10)
         # set up event handlers
@@ -97,13 +106,15 @@ class Session(object):
         # initialise sound queue
         # needs Session for wait() and queues only
         self.sound = sound.Sound(self, syntax)
+        self.startup.checkpoint('sound')
         # Sound is needed for the beeps on \a
         # Session is only for queues and wait() in Graphics (flood fill)
         self.screen = display.Screen(self, text_width,
                 video_memory, video_capabilities, monitor,
                 self.sound, self.output_redirection, self.fkey_macros,
                 cga_low, mono_tint, screen_aspect,
-                self.codepage, font, warn_fonts=option_debug)
+                self.codepage, font, warn_fonts=option_debug, cache_dir=cache_dir)
+        self.startup.checkpoint('screen')
         # prepare input methods
         self.pen = inputs.Pen(self.screen)
         self.stick = inputs.Stick()
@@ -113,10 +124,11 @@ class Session(object):
         self.keyboard = inputs.Keyboard(self.events, self.screen, self.fkey_macros,
                 self.codepage, self.sound,
                 keystring, ignore_caps, ctrl_c_is_break)
+        self.startup.checkpoint('keyboard')
         # set up variables and memory model state
         # initialise the data segment
         self.memory = memory.DataSegment(self.program, max_memory,
-                                        reserved_memory, max_reclen, max_files)
+                                        reserved_memory, max_reclen, max_files, self.counters)
         self.program.set_address(self.memory.code_start)
         #D
         # these should not be reassigned by DataSegment
@@ -127,6 +139,7 @@ class Session(object):
         self.common_scalars = set()
         self.common_arrays = set()
         self.user_functions = {}
+        self.startup.checkpoint('memory')
         # intialise devices and files
         # DataSegment needed for COMn and disk FIELD buffers
         # Events needed for wait()
@@ -134,10 +147,11 @@ class Session(object):
                 self.events, self.memory.fields, self.screen, self.keyboard,
                 device_params, current_device, mount_dict,
                 print_trigger, temp_dir, serial_buffer_size,
-                utf8, universal)
-        self.files = files.Files(self.devices, max_files)
+                utf8, universal, self.startup)
+        self.files = files.Files(self.devices, max_files, self.counters)
         # set LPT1 as target for print_screen()
-        self.screen.set_print_screen_target(self.devices.lpt1_file)
+        self.screen.set_print_screen_target(self.devices)
+        self.startup.checkpoint('devices')
         # set up rest of memory model
         self.all_memory = machine.Memory(self.memory, self.devices,
                             self.screen, self.keyboard, self.screen.fonts[8],
@@ -145,9 +159,11 @@ class Session(object):
         # initialise the editor
         self.editor = editor.Editor(
                 self.screen, self.keyboard, self.sound,
-                self.output_redirection, self.devices.lpt1_file)
-        # set up the SHELL command
-        self.shell = shell.get_shell_manager(self.keyboard, self.screen, self.codepage, option_shell)
+                self.output_redirection, self.devices)
+        self.startup.checkpoint('editor')
+        # set up the SHELL command on first use
+        self._option_shell = option_shell
+        self._shell = None
         # initialise random number generator
         self.randomiser = rnd.RandomNumberGenerator()
         # initialise system clock
@@ -162,11 +178,25 @@ class Session(object):
         self.events.reset()
         self.parser = parser.Parser(self, syntax, pcjr_term, double)
         self.parser.set_pointer(False, 0)
+        self.startup.checkpoint('parser')
         # set up debugger
         if option_debug:
             self.debugger = debug.Debugger(self)
         else:
             self.debugger = debug.BaseDebugger(self)
+        # set up profiler; starts if a report file is given
+        self.profiler = debug.Profiler(self, option_profile)
+        self.startup.checkpoint('debugger')
+
+    @property
+    def shell(self):
+        """SHELL command manager, initialised on first use."""
+        if self._shell is None:
+            from . import shell
+            with self.startup.timed('shell'):
+                self._shell = shell.get_shell_manager(
+                        self.keyboard, self.screen, self.codepage, self._option_shell)
+        return self._shell
 
     def __enter__(self):
         """Context guard."""
@@ -202,6 +232,9 @@ class Session(object):
             self.screen.rebuild()
             # rebuild audio queues
             self.sound.rebuild()
+        # wrap the new video queue
+        self.counters.attach()
+        self.profiler.attach()
         return self
 
     def load_program(self, prog, rebuild_dict=True):
@@ -220,6 +253,26 @@ class Session(object):
                         mode='O') as progfile:
                 self.program.save(progfile)
 
+    def set_redirection(self, input_file=None, output_file=None, append=False):
+        """Redirect input and output to new files, closing the current ones."""
+        self.input_redirection = redirect.InputRedirection(
+                [(redirect.open_input_file(input_file), False, None)], self.codepage)
+        self.output_redirection.set_output(output_file, append)
+        self.keyboard.open_input()
+
+    def reset(self):
+        """Stop any running program, clear it as NEW does and close all files."""
+        self._set_parse_mode(False)
+        self.input_mode = False
+        self.edit_prompt = False
+        self.last_error = None
+        self._prompt = True
+        self.parser.tron = False
+        self.program.erase()
+        self.parser.clear_stacks_and_pointers()
+        self.clear(close_files=True)
+        self.parser.set_pointer(False, 0)
+
     def execute(self, command):
         """Execute a BASIC statement."""
         for cmd in command.splitlines():
@@ -266,8 +319,17 @@ class Session(object):
             except error.Exit:
                 break
 
+    def get_counters(self):
+        """Get a dictionary of hot-path counter values."""
+        return dict(self.counters.counts)
+
     def close(self):
         """Close the session."""
+        # write profile report and counters if requested
+        self.profiler.close()
+        self.counters.close()
+        self.startup.close()
+        self.screen.batch.flush()
         # close files if we opened any
         self.files.close_all()
         self.devices.close()
@@ -282,10 +344,17 @@ class Session(object):
             last_parse = self._parse_mode
             if self._parse_mode:
                 try:
-                    # may raise Break
-                    self.events.check_events()
-                    # returns True if more statements to parse
-                    if not self.parser.parse_statement():
+                    if self.counters.enabled:
+                        self.counters.count('statements')
+                    if self.profiler.active:
+                        # check events and parse statement, with timings
+                        more = self.profiler.step()
+                    else:
+                        # may raise Break
+                        self.events.check_events()
+                        # returns True if more statements to parse
+                        more = self.parser.parse_statement()
+                    if not more:
                         self._parse_mode = False
                 except error.Break as e:
                     # ctrl-break stops foreground and background sound
@@ -390,11 +459,15 @@ class Session(object):
             raise
         except Exception as e:
             self.debugger.bluescreen(e)
+        finally:
+            # show what has been drawn before returning control
+            self.screen.batch.flush()
 
     def _handle_error(self, e):
         """Handle a BASIC error through error message."""
         # not handled by ON ERROR, stop execution
-        self._write_error_message(e.message, self.program.get_line_number(e.pos))
+        self.last_error = e.err, self.program.get_line_number(e.pos)
+        self._write_error_message(e.message, self.last_error[1])
         self._set_parse_mode(False)
         self.input_mode = False
         # special case: syntax error
@@ -103,11 +103,9 @@ VIDEO_SET_PALETTE = 15
 VIDEO_BUILD_GLYPHS = 16
 # put pixel
 VIDEO_PUT_PIXEL = 17
-# put interval
-VIDEO_PUT_INTERVAL = 18
+# fill interval
 VIDEO_FILL_INTERVAL = 19
-# put rect
-VIDEO_PUT_RECT = 20
+# fill rect
 VIDEO_FILL_RECT = 21
 # copy page
 VIDEO_COPY_PAGE = 28
@@ -117,6 +115,12 @@ VIDEO_SET_CAPTION = 29
 VIDEO_SET_CLIPBOARD_TEXT = 30
 # set codepage
 VIDEO_SET_CODEPAGE = 31
+# drawing operations collected over a frame
+VIDEO_BATCH = 32
+# share the pixel page buffers
+VIDEO_SET_PIXEL_PAGES = 33
+# area of a shared pixel page has changed
+VIDEO_REFRESH_RECT = 34
 
 # input queue signals
 # quit interpreter
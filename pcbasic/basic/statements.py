@@ -17,7 +17,6 @@ import string
 
 from . import error
 from . import fp
-from . import ports
 from . import print_and_input
 from . import representation
 from . import basictoken as tk
@@ -1139,6 +1138,7 @@ class Statements(object):
             # not 2^32-1 as the manual boasts!
             # pos-1 needs to fit in a single-precision mantissa
             util.range_check_err(1, 2**25, pos, err=error.BAD_RECORD_NUMBER)
+            from . import ports
             if not isinstance(the_file, ports.COMFile):
                 the_file.set_pos(pos)
             else:
@@ -1342,7 +1342,7 @@ class Statements(object):
                     border = vartypes.pass_int_unpack(bval)
                 if util.skip_white_read_if(ins, (',',)):
                     with self.session.strings:
-                        background_pattern = self.session.strings.copy(vartypes.pass_string(self.parser.parse_expression(ins, self.session), err=error.IFC))
+                        background_pattern = bytearray(self.session.strings.copy(vartypes.pass_string(self.parser.parse_expression(ins, self.session), err=error.IFC)))
                     # only in screen 7,8,9 is this an error (use ega memory as a check)
                     if (pattern and background_pattern[:len(pattern)] == pattern and
                             self.session.screen.mode.mem_start == 0xa000):
@@ -1494,6 +1494,11 @@ class Statements(object):
     def _find_next(self, ins, varname):
         """Helper function for FOR: find the right NEXT."""
         current = ins.tell()
+        # NEXT positions in the stored program are only searched for once
+        key = (tk.FOR, current, varname)
+        in_program = ins is self.parser.program_code
+        if in_program and key in self.parser.jump_table:
+            return self.parser.jump_table[key]
         self._skip_to_next(ins, tk.FOR, tk.NEXT, allow_comma=True)
         if util.skip_white(ins) not in (tk.NEXT, ','):
             # FOR without NEXT marked with FOR line number
@@ -1511,6 +1516,8 @@ class Statements(object):
             # NEXT without FOR marked with NEXT line number, while we're only at FOR
             raise error.RunError(error.NEXT_WITHOUT_FOR)
         ins.seek(current)
+        if in_program:
+            self.parser.jump_table[key] = nextpos
         return nextpos
 
     def exec_next(self, ins):
@@ -1570,27 +1577,43 @@ class Statements(object):
             if util.skip_white(ins) in (tk.T_UINT,):
                 self.parser.jump(util.parse_jumpnum(ins))
             # continue parsing as normal, :ELSE will be ignored anyway
-        else:
-            # FALSE: find ELSE block or end of line; ELSEs are nesting on the line
-            nesting_level = 0
-            while True:
-                d = util.skip_to_read(ins, tk.end_statement + (tk.IF,))
-                if d == tk.IF:
-                    # nexting step on IF. (it's less convenient to count THENs because they could be THEN, GOTO or THEN GOTO.)
-                    nesting_level += 1
-                elif d == ':':
-                    if util.skip_white_read_if(ins, tk.ELSE): # :ELSE is ELSE; may be whitespace in between. no : means it's ignored.
-                        if nesting_level > 0:
-                            nesting_level -= 1
-                        else:
-                            # line number: jump
-                            if util.skip_white(ins) in (tk.T_UINT,):
-                                self.parser.jump(util.parse_jumpnum(ins))
-                            # continue execution from here
-                            break
-                else:
-                    ins.seek(-len(d), 1)
-                    break
+        elif self._skip_to_else(ins):
+            # FALSE: continue after ELSE. line number: jump
+            if util.skip_white(ins) in (tk.T_UINT,):
+                self.parser.jump(util.parse_jumpnum(ins))
+            # continue execution from here
+
+    def _skip_to_else(self, ins):
+        """Helper function for IF: skip to matching ELSE or end of line.
+            Return True if an ELSE was found."""
+        # ELSE positions in the stored program are only searched for once
+        key = (tk.ELSE, ins.tell())
+        in_program = ins is self.parser.program_code
+        if in_program and key in self.parser.jump_table:
+            pos, found = self.parser.jump_table[key]
+            ins.seek(pos)
+            return found
+        # ELSEs are nesting on the line
+        nesting_level = 0
+        while True:
+            d = util.skip_to_read(ins, tk.end_statement + (tk.IF,))
+            if d == tk.IF:
+                # nexting step on IF. (it's less convenient to count THENs because they could be THEN, GOTO or THEN GOTO.)
+                nesting_level += 1
+            elif d == ':':
+                if util.skip_white_read_if(ins, tk.ELSE): # :ELSE is ELSE; may be whitespace in between. no : means it's ignored.
+                    if nesting_level > 0:
+                        nesting_level -= 1
+                    else:
+                        found = True
+                        break
+            else:
+                ins.seek(-len(d), 1)
+                found = False
+                break
+        if in_program:
+            self.parser.jump_table[key] = ins.tell(), found
+        return found
 
     def exec_else(self, ins):
         """ELSE: part of branch statement; ignore."""
@@ -1603,16 +1626,22 @@ class Statements(object):
         whilepos = ins.tell()
         # evaluate the 'boolean' expression
         # use double to avoid overflows
-        # find matching WEND
-        self._skip_to_next(ins, tk.WHILE, tk.WEND)
-        if ins.read(1) == tk.WEND:
+        # find matching WEND; WEND positions in the stored program are only searched for once
+        key = (tk.WHILE, whilepos)
+        in_program = ins is self.parser.program_code
+        if in_program and key in self.parser.jump_table:
+            wendpos = self.parser.jump_table[key]
+        else:
+            self._skip_to_next(ins, tk.WHILE, tk.WEND)
+            if ins.read(1) != tk.WEND:
+                # WHILE without WEND
+                ins.seek(whilepos)
+                raise error.RunError(error.WHILE_WITHOUT_WEND)
             util.skip_to(ins, tk.end_statement)
             wendpos = ins.tell()
-            self.parser.while_stack.append((whilepos, wendpos))
-        else:
-            # WHILE without WEND
-            ins.seek(whilepos)
-            raise error.RunError(error.WHILE_WITHOUT_WEND)
+            if in_program:
+                self.parser.jump_table[key] = wendpos
+        self.parser.while_stack.append((whilepos, wendpos))
         self._check_while_condition(ins, whilepos)
         util.require(ins, tk.end_statement)
 
@@ -0,0 +1,61 @@
+"""
+PC-BASIC - tablecache.py
+Cache for compiled font and codepage tables
+
+(c) 2016 Rob Hagemans
+This file is released under the GNU GPL version 3 or later.
+"""
+
+import os
+import sys
+import zlib
+import logging
+import hashlib
+import marshal
+
+
+def checksum(resource):
+    """Cheap checksum to detect changes in a resource file."""
+    if resource is None:
+        return b''
+    return b'%d:%08x' % (len(resource), zlib.adler32(resource) & 0xffffffff)
+
+
+class TableCache(object):
+    """Compiled table, stored under a hash of its inputs."""
+
+    def __init__(self, cache_dir, prefix, *key_parts):
+        """Determine the cache file for the given inputs; key parts are byte strings."""
+        self._name = None
+        if not cache_dir:
+            return
+        key = hashlib.sha1(b'%s %d' % (sys.version[:3], marshal.version))
+        for part in key_parts:
+            key.update(b'\0' + part)
+        self._name = os.path.join(cache_dir, u'%s_%s.bin' % (prefix, key.hexdigest()))
+
+    def load(self):
+        """Read the table, or return None if not cached."""
+        if not self._name:
+            return None
+        try:
+            with open(self._name, b'rb') as f:
+                return marshal.loads(f.read())
+        except (EnvironmentError, EOFError, ValueError, TypeError):
+            return None
+
+    def save(self, table):
+        """Write the table to the cache."""
+        if not self._name:
+            return
+        try:
+            cache_dir = os.path.dirname(self._name)
+            if not os.path.isdir(cache_dir):
+                os.makedirs(cache_dir)
+            # other processes may be writing the same file
+            temp_name = u'%s.%d.tmp' % (self._name, os.getpid())
+            with open(temp_name, b'wb') as f:
+                f.write(marshal.dumps(table))
+            os.rename(temp_name, self._name)
+        except EnvironmentError as e:
+            logging.debug(u'Could not write cache file %s: %s', self._name, e)
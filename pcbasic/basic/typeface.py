@@ -15,30 +15,47 @@ except ImportError:
     numpy = None
 
 from . import font
+from . import tablecache
 
 
-def load_fonts(font_families, heights_needed, unicode_needed, substitutes, warn=False):
+def load_fonts(font_families, heights_needed, unicode_needed, substitutes, warn=False, cache_dir=u''):
     """Load font typefaces."""
     fonts = {}
     if 9 in heights_needed:
         # 9-pixel font is same as 8-pixel font
         heights_needed -= set([9])
         heights_needed |= set([8])
+    # font files and their checksums by height
+    hex_files = {16: font.read_files(font_families, 16)}
+    checksums = {16: [tablecache.checksum(hexres) for hexres in hex_files[16]]}
     # load fonts, height-16 first
     for height in reversed(sorted(heights_needed)):
+        if height not in hex_files:
+            hex_files[height] = font.read_files(font_families, height)
+            checksums[height] = [tablecache.checksum(hexres) for hexres in hex_files[height]]
+        # missing code points are taken from the 16-line font
+        cache = tablecache.TableCache(cache_dir, u'font_%02d' % height,
+                b' '.join(checksums[height] + checksums[16]),
+                u'\0'.join(sorted(unicode_needed)).encode('utf-8'),
+                u'\0'.join(sorted(u'%s=%s' % item for item in substitutes.iteritems())).encode('utf-8'))
+        fontdict = cache.load()
+        if fontdict is not None:
+            fonts[height] = Font(height, fontdict)
+            if warn:
+                fonts[height]._warn_missing(unicode_needed)
+            continue
         # load a Unifont .hex font and take the codepage subset
         fonts[height] = Font(height).load_hex(
-                font.read_files(font_families, height),
-                unicode_needed, substitutes, warn=warn)
+                hex_files[height], unicode_needed, substitutes, warn=warn)
         # fix missing code points font based on 16-line font
         try:
             font_16 = fonts[16]
         except KeyError:
             font_16 = Font(16).load_hex(
-                font.read_files(font_families, 16),
-                unicode_needed, substitutes, warn=False)
+                hex_files[16], unicode_needed, substitutes, warn=False)
         if font_16:
             fonts[height].fix_missing(unicode_needed, font_16)
+        cache.save(fonts[height].fontdict)
     if 8 in fonts:
         fonts[9] = fonts[8]
     return fonts
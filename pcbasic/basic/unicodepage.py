@@ -11,6 +11,7 @@ import logging
 import os
 
 from . import codepage
+from . import tablecache
 
 # characters in the printable ASCII range 0x20-0x7E cannot be redefined
 # but can have their glyphs subsituted - they will work and transcode as the
@@ -30,27 +31,40 @@ control = ('\x07', '\x09', '\x0a', '\x0b', '\x0c', '\x0d', '\x1c', '\x1d', '\x1e
 class Codepage(object):
     """Codepage tables."""
 
-    def __init__(self, codepage_name, box_protect=True):
+    def __init__(self, codepage_name, box_protect=True, cache_dir=u''):
         """Load and initialise codepage tables."""
-        # is the current codepage a double-byte codepage?
-        self.dbcs = False
-        # substitutes for printable ascii
-        self.substitutes = {}
-        # load codepage (overrides the above)
-        self.load(codepage_name)
+        # load codepage
+        self.load(codepage_name, cache_dir)
         # protect box drawing sequences under dbcs?
         self.box_protect = box_protect
 
-    def load(self, codepage_name):
-        """Load codepage to Unicode table."""
+    def load(self, codepage_name, cache_dir=u''):
+        """Load codepage to Unicode table, from the cache if available."""
+        resource = codepage.read_file(codepage_name)
+        cache = tablecache.TableCache(cache_dir,
+                u'codepage_%s' % codepage_name, tablecache.checksum(resource))
+        tables = cache.load()
+        if tables is None:
+            tables = self._parse(resource)
+            cache.save(tables)
+        (self.cp_to_unicode, self.unicode_to_cp, self.substitutes,
+            self.lead, self.trail, self.box_left, self.box_right, self.dbcs_num_chars) = tables
+        # is the current codepage a double-byte codepage?
+        self.dbcs = self.dbcs_num_chars > 0
+        return codepage_name
+
+    def _parse(self, resource):
+        """Parse a codepage file into conversion, substitution, DBCS and box-drawing tables."""
+        # substitutes for printable ascii
+        substitutes = {}
         # lead and trail bytes
-        self.lead = set()
-        self.trail = set()
-        self.box_left = [set(), set()]
-        self.box_right = [set(), set()]
-        self.cp_to_unicode = {}
-        self.dbcs_num_chars = 0
-        for line in codepage.read_file(codepage_name).splitlines():
+        lead = set()
+        trail = set()
+        box_left = [set(), set()]
+        box_right = [set(), set()]
+        cp_to_unicode = {}
+        dbcs_num_chars = 0
+        for line in resource.splitlines():
             # ignore empty lines and comment lines (first char is #)
             if (not line) or (line[0] == '#'):
                 continue
@@ -68,32 +82,31 @@ class Codepage(object):
                 if cp_point in printable_ascii and (len(grapheme_cluster) > 1 or ord(grapheme_cluster) != ord(cp_point)):
                     # substitutes is in reverse order: { yen: backslash }
                     ascii_cp = unichr(ord(cp_point))
-                    self.substitutes[grapheme_cluster] = ascii_cp
-                    self.cp_to_unicode[cp_point] = ascii_cp
+                    substitutes[grapheme_cluster] = ascii_cp
+                    cp_to_unicode[cp_point] = ascii_cp
                 else:
-                    self.cp_to_unicode[cp_point] = grapheme_cluster
+                    cp_to_unicode[cp_point] = grapheme_cluster
                 # track lead and trail bytes
                 if len(cp_point) == 2:
-                    self.lead.add(cp_point[0])
-                    self.trail.add(cp_point[1])
-                    self.dbcs_num_chars += 1
+                    lead.add(cp_point[0])
+                    trail.add(cp_point[1])
+                    dbcs_num_chars += 1
                 # track box drawing chars
                 else:
                     for i in (0, 1):
                         if grapheme_cluster in box_left_unicode[i]:
-                            self.box_left[i].add(cp_point[0])
+                            box_left[i].add(cp_point[0])
                         if grapheme_cluster in box_right_unicode[i]:
-                            self.box_right[i].add(cp_point[0])
+                            box_right[i].add(cp_point[0])
             except ValueError:
                 logging.warning('Could not parse line in unicode mapping table: %s', repr(line))
         # fill up any undefined 1-byte codepoints
         for c in range(256):
-            if chr(c) not in self.cp_to_unicode:
-                self.cp_to_unicode[chr(c)] = u'\0'
-        self.unicode_to_cp = dict((reversed(item) for item in self.cp_to_unicode.items()))
-        if self.dbcs_num_chars > 0:
-            self.dbcs = True
-        return codepage_name
+            if chr(c) not in cp_to_unicode:
+                cp_to_unicode[chr(c)] = u'\0'
+        unicode_to_cp = dict((reversed(item) for item in cp_to_unicode.items()))
+        return (cp_to_unicode, unicode_to_cp, substitutes,
+                lead, trail, box_left, box_right, dbcs_num_chars)
 
     def connects(self, c, d, bset):
         """Return True if c and d connect according to box-drawing set bset."""
@@ -0,0 +1,120 @@
+"""
+PC-BASIC - batch.py
+Run a manifest of programs on a pool of interpreter sessions
+
+(c) 2016 Rob Hagemans
+This file is released under the GNU GPL version 3 or later.
+"""
+
+import os
+import sys
+import time
+import shlex
+import logging
+import multiprocessing
+
+from . import basic
+
+
+# return to the start-up screen between jobs
+RESET_SCREEN = b'SCREEN 0, 0, 0, 0: CLS'
+
+# session parameters that are set per job
+REDIRECTION_PARAMS = ('input_file', 'output_file', 'append', 'stdio')
+
+# session reused by all jobs in a worker process
+_session = None
+
+
+def read_manifest(manifest):
+    """Read a list of jobs (program, input file, output file) from a manifest file."""
+    base = os.path.dirname(os.path.abspath(manifest))
+    with open(manifest, b'rb') as f:
+        jobs = [parse_job(line, base) for line in f]
+    return [job for job in jobs if job]
+
+def parse_job(line, base):
+    """Parse a manifest line: program [input [output]]; - means none."""
+    fields = shlex.split(line, comments=True)
+    if not fields:
+        return None
+    return tuple(
+        os.path.join(base, name) if name != b'-' else None
+        for name in (fields + [b'-', b'-'])[:3])
+
+def run_batch(manifest, report, workers, session_params):
+    """Run all jobs in the manifest and write a report."""
+    try:
+        jobs = read_manifest(manifest)
+    except EnvironmentError as e:
+        logging.error(u'Could not read batch manifest %s: %s', manifest, e.strerror)
+        return
+    # redirection is set per job; the workers have no standard i/o
+    for key in REDIRECTION_PARAMS:
+        session_params.pop(key, None)
+    start = time.time()
+    pool = multiprocessing.Pool(
+            workers or None, initializer=_start_worker, initargs=(session_params,))
+    try:
+        results = pool.map(_run_job, jobs, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+    seconds = time.time() - start
+    if report:
+        with open(report, b'wb') as f:
+            write_report(f, results, seconds)
+    else:
+        write_report(sys.stdout, results, seconds)
+
+def write_report(f, results, seconds):
+    """Write a tab-separated report line per job and a summary."""
+    for result in results:
+        f.write(format_result(result))
+    failed = sum(1 for result in results if result[1] != b'ok')
+    f.write(b'# %d jobs, %d failed, %.3f s\n' % (len(results), failed, seconds))
+
+def format_result(result):
+    """Format a job result as a tab-separated report line."""
+    return b'%s\t%s\t%.3f\t%s\n' % result
+
+def _start_worker(session_params):
+    """Create the session for this worker process."""
+    global _session
+    _session = basic.Session(**session_params)
+
+def _run_job(job):
+    """Run a job on the worker's session."""
+    return run_job(_session, job)
+
+def run_job(session, job):
+    """Run a program on a session; return program, status, time and detail."""
+    program, input_file, output_file = job
+    if not os.path.isfile(program):
+        return program, b'missing', 0., b''
+    start = time.time()
+    try:
+        session.reset()
+        session.execute(RESET_SCREEN)
+        # without an input file, INPUT gets end of input rather than waiting
+        session.set_redirection(input_file or os.devnull, output_file)
+        session.load_program(program)
+        session.execute(b'RUN')
+    except basic.Exit:
+        # SYSTEM, or input ran out
+        pass
+    except Exception as e:
+        logging.error(u'Batch job %s failed: %s', program, e)
+        return program, b'exception', time.time() - start, repr(e)
+    finally:
+        # write out files the program left open, as at the end of a standalone run
+        session.files.close_all()
+        session.set_redirection()
+    seconds = time.time() - start
+    # only errors not handled by ON ERROR show a message
+    if session.last_error:
+        err, line = session.last_error
+        if line is None or line < 0 or line >= 65535:
+            return program, b'error', seconds, b'error %d' % err
+        return program, b'error', seconds, b'error %d in %d' % (err, line)
+    return program, b'ok', seconds, b''
@@ -32,14 +32,18 @@ _home_dir = os.path.expanduser(u'~')
 if platform.system() == b'Windows':
     user_config_dir = os.path.join(os.getenv(u'APPDATA'), basename)
     state_path = user_config_dir
+    cache_path = os.path.join(os.getenv(u'LOCALAPPDATA') or os.getenv(u'APPDATA'), basename, u'cache')
 elif platform.system() == b'Darwin':
     user_config_dir = os.path.join(_home_dir, u'Library', u'Application Support', basename)
     state_path = user_config_dir
+    cache_path = os.path.join(_home_dir, u'Library', u'Caches', basename)
 else:
     _xdg_data_home = os.environ.get(u'XDG_DATA_HOME') or os.path.join(_home_dir, u'.local', u'share')
     _xdg_config_home = os.environ.get(u'XDG_CONFIG_HOME') or os.path.join(_home_dir, u'.config')
+    _xdg_cache_home = os.environ.get(u'XDG_CACHE_HOME') or os.path.join(_home_dir, u'.cache')
     user_config_dir = os.path.join(_xdg_config_home, basename)
     state_path = os.path.join(_xdg_data_home, basename)
+    cache_path = os.path.join(_xdg_cache_home, basename)
 
 # @: drive for bundled programs
 program_path = os.path.join(state_path, u'bundled_programs')
@@ -259,6 +263,9 @@ class Settings(object):
         u'load': {u'type': u'string', u'default': u'', },
         u'run': {u'type': u'string', u'default': u'',  },
         u'convert': {u'type': u'string', u'default': u'', },
+        u'batch': {u'type': u'string', u'default': u'', },
+        u'batch-workers': {u'type': u'int', u'default': 0, },
+        u'serve': {u'type': u'string', u'default': u'', },
         u'help': {u'type': u'bool', u'default': False, },
         u'keys': {u'type': u'string', u'default': u'', },
         u'exec': {u'type': u'string', u'list': u'*', u'default': u'',  },
@@ -283,6 +290,9 @@ class Settings(object):
         u'fullscreen': {u'type': u'bool', u'default': False,},
         u'nokill': {u'type': u'bool', u'default': False,},
         u'debug': {u'type': u'bool', u'default': False,},
+        u'profile': {u'type': u'string', u'default': u'',},
+        u'counters': {u'type': u'string', u'default': u'',},
+        u'startup-report': {u'type': u'string', u'default': u'',},
         u'strict-hidden-lines': {u'type': u'bool', u'default': False,},
         u'strict-protect': {u'type': u'bool', u'default': False,},
         u'capture-caps': {u'type': u'bool', u'default': False,},
@@ -308,6 +318,7 @@ class Settings(object):
         u'copy-paste': {u'type': u'string', u'list': 2, u'default': [u'left', u'middle'],
                        u'choices': (u'left', u'middle', u'right', u'none',),},
         u'state': {u'type': u'string', u'default': u'',},
+        u'state-compression': {u'type': u'int', u'default': 1,},
         u'mono-tint': {u'type': u'int', u'list': 3, u'default': [255, 255, 255],},
         u'monitor': {
             u'type': u'string', u'choices': (u'rgb', u'composite', u'mono'),
@@ -442,6 +453,9 @@ class Settings(object):
         return {
             'syntax': self.get('syntax'),
             'option_debug': self.get('debug'),
+            'option_profile': self.get('profile'),
+            'option_counters': self.get('counters'),
+            'option_startup_report': self.get('startup-report'),
             'output_file': self.get(b'output'),
             'append': self.get(b'append'),
             'input_file': self.get(b'input'),
@@ -468,6 +482,8 @@ class Settings(object):
             'mount_dict': mount_dict,
             'print_trigger': self.get('print-trigger'),
             'temp_dir': self._temp_dir,
+            # compiled font and codepage tables
+            'cache_dir': cache_path,
             'serial_buffer_size': self.get('serial-buffer-size'),
             # text file parameters
             'utf8': self.get('utf8'),
@@ -552,6 +568,7 @@ class Settings(object):
             'prog': self.get(0) or self.get('run') or self.get('load'),
             'resume': self.get('resume'),
             'state_file': self.get_state_file(),
+            'state_compression': max(0, min(9, self.get('state-compression'))),
             'commands': commands,
             }
         launch_params.update(self.get_session_parameters())
@@ -633,6 +650,11 @@ class Settings(object):
         name_out = self.get(1)
         return mode, name_in, name_out
 
+    def get_batch_parameters(self):
+        """Get parameters for batch runs."""
+        # the report goes to the output file, if given
+        return self.get('batch'), self.get(b'output'), self.get('batch-workers')
+
     def get_command(self):
         """Get operating mode."""
         if self.get('version'):
@@ -642,6 +664,10 @@ class Settings(object):
             return 'help'
         elif self.get('convert'):
             return 'convert'
+        elif self.get('batch'):
+            return 'batch'
+        elif self.get('serve'):
+            return 'serve'
         return None
 
     def _get_arguments(self, argv):
@@ -140,54 +140,64 @@ class VideoPlugin(object):
             if signal.event_type == signals.VIDEO_QUIT:
                 # close thread after task_done
                 alive = False
-            elif signal.event_type == signals.VIDEO_SET_MODE:
-                self.set_mode(signal.params)
-            elif signal.event_type == signals.VIDEO_PUT_GLYPH:
-                self.put_glyph(*signal.params)
-            elif signal.event_type == signals.VIDEO_CLEAR_ROWS:
-                self.clear_rows(*signal.params)
-            elif signal.event_type == signals.VIDEO_SCROLL_UP:
-                self.scroll_up(*signal.params)
-            elif signal.event_type == signals.VIDEO_SCROLL_DOWN:
-                self.scroll_down(*signal.params)
-            elif signal.event_type == signals.VIDEO_SET_PALETTE:
-                self.set_palette(*signal.params)
-            elif signal.event_type == signals.VIDEO_SET_CURSOR_SHAPE:
-                self.set_cursor_shape(*signal.params)
-            elif signal.event_type == signals.VIDEO_SET_CURSOR_ATTR:
-                self.set_cursor_attr(signal.params)
-            elif signal.event_type == signals.VIDEO_SHOW_CURSOR:
-                self.show_cursor(signal.params)
-            elif signal.event_type == signals.VIDEO_MOVE_CURSOR:
-                self.move_cursor(*signal.params)
-            elif signal.event_type == signals.VIDEO_SET_PAGE:
-                self.set_page(*signal.params)
-            elif signal.event_type == signals.VIDEO_COPY_PAGE:
-                self.copy_page(*signal.params)
-            elif signal.event_type == signals.VIDEO_SET_BORDER_ATTR:
-                self.set_border_attr(signal.params)
-            elif signal.event_type == signals.VIDEO_SET_COLORBURST:
-                self.set_colorburst(*signal.params)
-            elif signal.event_type == signals.VIDEO_BUILD_GLYPHS:
-                self.build_glyphs(signal.params)
-            elif signal.event_type == signals.VIDEO_PUT_PIXEL:
-                self.put_pixel(*signal.params)
-            elif signal.event_type == signals.VIDEO_PUT_INTERVAL:
-                self.put_interval(*signal.params)
-            elif signal.event_type == signals.VIDEO_FILL_INTERVAL:
-                self.fill_interval(*signal.params)
-            elif signal.event_type == signals.VIDEO_PUT_RECT:
-                self.put_rect(*signal.params)
-            elif signal.event_type == signals.VIDEO_FILL_RECT:
-                self.fill_rect(*signal.params)
-            elif signal.event_type == signals.VIDEO_SET_CAPTION:
-                self.set_caption_message(signal.params)
-            elif signal.event_type == signals.VIDEO_SET_CLIPBOARD_TEXT:
-                self.set_clipboard_text(*signal.params)
-            elif signal.event_type == signals.VIDEO_SET_CODEPAGE:
-                self.set_codepage(signal.params)
+            elif signal.event_type == signals.VIDEO_BATCH:
+                # drawing operations collected over a frame
+                for item in signal.params:
+                    self._handle_video_signal(item)
+            else:
+                self._handle_video_signal(signal)
             self.video_queue.task_done()
 
+    def _handle_video_signal(self, signal):
+        """Dispatch a video signal to its handler."""
+        # drawing signals first, as they are the most frequent
+        if signal.event_type == signals.VIDEO_PUT_GLYPH:
+            self.put_glyph(*signal.params)
+        elif signal.event_type == signals.VIDEO_REFRESH_RECT:
+            self.refresh_rect(*signal.params)
+        elif signal.event_type == signals.VIDEO_SET_MODE:
+            self.set_mode(signal.params)
+        elif signal.event_type == signals.VIDEO_CLEAR_ROWS:
+            self.clear_rows(*signal.params)
+        elif signal.event_type == signals.VIDEO_SCROLL_UP:
+            self.scroll_up(*signal.params)
+        elif signal.event_type == signals.VIDEO_SCROLL_DOWN:
+            self.scroll_down(*signal.params)
+        elif signal.event_type == signals.VIDEO_SET_PALETTE:
+            self.set_palette(*signal.params)
+        elif signal.event_type == signals.VIDEO_SET_CURSOR_SHAPE:
+            self.set_cursor_shape(*signal.params)
+        elif signal.event_type == signals.VIDEO_SET_CURSOR_ATTR:
+            self.set_cursor_attr(signal.params)
+        elif signal.event_type == signals.VIDEO_SHOW_CURSOR:
+            self.show_cursor(signal.params)
+        elif signal.event_type == signals.VIDEO_MOVE_CURSOR:
+            self.move_cursor(*signal.params)
+        elif signal.event_type == signals.VIDEO_SET_PAGE:
+            self.set_page(*signal.params)
+        elif signal.event_type == signals.VIDEO_COPY_PAGE:
+            self.copy_page(*signal.params)
+        elif signal.event_type == signals.VIDEO_SET_BORDER_ATTR:
+            self.set_border_attr(signal.params)
+        elif signal.event_type == signals.VIDEO_SET_COLORBURST:
+            self.set_colorburst(*signal.params)
+        elif signal.event_type == signals.VIDEO_BUILD_GLYPHS:
+            self.build_glyphs(signal.params)
+        elif signal.event_type == signals.VIDEO_PUT_PIXEL:
+            self.put_pixel(*signal.params)
+        elif signal.event_type == signals.VIDEO_FILL_INTERVAL:
+            self.fill_interval(*signal.params)
+        elif signal.event_type == signals.VIDEO_FILL_RECT:
+            self.fill_rect(*signal.params)
+        elif signal.event_type == signals.VIDEO_SET_CAPTION:
+            self.set_caption_message(signal.params)
+        elif signal.event_type == signals.VIDEO_SET_CLIPBOARD_TEXT:
+            self.set_clipboard_text(*signal.params)
+        elif signal.event_type == signals.VIDEO_SET_CODEPAGE:
+            self.set_codepage(signal.params)
+        elif signal.event_type == signals.VIDEO_SET_PIXEL_PAGES:
+            self.set_pixel_pages(signal.params)
+
     # signal handlers
 
     def set_mode(self, mode_info):
@@ -253,11 +263,11 @@ class VideoPlugin(object):
     def fill_interval(self, pagenum, x0, x1, y, index):
         """Fill a scanline interval in a solid attribute."""
 
-    def put_interval(self, pagenum, x, y, colours):
-        """Write a list of attributes to a scanline interval."""
+    def set_pixel_pages(self, pages):
+        """Use the interpreter's numpy arrays [y][x] of attributes as graphics pages."""
 
-    def put_rect(self, pagenum, x0, y0, x1, y1, array):
-        """Apply numpy array [y][x] of attribytes to an area."""
+    def refresh_rect(self, pagenum, x0, y0, x1, y1):
+        """Redraw an area of a graphics page that has changed."""
 
 
 ###############################################################################
@@ -36,6 +36,8 @@ class VideoPygame(video_graphical.VideoGraphical):
         """Initialise pygame interface."""
         video_graphical.VideoGraphical.__init__(self, input_queue, video_queue, **kwargs)
         self._has_window = False
+        # interpreter's graphics pages
+        self.pixel_pages = None
         # set state objects to whatever is now in state (may have been unpickled)
         if not pygame:
             logging.warning('PyGame module not found.')
@@ -429,6 +431,8 @@ class VideoPygame(video_graphical.VideoGraphical):
                         for _ in range(self.num_pages)]
         for i in range(self.num_pages):
             self.canvas[i].set_palette(self.work_palette)
+        # interpreter's graphics pages, set in set_pixel_pages
+        self.pixel_pages = None
         # initialise clipboard
         self.clipboard = video_graphical.ClipboardInterface(self,
                 mode_info.width, mode_info.height)
@@ -472,6 +476,8 @@ class VideoPygame(video_graphical.VideoGraphical):
 
     def clear_rows(self, back_attr, start, stop):
         """Clear a range of screen rows."""
+        if self.pixel_pages:
+            return
         bg = (0, 0, back_attr)
         scroll_area = pygame.Rect(0, (start-1)*self.font_height,
                                   self.size[0], (stop-start+1)*self.font_height)
@@ -485,6 +491,8 @@ class VideoPygame(video_graphical.VideoGraphical):
 
     def copy_page(self, src, dst):
         """Copy source to destination page."""
+        if self.pixel_pages:
+            return
         self.canvas[dst].blit(self.canvas[src], (0, 0))
         self.screen_changed = True
 
@@ -505,6 +513,8 @@ class VideoPygame(video_graphical.VideoGraphical):
 
     def scroll_up(self, from_line, scroll_height, back_attr):
         """Scroll the screen up between from_line and scroll_height."""
+        if self.pixel_pages:
+            return
         temp_scroll_area = pygame.Rect(
                 0, (from_line-1)*self.font_height,
                 self.size[0], (scroll_height-from_line+1) * self.font_height)
@@ -521,6 +531,8 @@ class VideoPygame(video_graphical.VideoGraphical):
 
     def scroll_down(self, from_line, scroll_height, back_attr):
         """Scroll the screen down between from_line and scroll_height."""
+        if self.pixel_pages:
+            return
         temp_scroll_area = pygame.Rect(
                 0, (from_line-1) * self.font_height,
                 self.size[0], (scroll_height-from_line+1) * self.font_height)
@@ -537,7 +549,7 @@ class VideoPygame(video_graphical.VideoGraphical):
     def put_glyph(self, pagenum, row, col, cp, is_fullwidth, fore, back, blink, underline, for_keys):
         """Put a single-byte character at a given position."""
         if not self.text_mode:
-            # in graphics mode, a put_rect call does the actual drawing
+            # in graphics mode, the interpreter draws on the pixel pages
             return
         color = (0, 0, fore + self.num_fore_attrs*back + 128*blink)
         bg = (0, 0, back)
@@ -599,20 +611,17 @@ class VideoPygame(video_graphical.VideoGraphical):
         self.canvas[pagenum].fill(index, (x0, y, dx, 1))
         self.screen_changed = True
 
-    def put_interval(self, pagenum, x, y, colours):
-        """Write a list of attributes to a scanline interval."""
-        # reference the interval on the canvas
-        pygame.surfarray.pixels2d(self.canvas[pagenum]
-                )[x:x+len(colours), y] = numpy.array(colours).astype(int)
-        self.screen_changed = True
-
-    def put_rect(self, pagenum, x0, y0, x1, y1, array):
-        """Apply numpy array [y][x] of attribytes to an area."""
-        if (x1 < x0) or (y1 < y0):
-            return
-        # reference the destination area
-        pygame.surfarray.pixels2d(self.canvas[pagenum].subsurface(
-            pygame.Rect(x0, y0, x1-x0+1, y1-y0+1)))[:] = numpy.array(array).T
+    def set_pixel_pages(self, pages):
+        """Use the interpreter's numpy arrays [y][x] of attributes as graphics pages."""
+        self.pixel_pages = pages
+        for pagenum in range(len(pages)):
+            self.refresh_rect(pagenum, 0, 0, self.size[0]-1, self.size[1]-1)
+
+    def refresh_rect(self, pagenum, x0, y0, x1, y1):
+        """Redraw an area of a graphics page that has changed."""
+        # copy straight from the interpreter's page, no intermediate array
+        pygame.surfarray.pixels2d(self.canvas[pagenum])[x0:x1+1, y0:y1+1] = (
+                self.pixel_pages[pagenum][y0:y1+1, x0:x1+1].T)
         self.screen_changed = True
 
 ###############################################################################
@@ -95,6 +95,8 @@ class VideoSDL2(video_graphical.VideoGraphical):
         self.kwargs = kwargs
         # we need a set_mode call to be really up and running
         self._has_window = False
+        # pixel pages are the interpreter's buffers
+        self.pixels_shared = False
         # ensure the correct SDL2 video driver is chosen for Windows
         # since this gets messed up if we also import pygame
         if platform.system() == 'Windows':
@@ -545,6 +547,8 @@ class VideoSDL2(video_graphical.VideoGraphical):
         self.pixels = [
                 pixels2d(canvas.contents)
                 for canvas in self.canvas]
+        # graphics pages are replaced by the interpreter's in set_pixel_pages
+        self.pixels_shared = False
         # create work surface for border and composite
         self.border_x = int(canvas_width * self.border_width // 200)
         self.border_y = int(canvas_height * self.border_width // 200)
@@ -605,6 +609,8 @@ class VideoSDL2(video_graphical.VideoGraphical):
 
     def clear_rows(self, back_attr, start, stop):
         """Clear a range of screen rows."""
+        if self.pixels_shared:
+            return
         scroll_area = sdl2.SDL_Rect(
                 0, (start-1)*self.font_height,
                 self.size[0], (stop-start+1)*self.font_height)
@@ -618,6 +624,8 @@ class VideoSDL2(video_graphical.VideoGraphical):
 
     def copy_page(self, src, dst):
         """Copy source to destination page."""
+        if self.pixels_shared:
+            return
         self.pixels[dst][:] = self.pixels[src][:]
         # alternative:
         # sdl2.SDL_BlitSurface(self.canvas[src], None, self.canvas[dst], None)
@@ -638,6 +646,8 @@ class VideoSDL2(video_graphical.VideoGraphical):
 
     def scroll_up(self, from_line, scroll_height, back_attr):
         """Scroll the screen up between from_line and scroll_height."""
+        if self.pixels_shared:
+            return
         pixels = self.pixels[self.apagenum]
         # these are exclusive ranges [x0, x1) etc
         x0, x1 = 0, self.size[0]
@@ -649,6 +659,8 @@ class VideoSDL2(video_graphical.VideoGraphical):
 
     def scroll_down(self, from_line, scroll_height, back_attr):
         """Scroll the screen down between from_line and scroll_height."""
+        if self.pixels_shared:
+            return
         pixels = self.pixels[self.apagenum]
         # these are exclusive ranges [x0, x1) etc
         x0, x1 = 0, self.size[0]
@@ -661,7 +673,7 @@ class VideoSDL2(video_graphical.VideoGraphical):
     def put_glyph(self, pagenum, row, col, cp, is_fullwidth, fore, back, blink, underline, for_keys):
         """Put a character at a given position."""
         if not self.text_mode:
-            # in graphics mode, a put_rect call does the actual drawing
+            # in graphics mode, the interpreter draws on the pixel pages
             return
         attr = fore + self.num_fore_attrs*back + 128*blink
         x0, y0 = (col-1)*self.font_width, (row-1)*self.font_height
@@ -718,18 +730,15 @@ class VideoSDL2(video_graphical.VideoGraphical):
         sdl2.SDL_FillRect(self.canvas[pagenum], rect, index)
         self.screen_changed = True
 
-    def put_interval(self, pagenum, x, y, colours):
-        """Write a list of attributes to a scanline interval."""
-        # reference the interval on the canvas
-        self.pixels[pagenum][x:x+len(colours), y] = numpy.array(colours).astype(int)
+    def set_pixel_pages(self, pages):
+        """Use the interpreter's numpy arrays [y][x] of attributes as graphics pages."""
+        # [x][y] views like pixels2d; the interpreter draws straight onto our canvas
+        self.pixels = [page.view(numpy.uint8).T for page in pages]
+        self.pixels_shared = True
         self.screen_changed = True
 
-    def put_rect(self, pagenum, x0, y0, x1, y1, array):
-        """Apply numpy array [y][x] of attribytes to an area."""
-        if (x1 < x0) or (y1 < y0):
-            return
-        # reference the destination area
-        self.pixels[pagenum][x0:x1+1, y0:y1+1] = numpy.array(array).T
+    def refresh_rect(self, pagenum, x0, y0, x1, y1):
+        """Redraw an area of a graphics page that has changed."""
         self.screen_changed = True
 
 
@@ -26,6 +26,8 @@ from . import basic
 from .basic import signals
 from . import state
 from . import config
+from . import batch
+from . import template
 
 
 def main():
@@ -44,6 +46,13 @@ def main():
             elif command == 'convert':
                 # convert and exit
                 convert(settings)
+            elif command == 'batch':
+                # run a batch of programs and exit
+                batch.run_batch(*settings.get_batch_parameters(),
+                                session_params=settings.get_session_parameters())
+            elif command == 'serve':
+                # run jobs on a pre-initialised session until interrupted
+                template.serve(settings.get('serve'), settings.get_session_parameters())
             elif settings.get_interface():
                 # start an interpreter session with interface
                 launch_session(settings)
@@ -114,12 +123,12 @@ def show_platform_info():
 def convert(settings):
     """Perform file format conversion."""
     mode, name_in, name_out = settings.get_converter_parameters()
-    session = basic.Session(**settings.get_session_parameters())
-    try:
-        session.load_program(name_in, rebuild_dict=False)
-        session.save_program(name_out, filetype=mode)
-    except basic.RunError as e:
-        logging.error(e.message)
+    with basic.Session(**settings.get_session_parameters()) as session:
+        try:
+            session.load_program(name_in, rebuild_dict=False)
+            session.save_program(name_out, filetype=mode)
+        except basic.RunError as e:
+            logging.error(e.message)
 
 def launch_session(settings):
     """Start an interactive interpreter session."""
@@ -146,13 +155,15 @@ def launch_session(settings):
         iface.quit_input()
         thread.join()
 
-def run_session(iface=None, resume=False, state_file=None, wait=False,
-                prog=None, commands=(), **session_params):
+def run_session(iface=None, resume=False, state_file=None, state_compression=1,
+                wait=False, prog=None, commands=(), **session_params):
     """Run an interactive BASIC session."""
     try:
-        if resume:
-            session = state.zunpickle(state_file).attach(iface)
+        session = state.zunpickle(state_file) if resume else None
+        if session:
+            session.attach(iface)
         else:
+            # start a new session if there is no state to resume
             session = basic.Session(iface, **session_params)
         try:
             if prog:
@@ -164,7 +175,7 @@ def run_session(iface=None, resume=False, state_file=None, wait=False,
             # SYSTEM called during launch
             pass
         finally:
-            state.zpickle(session, state_file)
+            state.zpickle(session, state_file, state_compression)
             session.close()
     finally:
         if iface:
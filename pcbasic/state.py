@@ -18,8 +18,19 @@ except ImportError:
 import copy_reg
 import os
 import logging
+import hashlib
 import zlib
 import sys
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# marks a snapshot with separately stored blocks
+SNAPSHOT_MAGIC = b'PC-BASIC snapshot 1\n'
+
+# buffers at least this long are stored as raw blocks
+BLOCK_SIZE_MIN = 1024
 
 
 def unpickle_file(name, mode, pos):
@@ -74,20 +85,116 @@ copy_reg.pickle(file, pickle_file)
 copy_reg.pickle(cStringIO.OutputType, pickle_StringIO)
 
 
+class BlockStore(object):
+    """Directory of raw blocks named by their content."""
+
+    def __init__(self, path):
+        """Initialise the block store."""
+        self._path = path
+        self._used = set()
+        # objects loaded by persistent id, so that shared buffers stay shared
+        self._loaded = {}
+
+    def store(self, data):
+        """Write a block unless an identical one is already stored; return its name."""
+        if not os.path.isdir(self._path):
+            os.makedirs(self._path)
+        digest = hashlib.sha1(data).hexdigest()
+        self._used.add(digest)
+        name = os.path.join(self._path, digest)
+        if not os.path.exists(name):
+            with open(name + b'.tmp', b'wb') as f:
+                f.write(data)
+            os.rename(name + b'.tmp', name)
+        return digest
+
+    def load(self, kind, digest, dtype=None, shape=None):
+        """Read a block; arrays are memory-mapped copy-on-write."""
+        name = os.path.join(self._path, digest)
+        if kind == b'ndarray':
+            return numpy.memmap(name, dtype=dtype, mode='c', shape=shape)
+        with open(name, b'rb') as f:
+            data = f.read()
+        if kind == b'bytearray':
+            return bytearray(data)
+        return data
+
+    def persistent_id(self, obj):
+        """Store large buffers as raw blocks and return a reference; None for other objects."""
+        # the object id distinguishes equal buffers that are separate objects
+        if type(obj) == bytearray and len(obj) >= BLOCK_SIZE_MIN:
+            return b'bytearray', self.store(obj), id(obj)
+        elif type(obj) == cStringIO.OutputType:
+            value = obj.getvalue()
+            if len(value) >= BLOCK_SIZE_MIN:
+                return b'str', self.store(value), id(obj), obj.tell()
+        elif numpy and isinstance(obj, numpy.ndarray) and obj.nbytes >= BLOCK_SIZE_MIN:
+            data = numpy.ascontiguousarray(obj).tostring()
+            return b'ndarray', self.store(data), id(obj), obj.dtype.str, obj.shape
+        return None
+
+    def persistent_load(self, pid):
+        """Load an object stored as a raw block."""
+        try:
+            return self._loaded[pid]
+        except KeyError:
+            pass
+        kind, digest = pid[:2]
+        if kind == b'ndarray':
+            obj = self.load(kind, digest, *pid[3:])
+        elif kind == b'str':
+            obj = unpickle_StringIO(self.load(kind, digest), pid[3])
+        else:
+            obj = self.load(kind, digest)
+        self._loaded[pid] = obj
+        return obj
+
+    def prune(self):
+        """Remove blocks not used since the store was opened."""
+        if os.path.isdir(self._path):
+            for name in os.listdir(self._path):
+                if name not in self._used:
+                    # blocks may still be memory-mapped by a resumed session, which Windows
+                    # doesn't allow to be removed; they are tried again at the next snapshot
+                    try:
+                        os.remove(os.path.join(self._path, name))
+                    except EnvironmentError as e:
+                        logging.debug('Could not remove unused block %s: %s', name, e)
+
+
+def get_block_path(state_file):
+    """Directory for the raw blocks belonging to a state file."""
+    return state_file + b'.blocks'
+
 def zunpickle(state_file):
-    """Read a compressed pickle string."""
+    """Read a snapshot; return None if it can't be read or is in an older format."""
     if state_file:
         try:
             with open(state_file, 'rb') as f:
-                return pickle.loads(zlib.decompress(f.read()))
+                data = f.read()
+            if not data.startswith(SNAPSHOT_MAGIC):
+                # the session objects have changed since, so older state can't be restored
+                logging.warning('State file %s is in an older format and cannot be resumed', state_file)
+                return None
+            unpickler = pickle.Unpickler(StringIO(zlib.decompress(data[len(SNAPSHOT_MAGIC):])))
+            unpickler.persistent_load = BlockStore(get_block_path(state_file)).persistent_load
+            return unpickler.load()
         except EnvironmentError:
             logging.error('Could not read from %s', state_file)
 
-def zpickle(obj, state_file):
-    """Retuen a compressed pickle string."""
+def zpickle(obj, state_file, compression=1):
+    """Write a snapshot; blocks that have not changed since the last one are kept."""
     if state_file:
         try:
+            blocks = BlockStore(get_block_path(state_file))
+            buf = StringIO()
+            # only snapshots store buffers as blocks, other pickles are unaffected
+            pickler = pickle.Pickler(buf, 2)
+            pickler.persistent_id = blocks.persistent_id
+            pickler.dump(obj)
             with open(state_file, 'wb') as f:
-                f.write(zlib.compress(pickle.dumps(obj, 2)))
+                f.write(SNAPSHOT_MAGIC)
+                f.write(zlib.compress(buf.getvalue(), compression))
+            blocks.prune()
         except EnvironmentError:
             logging.error('Could not write to %s', state_file)
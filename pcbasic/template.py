@@ -0,0 +1,152 @@
+"""
+PC-BASIC - template.py
+Pre-initialised sessions and job server
+
+(c) 2016 Rob Hagemans
+This file is released under the GNU GPL version 3 or later.
+"""
+
+import os
+import socket
+import logging
+import traceback
+import SocketServer
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+from . import basic
+from . import batch
+# registers the picklers needed to copy a session
+from . import state
+
+
+class SessionTemplate(object):
+    """Fully initialised session from which new sessions are created cheaply."""
+
+    def __init__(self, **session_params):
+        """Initialise the template session."""
+        self._session = basic.Session(**session_params)
+        self._pickled = pickle.dumps(self._session, 2)
+
+    def new_session(self):
+        """Return an independent copy of the template session."""
+        return pickle.loads(self._pickled)
+
+    def run(self, func, *args):
+        """Call func(session, *args) on a copy of the template session and return the result."""
+        if not hasattr(os, 'fork'):
+            session = self.new_session()
+            try:
+                return func(session, *args)
+            finally:
+                close_files(session)
+        # the forked child shares the template's memory copy-on-write
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                os.close(read_fd)
+                try:
+                    result = pickle.dumps((True, func(self._session, *args)), 2)
+                except BaseException:
+                    result = pickle.dumps((False, traceback.format_exc()), 2)
+                finally:
+                    # the child exits without cleanup, so write out what the job left open
+                    close_files(self._session)
+                with os.fdopen(write_fd, 'wb') as f:
+                    f.write(result)
+            finally:
+                os._exit(0)
+        os.close(write_fd)
+        with os.fdopen(read_fd, 'rb') as f:
+            data = f.read()
+        os.waitpid(pid, 0)
+        if not data:
+            raise RuntimeError('Session process ended without result')
+        success, result = pickle.loads(data)
+        if not success:
+            raise RuntimeError(result)
+        return result
+
+
+def close_files(session):
+    """Close the files and devices of a session copy."""
+    session.files.close_all()
+    session.devices.close()
+
+
+class JobServer(SocketServer.TCPServer):
+    """Run jobs sent over TCP on copies of a template session."""
+
+    # clients are served one at a time, so that jobs are only forked from the main thread
+    allow_reuse_address = True
+
+    def __init__(self, address, template):
+        """Initialise the server."""
+        SocketServer.TCPServer.__init__(self, address, JobHandler)
+        self.template = template
+        # jobs may only use files below the server's working directory
+        self.base = os.path.realpath(os.getcwd())
+
+    def allows(self, job):
+        """Check if all files of a job are below the server's base directory."""
+        return all(
+            os.path.realpath(name).startswith(os.path.join(self.base, b''))
+            for name in job if name)
+
+
+class JobHandler(SocketServer.StreamRequestHandler):
+    """Read manifest lines from a client and reply with a report line for each job."""
+
+    def handle(self):
+        """Handle a client connection."""
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                break
+            job = batch.parse_job(line, self.server.base)
+            if not job:
+                continue
+            if not self.server.allows(job):
+                logging.warning(u'Job %s refused: files must be below %s', job[0], self.server.base)
+                self.wfile.write(batch.format_result((job[0], b'refused', 0., b'')))
+                self.wfile.flush()
+                continue
+            try:
+                result = self.server.template.run(batch.run_job, job)
+            except RuntimeError as e:
+                logging.error(u'Job %s failed: %s', job[0], e)
+                result = job[0], b'exception', 0., b''
+            self.wfile.write(batch.format_result(result))
+            self.wfile.flush()
+
+
+def is_loopback(host):
+    """Check if a host name resolves to a loopback address."""
+    try:
+        return socket.gethostbyname(host).startswith('127.')
+    except socket.error:
+        return False
+
+def serve(address, session_params):
+    """Run a job server on [host:]port until interrupted."""
+    host, _, port = address.rpartition(u':')
+    try:
+        port = int(port)
+    except ValueError:
+        logging.error(u'Could not serve on %s: port must be a number', address)
+        return
+    # clients are not authenticated and jobs write files, so only accept local connections
+    if host and not is_loopback(host):
+        logging.error(u'Could not serve on %s: host must be a loopback address', address)
+        return
+    for key in batch.REDIRECTION_PARAMS:
+        session_params.pop(key, None)
+    server = JobServer((host or u'localhost', port), SessionTemplate(**session_params))
+    logging.info(u'Serving on %s:%d', host or u'localhost', port)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
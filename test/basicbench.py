@@ -0,0 +1,230 @@
+#!/usr/bin/env python2
+
+""" PC-BASIC interpreter benchmark
+
+Runs a catalogue of BASIC workloads on an in-process Session and reports
+wall time, statements per second and peak memory for each.
+
+usage: basicbench.py [--save=FILE] [--compare=FILE] [--tolerance=PCT] [--repeat=N] [WORKLOAD ...]
+
+(c) 2016 Rob Hagemans
+This file is released under the GNU GPL version 3 or later.
+"""
+
+import sys
+import os
+import time
+import json
+import shutil
+import tempfile
+import platform
+import multiprocessing
+try:
+    import resource
+except ImportError:
+    resource = None
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pcbasic import basic
+from pcbasic import version
+
+# workload programs; each must end with END
+workloads = [
+    ('arith', [
+        '10 DEFINT I: A! = 0: B# = 0',
+        '20 FOR I = 1 TO 20000',
+        '30 A! = A! + I * 1.5 - I / 3: B# = B# + SQR(I)',
+        '40 NEXT',
+        '50 END',
+    ]),
+    ('string', [
+        '10 DEFINT I',
+        '20 FOR I = 1 TO 3000',
+        '30 A$ = A$ + CHR$(65 + I MOD 26): IF LEN(A$) > 200 THEN A$ = MID$(A$, 100)',
+        '40 B$ = STR$(I) + LEFT$(A$, 5) + RIGHT$(A$, 5)',
+        '50 NEXT',
+        '60 END',
+    ]),
+    ('sort', [
+        '10 DEFINT I-K: N = 100: DIM A(N)',
+        '20 FOR I = 1 TO N: A(I) = (I * 79) MOD 101: NEXT',
+        '30 FOR I = 1 TO N - 1: FOR J = 1 TO N - I',
+        '40 IF A(J) > A(J + 1) THEN SWAP A(J), A(J + 1)',
+        '50 NEXT J, I',
+        '60 END',
+    ]),
+    ('print', [
+        '10 DEFINT I: CLS',
+        '20 FOR I = 1 TO 2000',
+        '30 PRINT I; "The quick brown fox jumps over the lazy dog"; I * 1.5',
+        '40 NEXT',
+        '50 END',
+    ]),
+    ('graphics', [
+        '10 DEFINT I: SCREEN 1',
+        '20 FOR I = 0 TO 199 STEP 2',
+        '30 LINE (0, I)-(319, 199 - I), I MOD 4',
+        '40 LINE (I, 0)-(I + 50, 50), 3, B',
+        '50 CIRCLE (160, 100), I \\ 2, 2',
+        '60 PSET (I, I), 1',
+        '70 NEXT',
+        '80 END',
+    ]),
+    ('paint', [
+        '10 DEFINT I: SCREEN 1',
+        '20 FOR I = 1 TO 3',
+        '30 CLS: CIRCLE (160, 100), 90, 3: LINE (100, 60)-(220, 140), 3, B',
+        '40 PAINT (160, 100), I MOD 3 + 1, 3',
+        '50 NEXT',
+        '60 END',
+    ]),
+    # PLAY is paced by the note durations and dominated by waiting
+    ('play', [
+        '10 DEFINT I',
+        '20 FOR I = 1 TO 10',
+        '30 PLAY "MBT255L64O3CDEFGABO4C"',
+        '40 NEXT',
+        '50 END',
+    ]),
+    ('fileio', [
+        '10 DEFINT I',
+        '20 OPEN "O", 1, "BENCH.DAT"',
+        '30 FOR I = 1 TO 2000: WRITE #1, I, I * 1.5, "record", I: NEXT',
+        '40 CLOSE 1',
+        '50 OPEN "I", 1, "BENCH.DAT"',
+        '60 WHILE NOT EOF(1): INPUT #1, A, B!, C$, D%: WEND',
+        '70 CLOSE 1: KILL "BENCH.DAT"',
+        '80 END',
+    ]),
+    ('gosub', [
+        '10 DEFINT I',
+        '20 FOR I = 1 TO 5000: GOSUB 100: NEXT',
+        '30 END',
+        '100 ON I MOD 3 + 1 GOSUB 200, 300, 400',
+        '110 RETURN',
+        '200 A = A + 1: RETURN',
+        '300 A = A - 1: RETURN',
+        '400 RETURN',
+    ]),
+]
+
+
+def run_once(lines, workdir):
+    """Run a workload program once; return wall time and statement count."""
+    session = basic.Session(mount_dict={b'Z': (workdir, u'')}, current_device=b'Z')
+    try:
+        for line in lines:
+            session.execute(line)
+        # count statements by wrapping the parser
+        parse_statement = session.parser.parse_statement
+        count = [0]
+        def counted():
+            count[0] += 1
+            return parse_statement()
+        session.parser.parse_statement = counted
+        start = time.time()
+        session.execute('RUN')
+        seconds = time.time() - start
+        # errors are reported on screen; syntax errors leave error_num at zero
+        if session.parser.error_num or session.edit_prompt:
+            raise RuntimeError('error in workload program')
+    finally:
+        session.close()
+    # don't count the end-of-program check
+    return seconds, count[0] - 1
+
+def run_workload(name, lines, repeat, results):
+    """Run a workload and put its best timing on the result queue."""
+    workdir = tempfile.mkdtemp()
+    try:
+        timings = [run_once(lines, workdir) for _ in range(repeat)]
+    except Exception as e:
+        results.put((name, {'error': str(e)}))
+        return
+    finally:
+        shutil.rmtree(workdir)
+    seconds, statements = min(timings)
+    result = {
+        'seconds': seconds,
+        'statements': statements,
+        'statements_per_second': statements / seconds if seconds else None,
+        'peak_memory_kb': None,
+    }
+    if resource:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on OS X, kilobytes elsewhere
+        result['peak_memory_kb'] = peak // 1024 if platform.system() == 'Darwin' else peak
+    results.put((name, result))
+
+def run(names, repeat):
+    """Run workloads, each in a fresh process so peak memory is its own."""
+    report = {}
+    results = multiprocessing.Queue()
+    for name, lines in workloads:
+        if names and name not in names:
+            continue
+        worker = multiprocessing.Process(target=run_workload, args=(name, lines, repeat, results))
+        worker.start()
+        name, result = results.get()
+        worker.join()
+        if 'error' in result:
+            print '%-9s failed: %s' % (name, result['error'])
+        else:
+            report[name] = result
+    return report
+
+def compare(report, baseline, tolerance):
+    """Print throughput relative to baseline; return names of slowed-down workloads."""
+    slower = []
+    for name in sorted(report):
+        try:
+            old = baseline[name]['statements_per_second']
+        except KeyError:
+            continue
+        new = report[name]['statements_per_second']
+        if not old or not new:
+            continue
+        change = 100. * (new - old) / old
+        flag = ''
+        if change < -tolerance:
+            flag = '  SLOWER'
+            slower.append(name)
+        print '%-9s %12.0f -> %12.0f stmt/s  %+6.1f%%%s' % (name, old, new, change, flag)
+    return slower
+
+def main(args):
+    """Parse arguments, run benchmarks and report."""
+    options = dict(arg[2:].split('=', 1) for arg in args if arg.startswith('--') and '=' in arg)
+    names = [arg for arg in args if not arg.startswith('--')]
+    repeat = int(options.get('repeat', 3))
+    tolerance = float(options.get('tolerance', 10))
+    report = run(names, repeat)
+    for name, _ in workloads:
+        if name in report:
+            r = report[name]
+            print '%-9s %8.3f s %9d stmts %10.0f stmt/s %8s kB' % (
+                name, r['seconds'], r['statements'], r['statements_per_second'] or 0,
+                r['peak_memory_kb'] if r['peak_memory_kb'] is not None else '-')
+    result = {
+        'version': version.__version__,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': repeat,
+        'workloads': report,
+    }
+    if 'save' in options:
+        with open(options['save'], 'w') as f:
+            json.dump(result, f, indent=2, sort_keys=True)
+    if 'compare' in options:
+        with open(options['compare']) as f:
+            baseline = json.load(f)['workloads']
+        print
+        slower = compare(report, baseline, tolerance)
+        if slower:
+            print '%d workload(s) more than %g%% slower than baseline: %s' % (
+                len(slower), tolerance, ' '.join(slower))
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
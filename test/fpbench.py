@@ -0,0 +1,49 @@
+#!/usr/bin/env python2
+
+""" PC-BASIC MBF arithmetic microbenchmark
+
+(c) 2016 Rob Hagemans
+This file is released under the GNU GPL version 3 or later.
+"""
+
+import sys
+import os
+import random
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pcbasic.basic import fp
+
+# number of operations per timing run
+number = 20000
+repeat = 5
+
+def random_floats(cls, count):
+    """Generate normalised floats of moderate size."""
+    random.seed(0)
+    return [cls.from_bytes(bytearray(random.randint(0, 255) for _ in range(cls.byte_size-1)) +
+                bytearray((random.randint(110, 150),)))
+            for _ in range(count)]
+
+def run(cls):
+    """Time the basic operations for one precision."""
+    values = random_floats(cls, 100)
+    pairs = [(values[i], values[(i*7+3) % len(values)]) for i in range(len(values))]
+    benches = [
+        ('add', lambda x, y: fp.add(x, y)),
+        ('mul', lambda x, y: fp.mul(x, y)),
+        ('div', lambda x, y: fp.div(x, y)),
+        ('compare', lambda x, y: x.gt(y)),
+        ('pack', lambda x, y: fp.from_bytes(x.copy().to_bytes())),
+    ]
+    for name, fn in benches:
+        def loop():
+            for _ in xrange(number // len(pairs)):
+                for x, y in pairs:
+                    fn(x, y)
+        best = min(timeit.repeat(loop, number=1, repeat=repeat))
+        print '%-7s %-8s %8.2f us/op' % (cls.__name__, name, best * 1e6 / number)
+
+if __name__ == '__main__':
+    for cls in (fp.Single, fp.Double):
+        run(cls)
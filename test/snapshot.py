@@ -0,0 +1,91 @@
+#!/usr/bin/env python2
+
+""" PC-BASIC snapshot tests
+
+Checks that sessions attached to an interface can be pickled and resumed.
+
+usage: snapshot.py [-v]
+
+(c) 2016 Rob Hagemans
+This file is released under the GNU GPL version 3 or later.
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+import Queue
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pcbasic import basic
+from pcbasic import state
+from pcbasic.main import run_session
+
+# state file written by a version before snapshots were stored with raw blocks
+baseline_state = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.sav')
+
+
+class QueueInterface(object):
+    """Stand-in for an interface, providing real queues."""
+
+    def get_queues(self):
+        """Return input, video and audio queues."""
+        return Queue.Queue(), Queue.Queue(), Queue.Queue()
+
+
+class SnapshotTest(unittest.TestCase):
+    """Snapshot and resume sessions with real queues."""
+
+    def setUp(self):
+        """Create a scratch directory."""
+        self.dir = tempfile.mkdtemp()
+        self.state_file = os.path.join(self.dir, 'state.sav')
+
+    def tearDown(self):
+        """Remove the scratch directory."""
+        shutil.rmtree(self.dir)
+
+    def snapshot(self, session):
+        """Snapshot, close and resume a session."""
+        session.execute('10 PRINT 1\rRUN')
+        state.zpickle(session, self.state_file)
+        session.close()
+        return state.zunpickle(self.state_file).attach(QueueInterface())
+
+    def test_profiler(self):
+        """Snapshot a profiled session."""
+        profile = os.path.join(self.dir, 'profile.txt')
+        session = basic.Session(QueueInterface(), option_profile=profile)
+        resumed = self.snapshot(session)
+        self.assertTrue(os.path.isfile(profile))
+        # the resumed session is still profiled
+        resumed.execute('RUN')
+        resumed.close()
+        self.assertTrue(resumed.profiler.sections['video'][0] > 0)
+
+    def test_counters(self):
+        """Snapshot a session with counters enabled."""
+        counters = os.path.join(self.dir, 'counters.txt')
+        session = basic.Session(QueueInterface(), option_counters=counters)
+        resumed = self.snapshot(session)
+        self.assertTrue(os.path.isfile(counters))
+        # the resumed session still counts video signals
+        resumed.counters.reset()
+        resumed.execute('RUN')
+        resumed.close()
+        self.assertTrue(any(name.startswith('video.') for name in resumed.get_counters()))
+
+    def test_baseline_format(self):
+        """Resume from a state file in the older format."""
+        shutil.copy(baseline_state, self.state_file)
+        self.assertEqual(state.zunpickle(self.state_file), None)
+        # a new session is started and its state saved in the current format
+        run_session(resume=True, state_file=self.state_file, commands=[b'A=1', b'SYSTEM'])
+        resumed = state.zunpickle(self.state_file).attach()
+        self.assertEqual(resumed.get_variable('A!'), 1)
+        resumed.close()
+
+
+if __name__ == '__main__':
+    unittest.main()